@@ -1,7 +1,5 @@
 #!/bin/bash
+# Translate all zipped National Coverages to NetCDF in parallel, skipping datasets which are unchanged since the last run.
+# Any additional arguments are passed to batch mode
 script_dir=$(readlink -f ${0%/*})
-for zip in $(find /g/data1/rr2/National_Coverages/ -name "*.zip" | sort)
-do
-  echo Translating file $zip to NetCDF
-  $script_dir/geophys2netcdf.sh $zip
-done
+$script_dir/geophys2netcdf.sh batch /g/data1/rr2/National_Coverages/ --journal translate_natcovs_journal.json --report translate_natcovs_report.json --checkpoint $*
@@ -1,7 +1,5 @@
 #!/bin/bash
+# Update NetCDF metadata for all National Coverages in parallel, skipping datasets which are unchanged since the last run.
+# Any additional arguments are passed to batch mode
 script_dir=$(readlink -f ${0%/*})
-for nc in $(find /g/data1/rr2/National_Coverages/ -name "*.nc" | sort)
-do
-  echo Updating NetCDF Metadata for file $nc
-  $script_dir/geophys2netcdf.sh $nc
-done
+$script_dir/geophys2netcdf.sh batch /g/data1/rr2/National_Coverages/ --extension nc --journal update_natcovs_journal.json --report update_natcovs_report.json $*
@@ -35,6 +35,10 @@ Created on 29/02/2016
 import sys
 import logging
 
+# N.B: Bump for each release (setup.py reads this). Batch runs with a rebuild journal reconvert datasets converted
+# by any other version
+__version__ = '0.1.0'
+
 # Set handler for root logger to standard output
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.INFO)
@@ -49,6 +53,21 @@ logger.setLevel(logging.INFO)  # Initial logging level for this module
 from geophys2netcdf._geophys2netcdf import Geophys2NetCDF
 from geophys2netcdf._ers2netcdf import ERS2NetCDF
 from geophys2netcdf._zip2netcdf import Zip2NetCDF
+from geophys2netcdf._grid_reader import GDALGridReader, ERSRawReader, ERSZipStreamReader, open_grid_reader
+from geophys2netcdf._grid_reader import make_vsizip_path, split_vsizip_path, grid_file_exists, read_text
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from geophys2netcdf._chunk_writer import DirectChunkWriter
+from geophys2netcdf._quantization import Quantizer, get_quantization_tolerance
+from geophys2netcdf._packing import Packer, PackingRangeError, is_packed, get_packing_tolerance
+from geophys2netcdf._sparse import get_allocated_chunks, get_chunk_windows, is_fill_array
+from geophys2netcdf._chunking import plan_chunk_shape, ACCESS_PROFILES
+from geophys2netcdf._codecs import CompressionCodec, select_codec
+from geophys2netcdf._workspace import Workspace, WorkspaceException
+from geophys2netcdf._checkpoint import ConversionCheckpoint
+from geophys2netcdf._statistics import BandStatistics, compute_variable_statistics, get_variable_statistics
+from geophys2netcdf._footprint import FootprintAccumulator, get_dataset_footprint, compute_file_footprint
+from geophys2netcdf._overviews import OverviewBuilder, get_overview_variables
+from geophys2netcdf._rechunk import rechunk_file, rechunk_files
 from geophys2netcdf.thredds_catalog import THREDDSCatalog
 #from geophys_utils import DataStats
 #from geophys_utils import netcdf2convex_hull
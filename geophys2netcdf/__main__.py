@@ -40,6 +40,24 @@ from geophys2netcdf import ERS2NetCDF, Zip2NetCDF
 
 
 def main():
+    # Batch mode: python -m geophys2netcdf batch <directory_or_manifest> [options]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'batch':
+        from geophys2netcdf._batch import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+
+    # Rechunk mode: python -m geophys2netcdf rechunk <nc_file_directory_or_manifest> [...] [options]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'rechunk':
+        from geophys2netcdf._rechunk import main as rechunk_main
+        rechunk_main(sys.argv[2:])
+        return
+
+    # Footprint mode: python -m geophys2netcdf footprint <nc_file_directory_or_manifest> [...] [options]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'footprint':
+        from geophys2netcdf._footprint import main as footprint_main
+        footprint_main(sys.argv[2:])
+        return
+
     assert len(
         sys.argv) >= 2, 'Must provide input file path and optional output file path'
     input_path = os.path.abspath(sys.argv[1])
@@ -0,0 +1,486 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Batch conversion functions
+Created on 16/10/2026
+
+Converts many datasets in a process pool with bounded concurrency and per-dataset failure isolation.
+Each worker process keeps one converter object per input type and reuses it for every dataset it handles,
+so that interpreter, GDAL and owslib start-up costs are paid once per worker rather than once per dataset.
+Existing .nc files found in the source have their metadata updated instead of being converted.
+An optional RebuildJournal allows unchanged datasets to be skipped and killed runs to be resumed.
+Datasets whose worker process dies (e.g. killed for using too much memory) or exceeds an optional time limit are
+reported as failed rather than leaving the batch waiting for results which will never arrive.
+
+Usage: python -m geophys2netcdf batch <directory_or_manifest> [options]
+'''
+import os
+import sys
+import json
+import time
+import errno
+import signal
+import logging
+import argparse
+import traceback
+import multiprocessing
+try:
+    from multiprocessing import SimpleQueue
+except ImportError:
+    from multiprocessing.queues import SimpleQueue
+
+from geophys2netcdf import __version__
+from geophys2netcdf._geophys2netcdf import Geophys2NetCDF
+from geophys2netcdf._ers2netcdf import ERS2NetCDF
+from geophys2netcdf._zip2netcdf import Zip2NetCDF
+from geophys2netcdf._chunking import ACCESS_PROFILES
+from geophys2netcdf.metadata_json import is_fast_digest_available
+from geophys2netcdf._journal import RebuildJournal, get_file_state, get_seed_entry, get_uuid, get_csw_fingerprint
+from geophys2netcdf.datetime_utils import get_iso_utcnow
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+CONVERTER_CLASSES = {converter_class.FILE_EXTENSION: converter_class
+                     for converter_class in [ERS2NetCDF, Zip2NetCDF]
+                     }
+UPDATE_EXTENSION = 'nc'  # Existing NetCDF files have their metadata updated
+WORKER_POLL_SECONDS = 5.0  # Interval between checks for dead or timed-out worker processes
+
+# Per-process state set by _init_worker()
+_worker_options = None
+_worker_start_queue = None
+_worker_converters = {}
+
+
+def find_datasets(source, extensions=None):
+    '''
+    Function to return a sorted list of input dataset paths.
+    Parameters:
+        source: Directory to search recursively, or manifest file listing one input path per line
+            (blank lines and lines starting with "#" are ignored)
+        extensions: List of input file extensions to search for in a directory. Defaults to ['zip'].
+            Use ['nc'] to update metadata for existing NetCDF files
+    '''
+    extensions = ['.' + extension.lstrip('.').lower() for extension in (extensions or ['zip'])]
+
+    if os.path.isdir(source):
+        dataset_paths = []
+        for dirpath, _dirnames, filenames in os.walk(source):
+            dataset_paths += [os.path.join(dirpath, filename) for filename in filenames
+                              if os.path.splitext(filename)[1].lower() in extensions]
+        return sorted([os.path.abspath(dataset_path) for dataset_path in dataset_paths])
+
+    assert os.path.isfile(source), '%s is not a directory or manifest file' % source
+    manifest_file = open(source, 'r')
+    dataset_paths = [line.strip() for line in manifest_file
+                     if line.strip() and not line.strip().startswith('#')]
+    manifest_file.close()
+    return [os.path.abspath(dataset_path) for dataset_path in dataset_paths]
+
+
+def _init_worker(options, start_queue=None):
+    '''
+    Process pool initialiser - stores batch options for use by convert_dataset(), and the queue on which
+    _convert_task() reports the start of each task to the parent process
+    '''
+    global _worker_options, _worker_start_queue
+    _worker_options = options
+    _worker_start_queue = start_queue
+
+
+def get_converter(extension):
+    '''
+    Function to return this worker's converter object for the specified input extension, creating it on first use
+    '''
+    converter = _worker_converters.get(extension)
+    if converter is None:
+        converter_class = CONVERTER_CLASSES.get(extension) or ERS2NetCDF  # ERS2NetCDF updates .nc files
+        converter = converter_class(debug=_worker_options.get('debug', False),
+                                    scratch_root=_worker_options.get('scratch_root'),
+                                    fast_digest=_worker_options.get('fast_digest', False))
+        _worker_converters[extension] = converter
+    return converter
+
+
+def get_journal_options():
+    '''
+    Function to return the conversion options which should trigger a rebuild when changed
+    '''
+    journal_options = dict(_worker_options.get('writer_options', {}))
+    journal_options.pop('reader', None)  # Does not affect output
+    journal_options.pop('checkpoint', None)  # Does not affect output
+    journal_options.pop('compress_processes', None)  # Does not affect output
+    journal_options['writer'] = _worker_options.get('writer')
+    return journal_options
+
+
+def convert_dataset(input_path, journal_entry=None):
+    '''
+    Function to convert a single dataset (or update metadata for a .nc file), isolating any failure.
+    If journal_entry is not None, the dataset is skipped when its inputs are unchanged, and only its
+    metadata is updated when only the CSW record has changed
+    Returns:
+        Result dict for the summary report, including the new journal entry on success
+    '''
+    start_time = time.time()
+    extension = os.path.splitext(input_path)[1].lower().lstrip('.')
+    result = {'input_path': input_path,
+              'output_path': os.path.splitext(input_path)[0] + '.nc',
+              'pid': os.getpid(),
+              }
+    try:
+        assert extension in CONVERTER_CLASSES or extension == UPDATE_EXTENSION, \
+            'Unrecognised input file extension for %s' % input_path
+        converter = get_converter(extension)
+        force_overwrite = _worker_options.get('force_overwrite', False)
+        fast_digest = _worker_options.get('fast_digest', False)
+
+        csw_fingerprint = None
+        change = 'data'
+        if journal_entry is not None and not force_overwrite:
+            csw_fingerprint = get_csw_fingerprint(converter, Geophys2NetCDF.GA_CSW,
+                                                  get_uuid(os.path.dirname(result['output_path'])))
+            seed_entry = None
+            if not journal_entry and extension != UPDATE_EXTENSION:
+                # Output converted before journalling began is recorded rather than rebuilt
+                seed_entry = get_seed_entry(input_path, result['output_path'], csw_fingerprint,
+                                            __version__, get_journal_options(), fast_digest)
+
+            if seed_entry:
+                change = 'unchanged'
+                result['journal_entry'] = seed_entry
+            else:
+                input_state = get_file_state(input_path, journal_entry.get('input'), fast_digest)
+                change = RebuildJournal.compare(journal_entry, input_state, csw_fingerprint,
+                                                __version__, get_journal_options())
+            if not os.path.exists(result['output_path']):
+                change = 'data'
+            elif change == 'data' and extension != UPDATE_EXTENSION:
+                force_overwrite = True  # Existing output is stale
+
+        if change == 'unchanged':
+            logger.info('Skipping unchanged dataset %s', input_path)
+            result['status'] = 'SKIPPED'
+        elif extension == UPDATE_EXTENSION:
+            logger.info('Updating NetCDF metadata for %s', input_path)
+            converter.update_nc_metadata(input_path)
+            converter.check_json_metadata()
+            result['status'] = 'OK'
+        else:
+            logger.info('Translating %s to %s', input_path, result['output_path'])
+            translate_options = dict(_worker_options.get('writer_options', {}))
+            if extension == Zip2NetCDF.FILE_EXTENSION:
+                translate_options['extract'] = _worker_options.get('extract', False)
+            converter.translate(input_path,
+                                result['output_path'],
+                                force_overwrite=force_overwrite,
+                                writer=_worker_options.get('writer'),
+                                **translate_options)
+            result['status'] = 'OK'
+
+        if result['status'] == 'OK' and journal_entry is not None:
+            # N.B: Input state is recorded after processing because metadata updates modify .nc inputs
+            result['journal_entry'] = {'input': get_file_state(input_path, fast_digest=fast_digest),
+                                       'csw_fingerprint': csw_fingerprint or get_csw_fingerprint(
+                                           converter, Geophys2NetCDF.GA_CSW, converter.uuid),
+                                       'tool_version': __version__,
+                                       'options': get_journal_options(),
+                                       }
+    except Exception as e:
+        logger.error('ERROR: Processing of %s failed: %s', input_path, e)
+        # Discard converter in case it has been left in a bad state
+        _worker_converters.pop(extension, None)
+        result['status'] = 'FAILED'
+        result['error'] = '%s: %s' % (e.__class__.__name__, e)
+        result['traceback'] = traceback.format_exc()
+
+    # Remove any unzipped files now rather than when the worker exits
+    for converter in _worker_converters.values():
+        if hasattr(converter, 'remove_temp_files') and not _worker_options.get('debug', False):
+            converter.remove_temp_files()
+
+    result['elapsed_seconds'] = round(time.time() - start_time, 3)
+    return result
+
+
+def _convert_task(task):
+    '''
+    Process pool wrapper for convert_dataset() taking a single (input_path, journal_entry) tuple
+    '''
+    if _worker_start_queue is not None:
+        _worker_start_queue.put((task[0], os.getpid(), time.time()))
+    return convert_dataset(*task)
+
+
+def is_process_alive(pid):
+    '''
+    Function to return True if a process with the given ID exists
+    '''
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+def get_lost_task_result(input_path, pid, start_time, error):
+    '''
+    Function to return a failure result dict for a task whose worker process did not return a result
+    '''
+    logger.error('ERROR: Processing of %s failed: %s', input_path, error)
+    return {'input_path': input_path,
+            'output_path': os.path.splitext(input_path)[0] + '.nc',
+            'pid': pid,
+            'status': 'FAILED',
+            'error': error,
+            'elapsed_seconds': round(time.time() - start_time, 3),
+            }
+
+
+def run_pool_tasks(pool, start_queue, task_list, record_result, task_timeout=None):
+    '''
+    Function to run tasks in a process pool, passing each result to record_result() as it arrives.
+    Tasks are monitored through the start times and process IDs reported by _convert_task(), so that a task whose
+    worker dies, or which runs for longer than task_timeout seconds (in which case its worker is killed), is
+    recorded as failed. The pool replaces dead workers, so remaining tasks continue to run
+    Returns:
+        Number of tasks lost to dead or killed workers
+    '''
+    pending_results = {task[0]: pool.apply_async(_convert_task, (task,)) for task in task_list}
+    running_tasks = {}  # (pid, start_time) keyed by input path
+    killed_paths = set()
+    lost_count = 0
+    while pending_results:
+        # Wait for any result, or until the next check for dead or timed-out workers
+        poll_start_time = time.time()
+        while time.time() - poll_start_time < WORKER_POLL_SECONDS:
+            if [async_result for async_result in pending_results.values() if async_result.ready()]:
+                break
+            time.sleep(0.1)
+
+        for input_path, async_result in list(pending_results.items()):
+            if async_result.ready():
+                record_result(async_result.get())
+                del pending_results[input_path]
+                running_tasks.pop(input_path, None)
+
+        while not start_queue.empty():
+            input_path, pid, start_time = start_queue.get()
+            if input_path in pending_results:
+                running_tasks[input_path] = (pid, start_time)
+
+        for input_path, (pid, start_time) in list(running_tasks.items()):
+            if is_process_alive(pid):
+                if task_timeout and time.time() - start_time > task_timeout and input_path not in killed_paths:
+                    logger.warning('WARNING: Killing worker process %d after %.0fs processing %s',
+                                   pid, time.time() - start_time, input_path)
+                    os.kill(pid, signal.SIGKILL)
+                    killed_paths.add(input_path)
+                continue
+            pending_results[input_path].wait(1.0)
+            if pending_results[input_path].ready():
+                continue  # Worker exited after returning its result
+
+            if input_path in killed_paths:
+                error = 'Timed out after %.0fs' % task_timeout
+            else:
+                error = 'Worker process %d died' % pid
+            record_result(get_lost_task_result(input_path, pid, start_time, error))
+            del pending_results[input_path]
+            del running_tasks[input_path]
+            lost_count += 1
+
+    return lost_count
+
+
+def run_batch(dataset_paths, processes=None, report_path=None, journal_path=None, task_timeout=None, **options):
+    '''
+    Function to convert a list of datasets in a process pool
+    Parameters:
+        dataset_paths: List of input paths
+        processes: Maximum number of concurrent worker processes. Defaults to number of CPUs
+        report_path: Optional path for JSON summary report
+        journal_path: Optional path of RebuildJournal used to skip unchanged datasets and resume killed runs
+        task_timeout: Optional maximum number of seconds for each dataset when using a process pool
+        options: debug, scratch_root, fast_digest, force_overwrite, writer and writer_options (dict)
+            for each conversion
+    Returns:
+        List of result dicts
+    '''
+    processes = min(processes or multiprocessing.cpu_count(), max(len(dataset_paths), 1))
+    logger.info('Processing %d datasets using %d processes', len(dataset_paths), processes)
+
+    journal = RebuildJournal(journal_path) if journal_path else None
+    # N.B: An empty dict (rather than None) enables journal checks for datasets not yet in the journal
+    task_list = [(dataset_path, (journal.get_entry(dataset_path) or {}) if journal else None)
+                 for dataset_path in dataset_paths]
+
+    def record_result(result):
+        logger.info('%s: %s (%.1fs)', result['status'], result['input_path'], result['elapsed_seconds'])
+        if journal:
+            if 'journal_entry' in result:
+                journal.set_entry(result['input_path'], result.pop('journal_entry'))
+            elif result['status'] == 'FAILED':
+                journal.remove_entry(result['input_path'])
+        result_list.append(result)
+
+    start_time = get_iso_utcnow()
+    result_list = []
+    if processes == 1:  # Run in-process for easier debugging
+        _init_worker(options)
+        for task in task_list:
+            record_result(_convert_task(task))
+    else:
+        start_queue = SimpleQueue()  # N.B: Unbuffered, so start messages are not lost if a worker dies
+        pool = multiprocessing.Pool(processes, _init_worker, (options, start_queue))
+        try:
+            if run_pool_tasks(pool, start_queue, task_list, record_result, task_timeout):
+                pool.terminate()  # N.B: close() would wait forever for the results of lost tasks
+            else:
+                pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    result_list.sort(key=lambda result: result['input_path'])
+    failed_list = [result for result in result_list if result['status'] == 'FAILED']
+    skipped_list = [result for result in result_list if result['status'] == 'SKIPPED']
+
+    logger.info('Batch processing finished: %d succeeded, %d skipped, %d failed',
+                len(result_list) - len(failed_list) - len(skipped_list), len(skipped_list), len(failed_list))
+    for result in failed_list:
+        logger.info('FAILED: %s (%s)', result['input_path'], result['error'])
+
+    if report_path:
+        report_file = open(report_path, 'w')
+        json.dump({'start_time': start_time,
+                   'end_time': get_iso_utcnow(),
+                   'processes': processes,
+                   'succeeded': len(result_list) - len(failed_list) - len(skipped_list),
+                   'skipped': len(skipped_list),
+                   'failed': len(failed_list),
+                   'results': result_list,
+                   }, report_file, indent=4)
+        report_file.close()
+        logger.info('Summary report written to %s', report_path)
+
+    return result_list
+
+
+def parse_band_options(option_specs):
+    '''
+    Function to return a dict of per-band option specifications keyed by "Band<n>" (or "*" for all bands) from
+    a list of "[Band<n>=]<spec>" command line arguments, or None if no arguments were given
+    '''
+    if not option_specs:
+        return None
+    return dict([option_spec.split('=', 1) if '=' in option_spec else ('*', option_spec)
+                 for option_spec in option_specs])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m geophys2netcdf batch',
+                                     description='Convert many datasets to NetCDF (or update NetCDF metadata) in parallel')
+    parser.add_argument('source', help='Directory to search or manifest file listing input paths')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='Maximum number of concurrent conversions (default: number of CPUs)')
+    parser.add_argument('-e', '--extension', action='append', dest='extensions',
+                        help='Input file extension to search for (default: zip). Use "nc" to update metadata. May be repeated')
+    parser.add_argument('-r', '--report', dest='report_path', default=None,
+                        help='Path of JSON summary report')
+    parser.add_argument('-j', '--journal', dest='journal_path', default=None,
+                        help='Path of rebuild journal used to skip unchanged datasets and resume killed runs')
+    parser.add_argument('-f', '--force', dest='force_overwrite', action='store_true',
+                        help='Overwrite existing NetCDF files (existing files are backed up)')
+    parser.add_argument('--writer', choices=['stream', 'gdal'], default=None,
+                        help='Writer for initial translation (default: gdal, or stream if options supported only by the '
+                        'in-process writer are given)')
+    parser.add_argument('--reader', choices=['gdal', 'memmap'], default=None,
+                        help='Reader for ERS data access by in-process writer')
+    parser.add_argument('--codec', default=None,
+                        help='Compression codec, e.g. "deflate:4+shuffle" or "auto"')
+    parser.add_argument('--access-profile', choices=ACCESS_PROFILES, default=None,
+                        help='Declared access profile for chunk planning')
+    parser.add_argument('--scratch-root', default=None,
+                        help='Directory for large temporary files')
+    parser.add_argument('--overviews', default=None,
+                        help='Number of overview levels to build in each file, or "auto"')
+    parser.add_argument('--checkpoint', action='store_true',
+                        help='Record progress of in-process writer so that interrupted conversions resume')
+    parser.add_argument('--precision', action='append', default=None,
+                        help='Lossy precision for floating point bands, e.g. "digits:4" or "tolerance:0.01". '
+                        'Prefix with "Band<n>=" to apply to a single band. May be repeated')
+    parser.add_argument('--packing', action='append', default=None,
+                        help='Integer packing for floating point bands, e.g. "int16" or "int16:0.01" for a maximum '
+                        'error of 0.01. Prefix with "Band<n>=" to apply to a single band. May be repeated')
+    parser.add_argument('--compress-processes', type=int, default=None,
+                        help='Number of processes compressing chunks for direct chunk writes by in-process writer '
+                        '(requires -p 1, since batch workers cannot start processes)')
+    parser.add_argument('--extract', action='store_true',
+                        help='Unzip zip inputs into scratch space instead of reading them in place')
+    parser.add_argument('--fast-digest', action='store_true',
+                        help='Record xxh64 digests in .metadata.json and the journal (requires xxhash)')
+    parser.add_argument('--task-timeout', type=float, default=None,
+                        help='Maximum number of seconds for each dataset before its worker process is killed')
+    parser.add_argument('--debug', action='store_true', help='Enable debug output')
+    args = parser.parse_args(argv)
+    if args.fast_digest and not is_fast_digest_available():
+        parser.error('--fast-digest requires the xxhash module')
+    if args.compress_processes > 1 and args.processes != 1:
+        parser.error('--compress-processes requires -p 1, since batch workers cannot start processes')
+
+    writer_options = {key: value for key, value in [('reader', args.reader),
+                                                    ('codec', args.codec),
+                                                    ('access_profile', args.access_profile),
+                                                    ('checkpoint', args.checkpoint or None),
+                                                    ('overview_levels', args.overviews),
+                                                    ('compress_processes', args.compress_processes),
+                                                    ('precision', parse_band_options(args.precision)),
+                                                    ('packing', parse_band_options(args.packing)),
+                                                    ]
+                      if value is not None}
+
+    result_list = run_batch(find_datasets(args.source, args.extensions),
+                            processes=args.processes,
+                            report_path=args.report_path,
+                            journal_path=args.journal_path,
+                            task_timeout=args.task_timeout,
+                            debug=args.debug,
+                            scratch_root=args.scratch_root,
+                            fast_digest=args.fast_digest,
+                            extract=args.extract,
+                            force_overwrite=args.force_overwrite,
+                            writer=args.writer,
+                            writer_options=writer_options)
+
+    if [result for result in result_list if result['status'] == 'FAILED']:
+        sys.exit(1)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+ConversionCheckpoint Class
+Created on 16/10/2026
+
+Progress checkpoint for resumable NetCDF conversion. The checkpoint is saved atomically next to the output
+file after each row-band of chunks has been written and flushed, and records a checksum of every band's data
+in each completed row-band so that a resumed conversion can verify the partial output before trusting it.
+
+Checkpoint files have the form:
+    {'signature': <dict identifying input file and conversion options>,
+     'temp_path': <path of partial NetCDF file>,
+     'chunk_rows': <rows per row-band>,
+     'row_bands': [[<md5 hex of band 1 data>, <md5 hex of band 2 data>, ...], ...]}
+'''
+import os
+import json
+import hashlib
+import logging
+
+from geophys2netcdf._grid_reader import split_vsizip_path
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+CHECKPOINT_EXTENSION = '.checkpoint.json'
+
+
+def array_checksum(array):
+    '''
+    Function to return the hex MD5 digest of the contents of a numpy array
+    '''
+    return hashlib.md5(array.tostring()).hexdigest()
+
+
+def get_input_signature(input_path):
+    '''
+    Function to return a dict identifying the current state of an input file (or the zip archive containing it)
+    '''
+    zip_member = split_vsizip_path(input_path)
+    file_path = zip_member[0] if zip_member else input_path
+    if not os.path.isfile(file_path):
+        return {'path': input_path}
+
+    file_stat = os.stat(file_path)
+    return {'path': input_path,
+            'size': file_stat.st_size,
+            'mtime': file_stat.st_mtime,
+            }
+
+
+class ConversionCheckpoint(object):
+    '''
+    Class definition for ConversionCheckpoint
+    '''
+
+    def __init__(self, output_path):
+        '''
+        Constructor for class ConversionCheckpoint. Loads existing checkpoint for output_path if present
+        '''
+        self._checkpoint_path = os.path.abspath(output_path) + CHECKPOINT_EXTENSION
+        self._checkpoint_dict = None
+
+        if os.path.exists(self._checkpoint_path):
+            try:
+                checkpoint_file = open(self._checkpoint_path, 'r')
+                self._checkpoint_dict = json.load(checkpoint_file)
+                checkpoint_file.close()
+                logger.info('Read checkpoint %s with %d completed row-bands',
+                            self._checkpoint_path, len(self._checkpoint_dict['row_bands']))
+            except Exception as e:
+                logger.warning('WARNING: Ignoring unreadable checkpoint %s: %s', self._checkpoint_path, e)
+                self._checkpoint_dict = None
+
+    def can_resume(self, signature, temp_path):
+        '''
+        Function to return True if the existing checkpoint was created for the same input and options
+        and its partial output file still exists
+        '''
+        return bool(self._checkpoint_dict
+                    and self._checkpoint_dict.get('signature') == signature
+                    and self._checkpoint_dict.get('temp_path') == temp_path
+                    and os.path.isfile(temp_path))
+
+    def start(self, signature, temp_path, chunk_rows):
+        '''
+        Function to begin a new checkpoint, discarding any previous progress
+        '''
+        self._checkpoint_dict = {'signature': signature,
+                                 'temp_path': temp_path,
+                                 'chunk_rows': chunk_rows,
+                                 'row_bands': [],
+                                 }
+        self.save()
+
+    def truncate(self, row_band_count):
+        '''
+        Function to discard progress after the first row_band_count row-bands
+        '''
+        del self._checkpoint_dict['row_bands'][row_band_count:]
+        self.save()
+
+    def add_row_band(self, checksums):
+        '''
+        Function to record the band checksums of the next completed row-band and save the checkpoint
+        N.B: The output file must have been flushed to disk before this is called
+        '''
+        self._checkpoint_dict['row_bands'].append(checksums)
+        self.save()
+
+    def save(self):
+        '''
+        Function to write the checkpoint atomically so that a killed run never leaves a truncated checkpoint
+        '''
+        temp_path = self._checkpoint_path + '.tmp'
+        checkpoint_file = open(temp_path, 'w')
+        json.dump(self._checkpoint_dict, checkpoint_file, indent=4, sort_keys=True)
+        checkpoint_file.close()
+        os.rename(temp_path, self._checkpoint_path)
+
+    def remove(self):
+        if os.path.exists(self._checkpoint_path):
+            os.remove(self._checkpoint_path)
+        self._checkpoint_dict = None
+
+    @property
+    def checkpoint_path(self):
+        return self._checkpoint_path
+
+    @property
+    def chunk_rows(self):
+        return self._checkpoint_dict['chunk_rows'] if self._checkpoint_dict else None
+
+    @property
+    def row_bands(self):
+        return self._checkpoint_dict['row_bands'] if self._checkpoint_dict else []
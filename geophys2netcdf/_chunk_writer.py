@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+DirectChunkWriter Class
+Created on 16/10/2026
+
+Writes pre-compressed chunks straight into the HDF5 datasets of a NetCDF4 file with h5py direct chunk writes.
+The HDF5 filter pipeline (as used by netCDF4, gdal_translate and nccopy) compresses on a single thread, so this
+allows chunk compression to be spread over a process pool, with the compressed chunks written in order by one writer.
+Only codecs which can be reproduced exactly in-process (deflate with optional shuffle, or none) are supported.
+'''
+import logging
+import multiprocessing
+import numpy as np
+
+from geophys2netcdf._codecs import CompressionCodec
+from geophys2netcdf._sparse import is_fill_array
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+# Optional dependency required only for direct chunk writes
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+DIRECT_CODEC_NAMES = ['none', 'deflate']  # Codecs whose HDF5 filter output can be reproduced in-process
+DEFAULT_CACHE_BYTES = 67108864  # 64MiB HDF5 chunk cache for regular (non-direct) writes, e.g. overview rows
+DEFAULT_CACHE_SLOTS = 100003  # Prime number of chunk cache hash slots
+
+
+def can_write_direct(codec):
+    '''
+    Function to return True if chunks compressed with codec can be written directly
+    '''
+    return h5py is not None and CompressionCodec.from_string(codec).name in DIRECT_CODEC_NAMES
+
+
+def compress_chunk(task):
+    '''
+    Process pool task function to compress a single chunk
+    Parameter:
+        task: (codec_spec, chunk_array) tuple
+    Returns:
+        Compressed bytes as would be produced by the HDF5 filter pipeline
+    '''
+    codec_spec, chunk_array = task
+    return CompressionCodec.from_string(codec_spec).compress(chunk_array)
+
+
+class DirectChunkWriter(object):
+    '''
+    Class definition for DirectChunkWriter
+    N.B: The NetCDF file must have been created (and closed) by netCDF4 with variables whose filters match codec.
+    The file must not be open in netCDF4 while this object is open.
+    '''
+
+    def __init__(self, nc_path, codec, processes=None, cache_bytes=None, skip_fill_chunks=True):
+        '''
+        Constructor for class DirectChunkWriter
+        Parameters:
+            nc_path: Path of existing NetCDF4 file to open for writing
+            codec: CompressionCodec or codec specification string matching the filters of the data variables
+            processes: Number of compression processes. Defaults to number of CPUs. Chunks are compressed
+                in-process if 1, or if called from a daemon process (e.g. a batch worker)
+            cache_bytes: HDF5 chunk cache size for regular writes
+            skip_fill_chunks: Boolean flag indicating whether to leave chunks which are entirely fill value unallocated
+        '''
+        assert h5py is not None, 'h5py is required for direct chunk writes'
+        self._codec = CompressionCodec.from_string(codec)
+        assert self._codec.name in DIRECT_CODEC_NAMES, 'Codec %s cannot be written directly' % self._codec
+
+        self._h5_file = h5py.File(nc_path, 'r+',
+                                  rdcc_nbytes=cache_bytes or DEFAULT_CACHE_BYTES,
+                                  rdcc_nslots=DEFAULT_CACHE_SLOTS)
+
+        processes = processes or multiprocessing.cpu_count()
+        if processes > 1 and multiprocessing.current_process().daemon:
+            logger.warning('WARNING: Daemon processes cannot start compression processes. Compressing chunks in-process')
+            processes = 1
+        self._processes = processes
+        self._skip_fill_chunks = skip_fill_chunks
+        self._skipped_chunk_count = 0
+        self._pool = multiprocessing.Pool(processes) if processes > 1 else None
+        logger.debug('Direct chunk writes to %s with codec %s using %d processes', nc_path, self._codec, processes)
+
+    def get_dataset(self, variable_name):
+        '''
+        Function to return the h5py.Dataset for a NetCDF variable, checking that its filters match the codec
+        '''
+        dataset = self._h5_file[variable_name]
+        if self._codec.name == 'none':
+            assert dataset.compression is None, 'Variable %s has %s compression' % (variable_name,
+                                                                                     dataset.compression)
+        else:
+            assert (dataset.compression == 'gzip' and dataset.compression_opts == self._codec.level
+                    and bool(dataset.shuffle) == self._codec.shuffle), \
+                'Filters of variable %s do not match codec %s' % (variable_name, self._codec)
+        assert not dataset.fletcher32, 'Variable %s has a checksum filter' % variable_name
+        return dataset
+
+    def get_chunk_tasks(self, dataset, array, row_start):
+        '''
+        Function to split a block of full-width rows into chunks. Edge chunks are padded with the fill value
+        since HDF5 always stores whole chunks. Chunks which are entirely fill value may be omitted
+        Returns:
+            (chunk_offsets, tasks) where chunk_offsets is a list of (row, col) chunk origins and tasks is a list
+            of compress_chunk() arguments
+        '''
+        chunk_rows, chunk_cols = dataset.chunks
+        nrows, ncols = dataset.shape
+        row_end = row_start + array.shape[0]
+        assert array.shape[1] == ncols, 'Array must contain whole rows of %s' % dataset.name
+        assert row_start % chunk_rows == 0 and (array.shape[0] % chunk_rows == 0 or row_end == nrows), \
+            'Rows %d:%d of %s are not chunk-aligned' % (row_start, row_end, dataset.name)
+
+        array = np.asarray(array, dtype=dataset.dtype)
+        chunk_offsets = []
+        tasks = []
+        for chunk_row in range(0, array.shape[0], chunk_rows):
+            for chunk_col in range(0, ncols, chunk_cols):
+                chunk_array = array[chunk_row:chunk_row + chunk_rows, chunk_col:chunk_col + chunk_cols]
+                if self._skip_fill_chunks and is_fill_array(chunk_array, dataset.fillvalue):
+                    self._skipped_chunk_count += 1
+                    continue
+                if chunk_array.shape != (chunk_rows, chunk_cols):
+                    padded_array = np.empty((chunk_rows, chunk_cols), dtype=dataset.dtype)
+                    padded_array[...] = dataset.fillvalue
+                    padded_array[:chunk_array.shape[0], :chunk_array.shape[1]] = chunk_array
+                    chunk_array = padded_array
+
+                chunk_offsets.append((row_start + chunk_row, chunk_col))
+                tasks.append((str(self._codec), np.ascontiguousarray(chunk_array)))
+
+        return chunk_offsets, tasks
+
+    def write_rows(self, variable_rows, row_start):
+        '''
+        Function to compress and write chunk-aligned blocks of full-width rows for one or more variables.
+        Chunks are compressed concurrently and written in order as they are completed
+        Parameters:
+            variable_rows: List of (variable_name, array) tuples
+            row_start: Index of first row of each array
+        '''
+        datasets = []
+        chunk_offsets = []
+        tasks = []
+        for variable_name, array in variable_rows:
+            dataset = self.get_dataset(variable_name)
+            variable_offsets, variable_tasks = self.get_chunk_tasks(dataset, array, row_start)
+            datasets += [dataset] * len(variable_offsets)
+            chunk_offsets += variable_offsets
+            tasks += variable_tasks
+
+        if self._pool:
+            compressed_chunks = self._pool.imap(compress_chunk, tasks,
+                                                max(len(tasks) // (self._processes * 4), 1))
+        else:
+            compressed_chunks = (compress_chunk(task) for task in tasks)
+
+        for chunk_index, compressed_chunk in enumerate(compressed_chunks):
+            datasets[chunk_index].id.write_direct_chunk(chunk_offsets[chunk_index], compressed_chunk)
+
+    def flush(self):
+        '''
+        Function to flush all written chunks to disk
+        '''
+        self._h5_file.flush()
+
+    def close(self, terminate=False):
+        '''
+        Function to stop compression processes and close the file
+        Parameter:
+            terminate: Boolean flag indicating whether to terminate outstanding compression tasks
+        '''
+        logger.debug('%d chunks of fill values left unallocated', self._skipped_chunk_count)
+        if self._pool:
+            if terminate:
+                self._pool.terminate()
+            else:
+                self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._h5_file.close()
+
+    @property
+    def codec(self):
+        return self._codec
+
+    @property
+    def processes(self):
+        return self._processes
+
+    @property
+    def skipped_chunk_count(self):
+        return self._skipped_chunk_count
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Chunk shape planning functions
+Created on 16/10/2026
+
+Chooses 2D (y, x) chunk shapes from grid dimensions, dtype, a target chunk size in bytes and a declared
+access profile, instead of applying a fixed chunk size to every grid regardless of its size.
+'''
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+DEFAULT_TARGET_CHUNK_BYTES = 1048576  # 1MiB matches the default HDF5 chunk cache size
+MAX_CHUNK_BYTES = 67108864  # 64MiB - upper limit for whole-grid chunks
+MIN_CHUNK_SIZE = 16  # Minimum size of a chunk dimension (unless the grid itself is smaller)
+
+# Declared access profiles:
+#    tile: Windowed subsetting (e.g. THREDDS/OPeNDAP, WMS) - square power-of-two chunks
+#    rows: Full-width row scans - chunks span the whole x dimension
+#    whole: Whole-grid reads - a single chunk if the grid is small enough, otherwise full-width rows
+ACCESS_PROFILES = ['tile', 'rows', 'whole']
+DEFAULT_ACCESS_PROFILE = 'tile'
+
+
+def fixed_chunk_shape(shape, chunk_size):
+    '''
+    Function to return square chunk shape of chunk_size clamped to grid shape, with a rationale string
+    '''
+    chunk_shape = tuple(min(chunk_size, dimension_size)
+                        for dimension_size in shape)
+    return chunk_shape, 'fixed chunk size %d requested' % chunk_size
+
+
+def plan_chunk_shape(shape, dtype, target_chunk_bytes=None, access_profile=None):
+    '''
+    Function to choose a chunk shape for a 2D (y, x) grid
+    Parameters:
+        shape: (nrows, ncols) tuple
+        dtype: numpy dtype (or dtype string) of data variable
+        target_chunk_bytes: Target uncompressed chunk size in bytes. Defaults to DEFAULT_TARGET_CHUNK_BYTES
+        access_profile: One of ACCESS_PROFILES. Defaults to DEFAULT_ACCESS_PROFILE
+    Returns:
+        (chunk_shape, rationale) where chunk_shape is a (rows, cols) tuple and rationale is a string
+    '''
+    access_profile = access_profile or DEFAULT_ACCESS_PROFILE
+    assert access_profile in ACCESS_PROFILES, 'Invalid access profile "%s". Must be one of %s' % (
+        access_profile, ACCESS_PROFILES)
+    target_chunk_bytes = target_chunk_bytes or DEFAULT_TARGET_CHUNK_BYTES
+    assert len(shape) == 2, 'Grid must have exactly two dimensions'
+
+    nrows, ncols = [int(dimension_size) for dimension_size in shape]
+    itemsize = np.dtype(dtype).itemsize
+    target_cells = max(target_chunk_bytes // itemsize, 1)
+    grid_bytes = nrows * ncols * itemsize
+
+    if access_profile == 'whole' and grid_bytes <= MAX_CHUNK_BYTES:
+        chunk_shape = (nrows, ncols)
+        rationale = 'whole grid (%d bytes) fits in a single chunk' % grid_bytes
+
+    elif access_profile in ['rows', 'whole']:
+        if access_profile == 'whole':  # Too big for one chunk - use largest permissible full-width chunks
+            target_cells = max(MAX_CHUNK_BYTES // itemsize, 1)
+        chunk_rows = min(max(target_cells // ncols, 1), nrows)
+        chunk_shape = (chunk_rows, ncols)
+        rationale = 'full-width chunks of %d rows for %s access (%d bytes/chunk)' % (
+            chunk_rows, access_profile, chunk_rows * ncols * itemsize)
+
+    else:  # tile
+        # Largest power-of-two square side not exceeding the target chunk size
+        side = max(2 ** int(math.floor(math.log(math.sqrt(target_cells), 2))), MIN_CHUNK_SIZE)
+        chunk_shape = (min(side, nrows), min(side, ncols))
+        if chunk_shape == (nrows, ncols):
+            rationale = 'grid smaller than %dx%d tile - single chunk' % (side, side)
+        else:
+            rationale = '%dx%d tiles closest to %d byte target for windowed access' % (
+                side, side, target_chunk_bytes)
+
+    logger.debug('Chunk shape %s chosen for %s grid of shape %s: %s',
+                 chunk_shape, np.dtype(dtype).name, shape, rationale)
+    return chunk_shape, rationale
+
+
+def set_chunking_attributes(netcdf_dataset, chunk_shape, rationale, access_profile=None):
+    '''
+    Function to record chosen chunk shape and its rationale as global attributes of an open NetCDF dataset
+    '''
+    netcdf_dataset.chunk_access_profile = access_profile or 'fixed'
+    netcdf_dataset.chunking_rationale = 'chunk shape %s: %s' % (
+        'x'.join([str(size) for size in chunk_shape]), rationale)
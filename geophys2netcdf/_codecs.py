@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+CompressionCodec Class and codec auto-selection functions
+Created on 16/10/2026
+
+Codec specifications are strings of the form "<name>[:<level>][+shuffle]", e.g. "deflate:2", "deflate:4+shuffle"
+or "zstd:3+shuffle". HDF5 plugin codecs (zstd, blosc) are only used when the installed netCDF4 library supports them.
+'''
+import os
+import zlib
+import time
+import logging
+import numpy as np
+import netCDF4
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+# Optional compressors used only for trial compression of plugin codecs
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import blosc
+except ImportError:
+    blosc = None
+
+DEFAULT_CODEC = 'deflate:2'
+DEFAULT_MIN_WRITE_SPEED = 20.0  # Minimum acceptable compression throughput for auto-selection in MB/s
+DEFAULT_SAMPLE_CHUNKS = 8  # Number of chunks trial-compressed for auto-selection
+
+# Candidate codec specifications for auto-selection, in order of preference for equal compressed sizes
+AUTO_CANDIDATES = ['deflate:1', 'deflate:1+shuffle',
+                   'deflate:2', 'deflate:2+shuffle',
+                   'deflate:4', 'deflate:4+shuffle',
+                   'deflate:6+shuffle',
+                   'zstd:1+shuffle', 'zstd:3+shuffle', 'zstd:9+shuffle',
+                   'blosc_lz4:5', 'blosc_zstd:5',
+                   ]
+
+
+class CompressionCodec(object):
+    '''
+    Class definition for CompressionCodec
+    Describes a compression filter pipeline for a NetCDF4/HDF5 variable
+    '''
+    CODEC_NAMES = ['none', 'deflate', 'zstd', 'blosc_lz4', 'blosc_zstd']
+    DEFAULT_LEVELS = {'deflate': 2, 'zstd': 3, 'blosc_lz4': 5, 'blosc_zstd': 5}
+
+    def __init__(self, name='deflate', level=None, shuffle=False):
+        '''
+        Constructor for class CompressionCodec
+        '''
+        name = name.lower().replace('zlib', 'deflate')
+        assert name in CompressionCodec.CODEC_NAMES, 'Invalid codec "%s". Must be one of %s' % (
+            name, CompressionCodec.CODEC_NAMES)
+        self.name = name
+        self.level = level if level is not None else CompressionCodec.DEFAULT_LEVELS.get(name, 0)
+        self.shuffle = bool(shuffle)
+
+    @staticmethod
+    def from_string(codec_spec):
+        '''
+        Function to return a CompressionCodec parsed from a "<name>[:<level>][+shuffle]" string
+        '''
+        if isinstance(codec_spec, CompressionCodec):
+            return codec_spec
+
+        parts = codec_spec.strip().lower().split('+')
+        name_level = parts[0].split(':')
+        return CompressionCodec(name=name_level[0],
+                                level=int(name_level[1]) if len(name_level) > 1 else None,
+                                shuffle='shuffle' in parts[1:])
+
+    def __str__(self):
+        if self.name == 'none':
+            return 'none'
+        return '%s:%d%s' % (self.name, self.level, '+shuffle' if self.shuffle else '')
+
+    def __repr__(self):
+        return 'CompressionCodec(%r)' % str(self)
+
+    def is_available(self):
+        '''
+        Function to return True if the installed netCDF4 library can write this codec
+        '''
+        if self.name in ['none', 'deflate']:
+            return True
+        elif self.name == 'zstd':
+            return bool(getattr(netCDF4, '__has_zstandard_support__', False))
+        elif self.name.startswith('blosc'):
+            return bool(getattr(netCDF4, '__has_blosc_support__', False))
+        return False
+
+    def can_trial(self):
+        '''
+        Function to return True if this codec can be trial-compressed in-process
+        '''
+        if self.name == 'zstd':
+            return zstandard is not None
+        elif self.name.startswith('blosc'):
+            return blosc is not None
+        return True
+
+    def variable_kwargs(self):
+        '''
+        Function to return keyword arguments for netCDF4.Dataset.createVariable()
+        '''
+        if self.name == 'none':
+            return {'zlib': False}
+        elif self.name == 'deflate':
+            return {'zlib': True, 'complevel': self.level, 'shuffle': self.shuffle}
+        elif self.name == 'zstd':
+            return {'compression': 'zstd', 'complevel': self.level, 'shuffle': self.shuffle}
+        else:  # blosc - N.B: blosc applies its own byte shuffle
+            return {'compression': self.name, 'complevel': self.level, 'blosc_shuffle': 1}
+
+    def nccopy_args(self):
+        '''
+        Function to return nccopy compression arguments. Only deflate and shuffle are supported by nccopy
+        '''
+        assert self.name in ['none', 'deflate'], 'nccopy does not support codec %s' % self
+        if self.name == 'none':
+            return ['-d', '0']
+        return ['-d', str(self.level)] + (['-s'] if self.shuffle else [])
+
+    def compress(self, array):
+        '''
+        Function to compress a numpy array in-process using this codec
+        Returns:
+            compressed bytes
+        '''
+        data = np.ascontiguousarray(array)
+        if self.shuffle and self.name in ['deflate', 'zstd']:
+            data = shuffle_bytes(data)
+        else:
+            data = data.tostring()
+
+        if self.name == 'none':
+            return data
+        elif self.name == 'deflate':
+            return zlib.compress(data, self.level)
+        elif self.name == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        else:
+            return blosc.compress(data,
+                                  typesize=array.dtype.itemsize,
+                                  clevel=self.level,
+                                  shuffle=blosc.SHUFFLE,
+                                  cname=self.name.split('_')[1])
+
+
+def shuffle_bytes(array):
+    '''
+    Function to return the bytes of a contiguous array reordered as per the HDF5 shuffle filter,
+    i.e. all first bytes of each element, then all second bytes, etc.
+    '''
+    itemsize = array.dtype.itemsize
+    if itemsize == 1:
+        return array.tostring()
+    return np.frombuffer(array.tostring(), dtype=np.uint8).reshape((-1, itemsize)).T.tostring()
+
+
+def sample_chunks(grid_reader, chunk_shape, sample_count=None, band_number=1):
+    '''
+    Generator yielding up to sample_count chunk-aligned arrays spread evenly across the grid
+    '''
+    sample_count = sample_count or DEFAULT_SAMPLE_CHUNKS
+    chunk_rows, chunk_cols = chunk_shape
+    chunk_count = [(grid_reader.nrows + chunk_rows - 1) // chunk_rows,
+                   (grid_reader.ncols + chunk_cols - 1) // chunk_cols]
+    total_chunks = chunk_count[0] * chunk_count[1]
+
+    for chunk_index in sorted(set(np.linspace(0, total_chunks - 1,
+                                              min(sample_count, total_chunks)).astype(int))):
+        row_start = (chunk_index // chunk_count[1]) * chunk_rows
+        col_start = (chunk_index % chunk_count[1]) * chunk_cols
+        yield np.asarray(grid_reader.read_window(band_number,
+                                                 row_start,
+                                                 min(row_start + chunk_rows, grid_reader.nrows),
+                                                 col_start,
+                                                 min(col_start + chunk_cols, grid_reader.ncols)))
+
+
+def trial_codec(codec, sample_arrays):
+    '''
+    Function to trial-compress a list of sample arrays with the specified codec
+    Returns:
+        dict containing codec, compression ratio and throughput in MB/s
+    '''
+    uncompressed_bytes = 0
+    compressed_bytes = 0
+    start_time = time.time()
+    for sample_array in sample_arrays:
+        uncompressed_bytes += sample_array.nbytes
+        compressed_bytes += len(codec.compress(sample_array))
+    elapsed_time = max(time.time() - start_time, 1e-6)
+
+    return {'codec': str(codec),
+            'ratio': float(uncompressed_bytes) / max(compressed_bytes, 1),
+            'speed': uncompressed_bytes / elapsed_time / 1000000.0,
+            }
+
+
+def select_codec(grid_reader, chunk_shape, dtype, candidates=None,
+                 min_write_speed=None, sample_count=None, band_number=1, sample_function=None):
+    '''
+    Function to select the codec giving the smallest output with a throughput of at least min_write_speed MB/s
+    by trial-compressing a sample of chunks. If no candidate meets the floor, the fastest candidate is chosen.
+    Parameter:
+        sample_function: Function converting each sample array into the values to be written (e.g. quantized or
+            packed). Sample arrays are cast to dtype if not provided
+    Returns:
+        (CompressionCodec, trial_result_list) tuple
+    '''
+    min_write_speed = DEFAULT_MIN_WRITE_SPEED if min_write_speed is None else min_write_speed
+    candidate_codecs = [CompressionCodec.from_string(codec_spec)
+                        for codec_spec in (candidates or AUTO_CANDIDATES)]
+    candidate_codecs = [codec for codec in candidate_codecs
+                        if codec.is_available() and codec.can_trial()]
+    assert candidate_codecs, 'No available compression codecs to trial'
+
+    sample_function = sample_function or (lambda sample_array: sample_array.astype(dtype))
+    sample_arrays = [np.asarray(sample_function(sample_array), dtype=dtype)
+                     for sample_array in sample_chunks(grid_reader, chunk_shape, sample_count, band_number)]
+
+    trial_results = [trial_codec(codec, sample_arrays) for codec in candidate_codecs]
+    for trial_result in trial_results:
+        logger.info('Codec %s: compression ratio %.3f at %.1f MB/s',
+                    trial_result['codec'], trial_result['ratio'], trial_result['speed'])
+
+    acceptable_results = [trial_result for trial_result in trial_results
+                          if trial_result['speed'] >= min_write_speed]
+    if acceptable_results:
+        best_result = max(acceptable_results, key=lambda trial_result: trial_result['ratio'])
+    else:
+        logger.warning('WARNING: No codec achieved %.1f MB/s. Using fastest codec', min_write_speed)
+        best_result = max(trial_results, key=lambda trial_result: trial_result['speed'])
+
+    logger.info('Selected codec %s (compression ratio %.3f at %.1f MB/s)',
+                best_result['codec'], best_result['ratio'], best_result['speed'])
+    return CompressionCodec.from_string(best_result['codec']), trial_results
+
+
+def get_compression_metadata(netcdf_dataset, nc_path):
+    '''
+    Function to return a dict describing the compression codec and achieved compression ratio of a NetCDF file,
+    or None if no codec has been recorded
+    '''
+    if not hasattr(netcdf_dataset, 'compression_codec'):
+        return None
+
+    uncompressed_bytes = sum([variable.size * variable.dtype.itemsize
+                              for variable in netcdf_dataset.variables.values()
+                              if hasattr(variable, 'grid_mapping')])
+    compressed_bytes = os.path.getsize(nc_path)
+    compression_dict = {'codec': netcdf_dataset.compression_codec,
+                        'selection': getattr(netcdf_dataset, 'compression_selection', 'fixed'),
+                        'uncompressed_bytes': int(uncompressed_bytes),
+                        'compressed_bytes': compressed_bytes,
+                        'ratio': float(uncompressed_bytes) / compressed_bytes
+                        }
+    if hasattr(netcdf_dataset, 'compression_trial_ratio'):
+        compression_dict['trial_ratio'] = float(netcdf_dataset.compression_trial_ratio)
+
+    return compression_dict
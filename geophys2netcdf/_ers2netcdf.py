@@ -43,6 +43,8 @@ from dateutil import tz
 
 from geophys2netcdf._geophys2netcdf import Geophys2NetCDF
 from geophys2netcdf.metadata import ERSMetadata
+from geophys2netcdf._grid_reader import grid_file_exists, read_text, get_ers_band_names, get_isi_statistics
+from geophys2netcdf._overviews import rename_overview_variables
 from geophys2netcdf.datetime_utils import read_iso_datetime_string
 logger = logging.getLogger(__name__)
 
@@ -102,28 +104,44 @@ class ERS2NetCDF(Geophys2NetCDF):
 
         return ers_datetime
 
-    def __init__(self, input_path=None, output_path=None, debug=False):
+    def __init__(self, input_path=None, output_path=None, debug=False, writer=None,
+                 scratch_root=None, fast_digest=False, **writer_options):
         '''
         Constructor for class ERS2NetCDF
         '''
-        Geophys2NetCDF.__init__(self, debug)  # Call inherited constructor
+        Geophys2NetCDF.__init__(self, debug, scratch_root, fast_digest)  # Call inherited constructor
 
         if input_path:
-            self.translate(input_path, output_path)
+            self.translate(input_path, output_path, writer=writer, **writer_options)
         else:  # NetCDF path provided
             self._output_path = output_path
 
-    def translate(self, input_path, output_path=None, force_overwrite=False):
+    def translate(self, input_path, output_path=None, force_overwrite=False, writer=None, **writer_options):
         '''
         Function to perform ERS format-specific translation and set self._input_dataset and self._netcdf_dataset
         Overrides Geophys2NetCDF.translate()
+        Parameter:
+            writer: 'stream' for single-pass in-process writer or 'gdal' for gdal_translate + nccopy.
+                Defaults to 'stream' if writer_options include options supported only by the in-process writer,
+                otherwise to Geophys2NetCDF.DEFAULT_WRITER
+            writer_options: Keyword arguments for the in-process writer, e.g. reader='memmap' to memory-map
+                the raw ERS data instead of reading it via GDAL
         '''
         Geophys2NetCDF.translate(
             self, input_path, output_path, force_overwrite)  # Perform initialisations using base class method
 
+        writer = self.get_writer(writer, **writer_options)
+
         if force_overwrite or not os.path.exists(self._output_path):
-            # Use gdal_translate to create basic NetCDF
-            self.gdal_translate(self._input_path, self._output_path)
+            if writer == 'stream':
+                if writer_options.get('packing') and 'value_ranges' not in writer_options:
+                    # Fit packing to precomputed value ranges instead of scanning the grid
+                    writer_options = dict(writer_options, value_ranges=self.get_isi_value_ranges())
+                # Use in-process writer to create basic NetCDF in a single pass
+                self.stream_translate(self._input_path, self._output_path, **writer_options)
+            else:
+                # Use gdal_translate to create basic NetCDF
+                self.gdal_translate(self._input_path, self._output_path)
 
         self._input_dataset = gdal.Open(self._input_path)
         assert self._input_dataset, 'Unable to open input file %s' % self._input_path
@@ -142,22 +160,61 @@ class ERS2NetCDF(Geophys2NetCDF):
 
         # Perform format-specific modifications to gdal_translate generated
         # NetCDF dataset
-        band_name = (self.get_metadata('ERS.DatasetHeader.RasterInfo.BandId.Value') or
-                     self.get_metadata('GA_CSW.MD_Metadata.identificationInfo.MD_DataIdentification.citation.CI_Citation.title.gco:CharacterString'))
+        band_count = self._input_dataset.RasterCount
+        band_names = get_ers_band_names(self._metadata_dict.get('ERS') or {}, band_count)
+        if band_count == 1 and not band_names[0]:
+            band_names = [self.get_metadata('GA_CSW.MD_Metadata.identificationInfo.MD_DataIdentification.citation.CI_Citation.title.gco:CharacterString')]
+
+        variable_names = []
+        for band_number, band_name in enumerate(band_names, 1):
+            if not band_name:
+                continue
 
-        if band_name:
-            variable = self._netcdf_dataset.variables['Band1']
+            variable = self._netcdf_dataset.variables['Band%d' % band_number]
             variable.long_name = band_name
             # TODO: Do something more elegant than string truncation for short
             # name
+            variable_name = re.sub('\W', '_', band_name[0:16])
+            if variable_name in variable_names:  # Truncated band names may not be unique
+                variable_name = '%s_%d' % (variable_name, band_number)
+            variable_names.append(variable_name)
             self._netcdf_dataset.renameVariable(
-                'Band1', re.sub('\W', '_', band_name[0:16]))
+                'Band%d' % band_number, variable_name)
+            rename_overview_variables(self._netcdf_dataset, 'Band%d' % band_number, variable_name)
 
         # Will close output file for writing and write checksum and uuid files
         self.update_nc_metadata()
         logger.info('Finished translating %s to %s',
                     self._input_path, self._output_path)
 
+    def get_isi_value_ranges(self):
+        '''
+        Function to return a dict of (Minimum, Maximum) tuples keyed by band number from the .isi file
+        accompanying the input dataset, or None if no statistics are available
+        '''
+        isi_path = os.path.splitext(self._input_path)[0] + '.isi'
+        if not grid_file_exists(isi_path):  # N.B: May be in zip archive
+            return None
+
+        isi_metadata = ERSMetadata()
+        isi_metadata.read_string(read_text(isi_path))
+        isi_statistics = get_isi_statistics(isi_metadata.metadata_dict)
+        if not isi_statistics:
+            logger.warning('WARNING: Unable to read statistics from %s', isi_path)
+            return None
+
+        return {band_number: (band_statistics['Minimum'], band_statistics['Maximum'])
+                for band_number, band_statistics in enumerate(isi_statistics, 1)
+                if 'Minimum' in band_statistics and 'Maximum' in band_statistics}
+
+    def get_precomputed_statistics(self, band_count):
+        '''
+        Function to return a list of dicts (one per band) of statistics from the .isi file imported with the
+        source metadata, or None if no statistics are available.
+        Overrides Geophys2NetCDF.get_precomputed_statistics()
+        '''
+        return get_isi_statistics(self._metadata_dict.get('ISI') or {}, band_count)
+
     def update_nc_metadata(self, output_path=None, do_stats=False, xml_path=None):
         '''
         Function to import all available metadata and set attributes in NetCDF file.
@@ -211,9 +268,10 @@ class ERS2NetCDF(Geophys2NetCDF):
             for extension in ['isi', 'ers']:
                 metadata_path = os.path.splitext(self._input_path)[
                     0] + '.' + extension
-                if os.path.isfile(metadata_path):
-                    self._metadata_dict[extension.upper()] = ERSMetadata(
-                        metadata_path).metadata_dict
+                if grid_file_exists(metadata_path):  # N.B: May be in zip archive
+                    ers_metadata = ERSMetadata()
+                    ers_metadata.read_string(read_text(metadata_path))
+                    self._metadata_dict[extension.upper()] = ers_metadata.metadata_dict
 
         try:
             # TODO: Make this more robust
@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+FootprintAccumulator Class
+Created on 16/10/2026
+
+Streaming accumulator for the convex hull footprint of the valid (non-nodata) area of a grid.
+Only the first and last valid cell in each row of each block can be hull vertices, so each block contributes at most
+two points per row. Candidate points are reduced to their convex hull whenever they exceed MAX_CANDIDATE_POINTS,
+so memory use is bounded regardless of grid size.
+
+The footprint is stored as the global attribute native_convex_hull: a WKT POLYGON of pixel centre coordinates in the
+native CRS of the grid.
+
+Footprints of existing NetCDF files may also be computed in parallel: chunk-aligned blocks are farmed out to a process
+pool, each worker returns only the hull of its block, and block hulls are merged incrementally as they arrive.
+
+Usage: python -m geophys2netcdf footprint <nc_file_directory_or_manifest> [...] [options]
+'''
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import multiprocessing
+import numpy as np
+import netCDF4
+from scipy.spatial import ConvexHull
+
+from geophys2netcdf._statistics import get_valid_mask
+from geophys2netcdf._sparse import get_allocated_chunks, get_variable_allocated_chunks, get_allocated_windows
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+FOOTPRINT_ATTRIBUTE = 'native_convex_hull'
+MAX_CANDIDATE_POINTS = 65536  # Reduce candidate points to convex hull when this is exceeded
+DEFAULT_MAX_BYTES = 536870912  # 512MiB maximum read size when computing footprint from a file
+DEFAULT_BLOCK_BYTES = 67108864  # 64MiB maximum block size for parallel footprint tasks
+
+# Per-process state for parallel footprint tasks
+_worker_dataset = None
+
+
+def get_row_extremes(valid_mask):
+    '''
+    Function to return an (n, 2) array of (row, col) indices of the first and last valid cell in each row of
+    a 2D boolean mask
+    '''
+    valid_rows = np.where(valid_mask.any(axis=1))[0]
+    if not valid_rows.size:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    valid_mask = valid_mask[valid_rows]
+    first_cols = valid_mask.argmax(axis=1)
+    last_cols = valid_mask.shape[1] - 1 - valid_mask[:, ::-1].argmax(axis=1)
+
+    return np.concatenate([np.column_stack([valid_rows, first_cols]),
+                           np.column_stack([valid_rows, last_cols])]).astype(np.int64)
+
+
+def get_hull_points(points):
+    '''
+    Function to return the vertices of the convex hull of an (n, 2) array of points in anticlockwise order,
+    or the unique points if they are degenerate (fewer than three points, or all collinear)
+    '''
+    points = np.ascontiguousarray(points)
+    points = np.unique(points.view([('', points.dtype)] * 2)).view(points.dtype).reshape((-1, 2))
+    if points.shape[0] < 3:
+        return points
+
+    try:
+        return points[ConvexHull(points.astype(np.float64)).vertices]
+    except:  # Degenerate (collinear) points
+        return points
+
+
+def get_padded_polygon(coordinates, x_padding, y_padding):
+    '''
+    Function to return the convex hull of a closed list of [x, y] coordinates with each vertex expanded into a
+    rectangle of x_padding and y_padding on each side. Padding a pixel centre footprint by half a pixel gives
+    the footprint of the pixel edges
+    '''
+    points = np.array(coordinates[:-1], dtype=np.float64)
+    corner_offsets = np.array([[x_offset, y_offset]
+                               for x_offset in [-x_padding, x_padding]
+                               for y_offset in [-y_padding, y_padding]])
+    padded_coordinates = get_hull_points((points[:, np.newaxis, :] + corner_offsets).reshape((-1, 2))).tolist()
+    return padded_coordinates + [padded_coordinates[0]]  # Close polygon
+
+
+def polygon_to_wkt(coordinates, ordinate_format='%.16g'):
+    '''
+    Function to return a WKT POLYGON string for a closed list of [x, y] coordinates
+    '''
+    return 'POLYGON((' + ', '.join([' '.join([ordinate_format % ordinate for ordinate in coordinate])
+                                    for coordinate in coordinates]) + '))'
+
+
+def wkt_to_polygon(wkt):
+    '''
+    Function to return a list of [x, y] coordinates from a WKT POLYGON string
+    '''
+    match = re.match('^\s*POLYGON\s*\(\((.*)\)\)\s*$', wkt, re.IGNORECASE)
+    assert match, 'Invalid WKT polygon %s' % wkt
+    return [[float(ordinate) for ordinate in coordinate.split()]
+            for coordinate in match.group(1).split(',')]
+
+
+class FootprintAccumulator(object):
+    '''
+    Class definition for FootprintAccumulator
+    '''
+
+    def __init__(self):
+        '''
+        Constructor for class FootprintAccumulator
+        '''
+        self._points = np.zeros((0, 2), dtype=np.int64)  # (row, col) candidate hull vertices
+
+    def update(self, valid_mask, row_offset=0, col_offset=0):
+        '''
+        Function to accumulate candidate hull vertices from a block of a 2D boolean valid data mask
+        '''
+        self.add_points(get_row_extremes(valid_mask) + np.array([row_offset, col_offset], dtype=np.int64))
+
+    def add_points(self, points):
+        '''
+        Function to add (row, col) candidate points, reducing all candidates to their hull if there are too many
+        '''
+        if not points.shape[0]:
+            return
+
+        self._points = np.concatenate([self._points, points])
+        if self._points.shape[0] > MAX_CANDIDATE_POINTS:
+            self._points = get_hull_points(self._points)
+
+    def merge(self, footprint_accumulator):
+        '''
+        Function to combine the candidate points of another FootprintAccumulator object into this one
+        '''
+        self.add_points(footprint_accumulator.points)
+
+    def get_polygon(self, y_values, x_values):
+        '''
+        Function to return the footprint as a closed list of [x, y] pixel centre coordinates, or None if
+        there is no valid data or the valid data does not enclose an area
+        Parameters:
+            y_values, x_values: Coordinate values for each row and column
+        '''
+        hull_points = get_hull_points(self._points)
+        if hull_points.shape[0] < 3:
+            return None
+
+        coordinates = [[float(x_values[col]), float(y_values[row])] for row, col in hull_points]
+        return coordinates + [coordinates[0]]  # Close polygon
+
+    @property
+    def points(self):
+        return self._points
+
+
+def compute_variable_footprint(variables, max_bytes=None):
+    '''
+    Function to compute the combined footprint of existing 2D netCDF4 variables sharing the same dimensions.
+    Data is read in whole rows of chunks so that each chunk is decompressed exactly once.
+    Unallocated chunks (which can only contain _FillValue) are skipped
+    Returns:
+        FootprintAccumulator object
+    '''
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+    footprint_accumulator = FootprintAccumulator()
+
+    for variable in variables:
+        nodata_value = getattr(variable, '_FillValue', None)
+        nrows, ncols = variable.shape
+        chunking = variable.chunking()
+        chunk_rows = chunking[0] if chunking != 'contiguous' else 1
+        row_bytes = ncols * variable.dtype.itemsize
+        read_rows = max(max_bytes // (row_bytes * chunk_rows), 1) * chunk_rows
+        allocated_chunks = get_variable_allocated_chunks(variable) if nodata_value is not None else None
+
+        variable.set_auto_maskandscale(False)
+        for row_start in range(0, nrows, read_rows):
+            row_end = min(row_start + read_rows, nrows)
+            if allocated_chunks is None:
+                windows = [(row_start, row_end, 0, ncols)]
+            else:
+                windows = get_allocated_windows(chunking, allocated_chunks, row_start, row_end, 0, ncols)[0]
+
+            for window_row_start, window_row_end, window_col_start, window_col_end in windows:
+                footprint_accumulator.update(get_valid_mask(variable[window_row_start:window_row_end,
+                                                                     window_col_start:window_col_end],
+                                                            nodata_value),
+                                             row_offset=window_row_start,
+                                             col_offset=window_col_start)
+
+    return footprint_accumulator
+
+
+def get_dataset_footprint(netcdf_dataset, max_bytes=None):
+    '''
+    Function to return the footprint of a NetCDF dataset as a closed list of [x, y] native coordinates, or None if
+    there is no valid data. The stored native_convex_hull attribute is used if present, otherwise the footprint is
+    computed from all data variables and stored (if the dataset is writable)
+    '''
+    if hasattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE):
+        logger.debug('Using stored footprint')
+        return wkt_to_polygon(getattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE))
+
+    data_variables = get_data_variables(netcdf_dataset)
+    assert data_variables, 'No data variables found'
+    logger.info('Computing footprint from data variables')
+
+    y_name, x_name = data_variables[0].dimensions
+    polygon = compute_variable_footprint(data_variables, max_bytes).get_polygon(netcdf_dataset.variables[y_name][:],
+                                                                               netcdf_dataset.variables[x_name][:])
+    if polygon:
+        try:
+            setattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE, polygon_to_wkt(polygon))
+        except:
+            logger.debug('Unable to store footprint in read-only dataset')
+
+    return polygon
+
+
+def get_data_variables(netcdf_dataset):
+    '''
+    Function to return a list of data variables (i.e. variables with a "grid_mapping" attribute)
+    '''
+    return [variable for variable in netcdf_dataset.variables.values()
+            if hasattr(variable, 'grid_mapping')]
+
+
+def get_footprint_tasks(netcdf_dataset, block_bytes=None, allocated_chunks=None):
+    '''
+    Function to return a list of (variable_name, row_start, row_end, col_start, col_end) blocks covering all
+    data variables. Blocks are whole multiples of the chunk shape, preferring full-width rows of chunks
+    Parameter:
+        allocated_chunks: Optional dict of allocated chunk origins keyed by variable name, as returned by
+            get_allocated_chunks(). Blocks are reduced to windows covering only the allocated chunks
+    '''
+    allocated_chunks = allocated_chunks or {}
+    block_bytes = block_bytes or DEFAULT_BLOCK_BYTES
+    task_list = []
+    for variable in get_data_variables(netcdf_dataset):
+        nrows, ncols = variable.shape
+        chunking = variable.chunking()
+        chunk_rows, chunk_cols = chunking if chunking != 'contiguous' else (1, ncols)
+        chunk_bytes = chunk_rows * chunk_cols * variable.dtype.itemsize
+
+        chunks_per_block = max(block_bytes // chunk_bytes, 1)
+        col_chunks = (ncols + chunk_cols - 1) // chunk_cols
+        if chunks_per_block >= col_chunks:  # Full-width blocks
+            block_rows = (chunks_per_block // col_chunks) * chunk_rows
+            block_cols = ncols
+        else:
+            block_rows = chunk_rows
+            block_cols = chunks_per_block * chunk_cols
+
+        block_list = [(row_start, min(row_start + block_rows, nrows), col_start, min(col_start + block_cols, ncols))
+                      for row_start in range(0, nrows, block_rows)
+                      for col_start in range(0, ncols, block_cols)]
+
+        if variable.name in allocated_chunks and hasattr(variable, '_FillValue'):
+            block_list = [window
+                          for block in block_list
+                          for window in get_allocated_windows((chunk_rows, chunk_cols), allocated_chunks[variable.name],
+                                                              *block)[0]]
+
+        task_list += [(variable.name,) + block for block in block_list]
+
+    return task_list
+
+
+def _footprint_task(task):
+    '''
+    Process pool task function to return the (row, col) hull vertices of the valid data in one block of a file.
+    The most recently used file is kept open by each worker
+    '''
+    global _worker_dataset
+    nc_path, variable_name, row_start, row_end, col_start, col_end = task
+
+    if _worker_dataset is None or _worker_dataset.filepath() != nc_path:
+        if _worker_dataset is not None:
+            _worker_dataset.close()
+        _worker_dataset = netCDF4.Dataset(nc_path, 'r')
+
+    variable = _worker_dataset.variables[variable_name]
+    variable.set_auto_maskandscale(False)
+    valid_mask = get_valid_mask(variable[row_start:row_end, col_start:col_end],
+                                getattr(variable, '_FillValue', None))
+
+    return get_hull_points(get_row_extremes(valid_mask) + np.array([row_start, col_start], dtype=np.int64))
+
+
+def _close_worker_dataset():
+    '''
+    Function to close the dataset kept open by _footprint_task() in this process
+    '''
+    global _worker_dataset
+    if _worker_dataset is not None:
+        _worker_dataset.close()
+        _worker_dataset = None
+
+
+def compute_file_footprint(nc_path, pool=None, block_bytes=None):
+    '''
+    Function to compute the footprint of all data variables in a NetCDF file, farming chunk-aligned blocks
+    out to a process pool if one is provided
+    Returns:
+        Closed list of [x, y] native coordinates, or None if there is no valid data
+    '''
+    nc_path = os.path.abspath(nc_path)
+    netcdf_dataset = netCDF4.Dataset(nc_path, 'r')
+    try:
+        data_variables = get_data_variables(netcdf_dataset)
+        assert data_variables, 'No data variables found in %s' % nc_path
+        allocated_chunks = get_allocated_chunks(nc_path, [variable.name for variable in data_variables])
+        task_list = [(nc_path,) + task for task in get_footprint_tasks(netcdf_dataset, block_bytes, allocated_chunks)]
+        y_name, x_name = data_variables[0].dimensions
+        y_values = netcdf_dataset.variables[y_name][:]
+        x_values = netcdf_dataset.variables[x_name][:]
+    finally:
+        netcdf_dataset.close()
+
+    logger.debug('Computing footprint of %s from %d blocks', nc_path, len(task_list))
+    footprint_accumulator = FootprintAccumulator()
+    if pool:
+        for hull_points in pool.imap_unordered(_footprint_task, task_list):
+            footprint_accumulator.add_points(hull_points)
+    else:
+        try:
+            for task in task_list:
+                footprint_accumulator.add_points(_footprint_task(task))
+        finally:
+            _close_worker_dataset()  # Allow file to be reopened for writing
+
+    return footprint_accumulator.get_polygon(y_values, x_values)
+
+
+def store_footprint(nc_path, polygon):
+    '''
+    Function to store a footprint polygon as the native_convex_hull attribute of a NetCDF file
+    '''
+    netcdf_dataset = netCDF4.Dataset(nc_path, 'r+')
+    try:
+        setattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE, polygon_to_wkt(polygon))
+    finally:
+        netcdf_dataset.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m geophys2netcdf footprint',
+                                     description='Compute convex hull footprints of the valid data in NetCDF grids')
+    parser.add_argument('sources', nargs='+',
+                        help='NetCDF file, directory to search for .nc files, or manifest file listing NetCDF paths')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('-b', '--block-bytes', type=int, default=None,
+                        help='Maximum uncompressed size of each block (default: %d)' % DEFAULT_BLOCK_BYTES)
+    parser.add_argument('-s', '--store', action='store_true',
+                        help='Store footprint in each file as the %s attribute' % FOOTPRINT_ATTRIBUTE)
+    parser.add_argument('-r', '--report', dest='report_path', default=None,
+                        help='Path of JSON report of footprints')
+    parser.add_argument('--debug', action='store_true', help='Enable debug output')
+    args = parser.parse_args(argv)
+
+    from geophys2netcdf._batch import find_datasets  # Deferred to avoid loading converters unless required
+
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+
+    nc_paths = []
+    for source in args.sources:
+        if os.path.isfile(source) and os.path.splitext(source)[1].lower() == '.nc':
+            nc_paths.append(os.path.abspath(source))
+        else:
+            nc_paths += find_datasets(source, ['nc'])
+
+    pool = multiprocessing.Pool(args.processes) if args.processes != 1 else None
+    footprint_dict = {}
+    polygon_dict = {}
+    failed = False
+    try:
+        for nc_path in nc_paths:
+            try:
+                polygon = compute_file_footprint(nc_path, pool, args.block_bytes)
+                footprint_dict[nc_path] = polygon_to_wkt(polygon) if polygon else None
+                if polygon:
+                    polygon_dict[nc_path] = polygon
+            except Exception as e:
+                logger.error('ERROR: Unable to compute footprint for %s: %s', nc_path, e)
+                footprint_dict[nc_path] = {'error': '%s: %s' % (e.__class__.__name__, e)}
+                failed = True
+                continue
+
+            if len(nc_paths) == 1:
+                print footprint_dict[nc_path]
+            else:
+                print '%s\t%s' % (nc_path, footprint_dict[nc_path])
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    # N.B: Files are stored only after the pool has finished, since workers keep files open for reading
+    if args.store:
+        for nc_path in sorted(polygon_dict.keys()):
+            try:
+                store_footprint(nc_path, polygon_dict[nc_path])
+            except Exception as e:
+                logger.error('ERROR: Unable to store footprint in %s: %s', nc_path, e)
+                footprint_dict[nc_path] = {'error': '%s: %s' % (e.__class__.__name__, e)}
+                failed = True
+
+    if args.report_path:
+        report_file = open(args.report_path, 'w')
+        json.dump(footprint_dict, report_file, indent=4, sort_keys=True)
+        report_file.close()
+        logger.info('Footprint report written to %s', args.report_path)
+
+    if failed:
+        sys.exit(1)
@@ -43,16 +43,21 @@ import numpy as np
 import netCDF4
 from owslib.csw import CatalogueServiceWeb
 from owslib.fes import PropertyIsEqualTo  # , PropertyIsLike, BBox
-import tempfile
+from osgeo import gdal
 from pprint import pprint
 
 import json
 import urllib
 
 from geophys2netcdf.metadata import XMLMetadata, NetCDFMetadata
-from geophys_utils import netcdf2convex_hull
-from geophys_utils import DataStats
-from geophys2netcdf.metadata_json import write_json_metadata, check_json_metadata
+from geophys2netcdf.metadata_json import write_json_metadata, check_json_metadata, is_fast_digest_available
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from geophys2netcdf._statistics import BandStatistics, get_variable_statistics
+from geophys2netcdf._footprint import get_dataset_footprint, get_padded_polygon
+from geophys2netcdf._grid_reader import grid_file_exists, split_vsizip_path, open_grid_reader
+from geophys2netcdf._workspace import Workspace
+from geophys2netcdf._codecs import CompressionCodec, DEFAULT_CODEC, get_compression_metadata
+from geophys2netcdf._chunking import plan_chunk_shape, fixed_chunk_shape, set_chunking_attributes, DEFAULT_ACCESS_PROFILE
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)  # Initial logging level for this module
@@ -71,17 +76,29 @@ class Geophys2NetCDF(object):
     # Port forwarded GA internal CSW
     GA_CSW = 'http://localhost:8081/geonetwork/srv/eng/csw'
     FILE_EXTENSION = None  # Unknown for base class
-    DEFAULT_CHUNK_SIZE = 128  # Default chunk size for lat & lon dimensions
+    # Writer used for initial format translation: 'stream' for in-process single-pass writer or
+    # 'gdal' for gdal_translate + nccopy
+    DEFAULT_WRITER = 'gdal'
+    # NetCDFGridWriter options which gdal_translate cannot honour, so translation fails rather than falling back.
+    # The in-process writer is selected when any of these are requested without a writer
+    STREAM_ONLY_OPTIONS = ['precision', 'packing', 'overview_levels', 'checkpoint', 'compress_processes']
     EXCLUDED_EXTENSIONS = ['.bck', '.md5', '.uuid', '.json', '.tmp']
     DECIMAL_PLACES = 12 # Number of decimal places to which geometry values should be rounded
 
     METADATA_MAPPING = None  # Needs to be defined in subclasses
 
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, scratch_root=None, fast_digest=False):
         '''
+        Parameter:
+            scratch_root: Directory for large temporary files. See Workspace for defaults
+            fast_digest: Boolean flag indicating whether .metadata.json should also record FAST_DIGEST_NAME
+                digests. Requires the xxhash module
         '''
         self._debug = False
         self.debug = debug  # Set property
+        self._workspace = Workspace(scratch_root)
+        assert not fast_digest or is_fast_digest_available(), 'xxhash module is required for fast digests'
+        self._fast_digest = fast_digest
         self._code_root = os.path.abspath(os.path.dirname(
             __file__))  # Directory containing module code
 
@@ -97,9 +114,10 @@ class Geophys2NetCDF(object):
         Virtual function - performs basic initialisation for file translations
         Should be overridden in subclasses for each specific format but called first to perform initialisations
         '''
-        assert os.path.exists(
+        assert grid_file_exists(
             input_path), 'Input file %s does not exist' % input_path
-        self._input_path = os.path.abspath(input_path)
+        # N.B: GDAL /vsizip/ paths are already absolute
+        self._input_path = input_path if split_vsizip_path(input_path) else os.path.abspath(input_path)
 
         # Default to outputting .nc file of same name in current dir
         self._output_path = os.path.abspath(
@@ -128,17 +146,41 @@ class Geophys2NetCDF(object):
                     logger.debug('mv_command = %s', mv_command)
                     subprocess.check_call(mv_command)
                 
+        # Reset state from any previous translation so that objects can be reused
+        if self._netcdf_dataset:
+            self._netcdf_dataset.close()
         self._input_dataset = None
         self._netcdf_dataset = None
+        self._uuid = None
         self._metadata_dict = {}
 
-    def gdal_translate(self, input_path, output_path, chunk_size=None):
+    def gdal_translate(self, input_path, output_path, chunk_size=None,
+                       access_profile=None, target_chunk_bytes=None, codec=None):
         '''
         Function to use gdal_translate to perform initial format translation (format specific)
+        Parameters:
+            chunk_size: Fixed chunk size for both dimensions. Chunk shape is planned from
+                access_profile and target_chunk_bytes if not specified
+            access_profile: Declared access profile for chunk planning ('tile', 'rows' or 'whole')
+            target_chunk_bytes: Target uncompressed chunk size in bytes for chunk planning
+            codec: CompressionCodec or codec specification string. Only deflate and shuffle are supported by nccopy
         '''
-        chunk_size = chunk_size or Geophys2NetCDF.DEFAULT_CHUNK_SIZE
-        temp_path = os.path.join(
-            tempfile.gettempdir(), os.path.basename(output_path))
+        codec = CompressionCodec.from_string(codec if codec and codec != 'auto' else DEFAULT_CODEC)
+        if codec.name not in ['none', 'deflate']:
+            logger.warning('WARNING: nccopy does not support codec %s. Using %s instead', codec, DEFAULT_CODEC)
+            codec = CompressionCodec.from_string(DEFAULT_CODEC)
+
+        # Un-chunked and chunked intermediates both need to fit in the temporary directory
+        input_dataset = gdal.Open(input_path)
+        assert input_dataset, 'Unable to open input file %s' % input_path
+        required_bytes = 2 * input_dataset.RasterXSize * input_dataset.RasterYSize * sum(
+            [gdal.GetDataTypeSize(input_dataset.GetRasterBand(band_number).DataType) // 8
+             for band_number in range(1, input_dataset.RasterCount + 1)])
+        input_dataset = None
+
+        temp_dir = self._workspace.get_temp_dir(required_bytes, os.path.dirname(output_path))
+        temp_path = os.path.join(temp_dir, os.path.basename(output_path))
+        chunked_temp_path = temp_path + '.tmp'
         command = ['gdal_translate',
                    '-of', 'netCDF',
                    '-co', 'FORMAT=NC4C',
@@ -158,29 +200,109 @@ class Geophys2NetCDF(object):
         temp_dataset = netCDF4.Dataset(temp_path, 'r')
         assert len(
             temp_dataset.dimensions) == 2, 'Dataset must have exactly two dimensions'
-        for dimension in temp_dataset.dimensions.values():
-            arg_list += [dimension.name, min(chunk_size, dimension.size)]
+        data_variable = [variable for variable in temp_dataset.variables.values(
+        ) if hasattr(variable, 'grid_mapping')][0]
+        if chunk_size:
+            chunk_shape, rationale = fixed_chunk_shape(data_variable.shape, chunk_size)
+        else:
+            chunk_shape, rationale = plan_chunk_shape(data_variable.shape,
+                                                      data_variable.dtype,
+                                                      target_chunk_bytes=target_chunk_bytes,
+                                                      access_profile=access_profile)
+        for dimension_name, dimension_chunk_size in zip(data_variable.dimensions, chunk_shape):
+            arg_list += [dimension_name, dimension_chunk_size]
         temp_dataset.close()
 
         try:
             logger.info(
                 'Translating temporary file %s to chunked NetCDF file %s', temp_path, output_path)
-            command = ['nccopy', '-u', '-d', '2', '-c', '%s/%d,%s/%d' %
-                       tuple(arg_list), temp_path, output_path]
+            command = ['nccopy', '-u'] + codec.nccopy_args() + ['-c', '%s/%d,%s/%d' %
+                                                                  tuple(arg_list), temp_path, chunked_temp_path]
             logger.debug('command = %s', ' '.join(command))
             subprocess.check_call(command)
+
+            output_dataset = netCDF4.Dataset(chunked_temp_path, 'r+')
+            set_chunking_attributes(output_dataset, chunk_shape, rationale,
+                                    None if chunk_size else (access_profile or DEFAULT_ACCESS_PROFILE))
+            output_dataset.compression_selection = 'fixed'
+            output_dataset.compression_codec = str(codec)
+            output_dataset.close()
+
+            self._workspace.move_to_final(chunked_temp_path, output_path)
             logger.info('Chunked NetCDF file %s created', output_path)
         finally:
+            if os.path.exists(chunked_temp_path):
+                os.remove(chunked_temp_path)
             if not self._debug:
                 os.remove(temp_path)
                 logger.debug(
                     'Removed temporary, un-chunked NetCDF file %s', temp_path)
 
+    def get_writer(self, writer=None, **writer_options):
+        '''
+        Function to return the writer used for initial format translation. Defaults to 'stream' if any options
+        supported only by the in-process writer have been requested, and to DEFAULT_WRITER otherwise
+        '''
+        stream_options = [option_name for option_name in Geophys2NetCDF.STREAM_ONLY_OPTIONS + ['reader']
+                          if writer_options.get(option_name)]
+        writer = writer or ('stream' if stream_options else Geophys2NetCDF.DEFAULT_WRITER)
+        assert writer in ['stream', 'gdal'], 'Invalid writer "%s"' % writer
+        assert writer == 'stream' or not stream_options, 'Writer "%s" does not support %s' % (
+            writer, ', '.join(stream_options))
+        return writer
+
+    def stream_translate(self, input_path, output_path, chunk_size=None, **writer_options):
+        '''
+        Function to use in-process NetCDFGridWriter to perform initial format translation in a single pass
+        Falls back to gdal_translate() only if the in-process writer cannot open the input and no options
+        supported only by the in-process writer have been requested. Any other failure is raised
+        Parameter:
+            writer_options: Keyword arguments passed to NetCDFGridWriter constructor (e.g. reader='memmap')
+        '''
+        writer_options = dict(writer_options)
+        reader = writer_options.pop('reader', None)
+        try:
+            input_reader = open_grid_reader(input_path, reader)
+        except Exception as e:
+            stream_options = [option_name for option_name in Geophys2NetCDF.STREAM_ONLY_OPTIONS
+                              if writer_options.get(option_name)]
+            if stream_options:
+                logger.error('Unable to open %s for in-process translation with %s: %s',
+                             input_path, ', '.join(stream_options), e)
+                raise
+            logger.warning('WARNING: Unable to open %s for in-process translation (%s). Falling back to gdal_translate',
+                           input_path, e)
+            self.gdal_translate(input_path, output_path, chunk_size=chunk_size,
+                                access_profile=writer_options.get('access_profile'),
+                                target_chunk_bytes=writer_options.get('target_chunk_bytes'),
+                                codec=writer_options.get('codec'))
+            return
+
+        NetCDFGridWriter(input_reader,
+                         output_path,
+                         chunk_size=chunk_size,
+                         debug=self._debug,
+                         workspace=self._workspace,
+                         **writer_options).write()
+
+    def get_compression_metadata(self):
+        '''
+        Function to return a dict describing the compression codec and achieved compression ratio of the output file,
+        or None if no codec has been recorded
+        '''
+        if not self._netcdf_dataset:
+            return None
+
+        return get_compression_metadata(self._netcdf_dataset, self._output_path)
+
     def write_json_metadata(self):
+        compression_dict = self.get_compression_metadata()
         write_json_metadata(
             self._uuid,
             os.path.dirname(self._output_path),
-            Geophys2NetCDF.EXCLUDED_EXTENSIONS)
+            Geophys2NetCDF.EXCLUDED_EXTENSIONS,
+            extra_metadata={'compression': compression_dict} if compression_dict else None,
+            fast_digest=self._fast_digest)
 
     def check_json_metadata(self):
         check_json_metadata(
@@ -193,13 +315,21 @@ class Geophys2NetCDF(object):
         Function to import all available metadata and set attributes in NetCDF file.
         Should be overridden in subclasses for each specific format but called first to perform initialisations
         '''
+        if output_path and (not self._output_path
+                            or os.path.abspath(output_path) != os.path.abspath(self._output_path)):
+            # Reset state from any previous dataset so that objects can be reused for many NetCDF files
+            self._input_path = None
+            self._input_dataset = None
+            self._uuid = None
+            self._metadata_dict = {}
+
         output_path = output_path or self._output_path
 
         assert output_path, 'Output NetCDF path not defined'
 
         assert os.path.exists(
             output_path), 'NetCDF file %s does not exist.' % output_path
-        self._output_path = output_path
+        self._output_path = os.path.abspath(output_path)
         if self._netcdf_dataset:
             self._netcdf_dataset.close()
         try:
@@ -267,7 +397,9 @@ class Geophys2NetCDF(object):
         Function to set all NetCDF metadata attributes using self.METADATA_MAPPING to map from NetCDF ACDD global attribute name to metadata path (e.g. xpath)
         Parameter:
             to_crs: EPSG or WKT for spatial metadata
-            do_stats: Boolean flag indicating whether minmax stats should be determined (slow)
+            do_stats: Boolean flag indicating whether statistics should be set. Stored statistics are reused,
+                as are precomputed statistics from the source dataset which agree with a sample of the data,
+                so this is only slow for files without either
         '''
         assert self.METADATA_MAPPING, 'No metadata mapping defined'
         assert self._netcdf_dataset, 'NetCDF output dataset not defined.'
@@ -287,10 +419,11 @@ class Geophys2NetCDF(object):
         spatial_ref = crs.spatial_ref
         geoTransform = [float(string)
                         for string in crs.GeoTransform.strip().split(' ')]
-        xpixels, ypixels = (
-            dimension.size for dimension in self._netcdf_dataset.dimensions.values())
-        dimension_names = (
-            dimension.name for dimension in self._netcdf_dataset.dimensions.values())
+        # N.B: Use data variable dimensions, since overview variables have their own dimensions
+        data_variable = [variable for variable in self._netcdf_dataset.variables.values(
+            ) if hasattr(variable, 'grid_mapping')][0]
+        ypixels, xpixels = data_variable.shape
+        dimension_names = data_variable.dimensions[::-1]  # (x, y) order
 
         # Create nested list of bounding box corner coordinates
         bbox_corners = [[geoTransform[0] + (x_pixel_offset * geoTransform[1]) + (y_pixel_offset * geoTransform[2]),
@@ -361,12 +494,21 @@ class Geophys2NetCDF(object):
         attribute_dict['geospatial_lon_units'] = xunits
         attribute_dict['geospatial_lat_units'] = yunits
 
-        try:
-            convex_hull = [coordinate[0:2] for coordinate in coord_trans.TransformPoints(
-                netcdf2convex_hull(self.netcdf_dataset, 2000000000))]  # Process dataset in pieces <= 2GB in size
-        except:
-            logger.info('Unable to compute convex hull. Using rectangular bounding box instead.')
-            convex_hull = [coordinate[0:2] for coordinate in coord_trans.TransformPoints(bbox_corners + [bbox_corners[0]])]
+        # Footprint stored during conversion is reused. Otherwise it is computed in a single bounded-memory pass
+        native_convex_hull = get_dataset_footprint(self.netcdf_dataset)
+        if native_convex_hull:
+            # Pad pixel centre footprint by half a pixel to use the same pixel edge convention as the bounding box
+            native_convex_hull = get_padded_polygon(native_convex_hull,
+                                                    abs(geoTransform[1]) / 2.0,
+                                                    abs(geoTransform[5]) / 2.0)
+        else:
+            logger.info('No convex hull for valid data. Using rectangular bounding box instead.')
+            native_convex_hull = [bbox_corners[index] for index in [0, 1, 3, 2, 0]]  # Closed ring
+
+        if to_crs:
+            convex_hull = [coordinate[0:2] for coordinate in coord_trans.TransformPoints(native_convex_hull)]
+        else:
+            convex_hull = native_convex_hull
 
         attribute_dict['geospatial_bounds'] = 'POLYGON((' + ', '.join([' '.join(
             ['%.4f' % ordinate for ordinate in coordinates]) for coordinates in convex_hull]) + '))'
@@ -422,10 +564,19 @@ class Geophys2NetCDF(object):
         self._netcdf_dataset.Conventions = 'CF-1.6, ACDD-1.3'
 
         if do_stats:
-            datastats = DataStats(netcdf_dataset=self.netcdf_dataset,
-                                  netcdf_path=None, max_bytes=2000000000)  # 2GB pieces
-            datastats.data_variable.actual_range = np.array(
-                [datastats.value('min'), datastats.value('max')], dtype='float32')
+            # Statistics accumulated during conversion are reused rather than recomputed
+            data_variables = [variable for variable in self._netcdf_dataset.variables.values()
+                              if hasattr(variable, 'grid_mapping')]
+            precomputed_statistics = self.get_precomputed_statistics(len(data_variables)) or []
+            for band_index, data_variable in enumerate(data_variables):
+                if BandStatistics.has_attributes(data_variable):
+                    logger.debug('Reusing stored statistics for %s', data_variable.name)
+                else:
+                    logger.info('Computing statistics for %s', data_variable.name)
+                    get_variable_statistics(
+                        data_variable,
+                        precomputed_statistics[band_index] if band_index < len(precomputed_statistics) else None
+                    ).set_attributes(data_variable)
 
         # Remove old fields - remove this later
         if hasattr(self._netcdf_dataset, 'id'):
@@ -435,6 +586,13 @@ class Geophys2NetCDF(object):
         if hasattr(self._netcdf_dataset, 'keywords_vocabulary'):
             del self._netcdf_dataset.keywords_vocabulary
 
+    def get_precomputed_statistics(self, band_count):
+        '''
+        Virtual function to return a list of dicts (one per band) of statistics precomputed for the source dataset,
+        or None if none are available. Should be overridden for formats which carry statistics
+        '''
+        return None
+
     def read_csv(self, csv_path):
         assert os.path.exists(
             csv_path), 'CSV file %s does not exist' % csv_path
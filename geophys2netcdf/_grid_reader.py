@@ -0,0 +1,513 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Grid reader classes
+Created on 16/10/2026
+
+Readers providing windowed access to gridded input datasets through a common interface:
+    GDALGridReader: reads data using GDAL ReadAsArray
+    ERSRawReader: memory-maps the raw ERS data file described by the .ers header, bypassing GDAL for data access
+    ERSZipStreamReader: streams raw ERS data from a compressed zip archive member without extracting it
+
+Inputs held in zip archives are addressed with GDAL /vsizip/ paths, e.g. /vsizip//path/to/grid.zip/grid.ers
+'''
+import os
+import re
+import struct
+import logging
+import zipfile
+import numpy as np
+from osgeo import gdal, gdalconst
+
+from geophys2netcdf.metadata import ERSMetadata
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+VSIZIP_PREFIX = '/vsizip/'
+ZIP_LOCAL_HEADER_FORMAT = '<4s2B4HL2L2H'  # Fixed part of zip local file header
+ZIP_LOCAL_HEADER_SIGNATURE = b'PK\003\004'
+ISI_STATISTICS_KEYS = ['Minimum', 'Maximum', 'Mean', 'Variance', 'Samples', 'Nulls']  # Precomputed .isi statistics
+
+
+def make_vsizip_path(zip_path, member_name):
+    '''
+    Function to return the GDAL /vsizip/ path for a member of a zip archive
+    '''
+    return VSIZIP_PREFIX + os.path.abspath(zip_path) + '/' + member_name
+
+
+def split_vsizip_path(path):
+    '''
+    Function to return (zip_path, member_name) for a GDAL /vsizip/ path, or None for any other path
+    '''
+    if not path.startswith(VSIZIP_PREFIX):
+        return None
+
+    match = re.match('(.+?\.zip)/(.+)$', path[len(VSIZIP_PREFIX):], re.IGNORECASE)
+    assert match, 'Unable to parse zip member path %s' % path
+    return match.group(1), match.group(2)
+
+
+def grid_file_exists(path):
+    '''
+    Function to return True if path is an existing file or an existing member of a zip archive
+    '''
+    zip_member = split_vsizip_path(path)
+    if not zip_member:
+        return os.path.isfile(path)
+
+    zip_path, member_name = zip_member
+    if not os.path.isfile(zip_path):
+        return False
+    zip_file = zipfile.ZipFile(zip_path)
+    try:
+        return member_name in zip_file.namelist()
+    finally:
+        zip_file.close()
+
+
+def read_text(path):
+    '''
+    Function to return the contents of a text file or zip archive member
+    '''
+    zip_member = split_vsizip_path(path)
+    if zip_member:
+        zip_file = zipfile.ZipFile(zip_member[0])
+        try:
+            return zip_file.read(zip_member[1])
+        finally:
+            zip_file.close()
+
+    text_file = open(path, 'r')
+    try:
+        return text_file.read()
+    finally:
+        text_file.close()
+
+
+def get_zip_member_offset(zip_path, zip_info):
+    '''
+    Function to return the byte offset of a zip member's data within the archive, read from its local file header
+    '''
+    zip_file = open(zip_path, 'rb')
+    try:
+        zip_file.seek(zip_info.header_offset)
+        local_header = struct.unpack(ZIP_LOCAL_HEADER_FORMAT,
+                                     zip_file.read(struct.calcsize(ZIP_LOCAL_HEADER_FORMAT)))
+    finally:
+        zip_file.close()
+
+    assert local_header[0] == ZIP_LOCAL_HEADER_SIGNATURE, 'Bad zip local file header for %s' % zip_info.filename
+    filename_length, extra_length = local_header[-2:]
+    return zip_info.header_offset + struct.calcsize(ZIP_LOCAL_HEADER_FORMAT) + filename_length + extra_length
+
+
+def get_data_zip_info(vsizip_path):
+    '''
+    Function to return the ZipInfo object for a /vsizip/ path
+    '''
+    zip_path, member_name = split_vsizip_path(vsizip_path)
+    zip_file = zipfile.ZipFile(zip_path)
+    try:
+        return zip_file.getinfo(member_name)
+    finally:
+        zip_file.close()
+
+
+def get_ers_band_names(ers_metadata_dict, band_count):
+    '''
+    Function to return a list of band names (or None) for each band from the BandId sections of a parsed .ers header
+    N.B: ERSMetadata stores repeated BandId sections as a list of dicts
+    '''
+    band_id_list = ers_metadata_dict.get('DatasetHeader', {}).get('RasterInfo', {}).get('BandId') or []
+    if not isinstance(band_id_list, list):
+        band_id_list = [band_id_list]
+
+    band_names = []
+    for band_id in band_id_list:
+        if isinstance(band_id, dict):
+            band_id = band_id.get('Value')
+        band_names.append(band_id or None)
+
+    return (band_names + [None] * band_count)[0:band_count]
+
+
+def get_isi_statistics(isi_metadata_dict, band_count=None):
+    '''
+    Function to return a list of dicts (one per band) of the precomputed statistics in a parsed .isi file,
+    or None if statistics are not available for every band. band_count defaults to the "Bands" value in the file.
+    N.B: Statistics are held in a section named after the dataset within the MetaData section.
+    Values for multi-band datasets are assumed to be whitespace or comma separated lists
+    '''
+    for section in (isi_metadata_dict.get('MetaData') or {}).values():
+        if not (isinstance(section, dict) and 'Minimum' in section):
+            continue
+
+        try:
+            band_count = band_count or int(section.get('Bands', 1))
+            value_lists = {key: [float(value)
+                                 for value in str(section[key]).strip('"').replace(',', ' ').split()]
+                           for key in ISI_STATISTICS_KEYS if key in section}
+        except ValueError:
+            return None
+
+        if [value_list for value_list in value_lists.values() if len(value_list) != band_count]:
+            return None
+
+        return [{key: value_list[band_index] for key, value_list in value_lists.items()}
+                for band_index in range(band_count)]
+
+    return None
+
+
+class GDALGridReader(object):
+    '''
+    Class definition for GDALGridReader
+    Provides windowed access to any GDAL-readable raster via ReadAsArray
+    '''
+    READER_NAME = 'gdal'
+    THREAD_SAFE = False  # GDAL dataset handles must not be shared between threads
+
+    def __init__(self, input_dataset):
+        '''
+        Constructor for class GDALGridReader
+        Parameter:
+            input_dataset: Open GDAL dataset or path to GDAL-readable file
+        '''
+        if isinstance(input_dataset, gdal.Dataset):
+            self._gdal_dataset = input_dataset
+        else:
+            self._gdal_dataset = gdal.Open(input_dataset, gdalconst.GA_ReadOnly)
+            assert self._gdal_dataset, 'Unable to open input file %s using GDAL' % input_dataset
+
+    def get_band_dtype(self, band_number):
+        '''
+        Function to return the numpy dtype of the specified band
+        '''
+        band = self._gdal_dataset.GetRasterBand(band_number)
+        return np.dtype(gdal.GetDataTypeName(band.DataType).lower()
+                        .replace('byte', 'uint8')
+                        .replace('cint', 'complex')
+                        .replace('cfloat', 'complex'))
+
+    def get_nodata_value(self, band_number):
+        return self._gdal_dataset.GetRasterBand(band_number).GetNoDataValue()
+
+    def get_band_name(self, band_number):
+        return self._gdal_dataset.GetRasterBand(band_number).GetDescription() or None
+
+    def read_window(self, band_number, row_start, row_end, col_start=0, col_end=None):
+        '''
+        Function to return a 2D array for the specified band and UL-origin row/column window
+        '''
+        col_end = self.ncols if col_end is None else col_end
+        return self._gdal_dataset.GetRasterBand(band_number).ReadAsArray(col_start,
+                                                                          row_start,
+                                                                          col_end - col_start,
+                                                                          row_end - row_start)
+
+    @property
+    def gdal_dataset(self):
+        return self._gdal_dataset
+
+    @property
+    def description(self):
+        return self._gdal_dataset.GetDescription()
+
+    @property
+    def nrows(self):
+        return self._gdal_dataset.RasterYSize
+
+    @property
+    def ncols(self):
+        return self._gdal_dataset.RasterXSize
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols)
+
+    @property
+    def band_count(self):
+        return self._gdal_dataset.RasterCount
+
+    @property
+    def projection(self):
+        return self._gdal_dataset.GetProjection()
+
+    @property
+    def geotransform(self):
+        return self._gdal_dataset.GetGeoTransform()
+
+
+class ERSRawReader(GDALGridReader):
+    '''
+    Class definition for ERSRawReader
+    Memory-maps the raw binary file of an ERS dataset using the CellType, ByteOrder, NrOfLines, NrOfCellsPerLine,
+    NrOfBands and HeaderOffset values in the .ers header. Windows are returned as zero-copy views of the map,
+    so that a block read is a page-cache hit rather than a GDAL ReadAsArray copy.
+    GDAL is used only to interpret the georeferencing in the header.
+    Data held uncompressed (stored) in a zip archive is memory-mapped in place within the archive.
+    '''
+    READER_NAME = 'memmap'
+    THREAD_SAFE = True  # Windows are read-only views of the memory map
+
+    # Map of ERS CellType to numpy dtype (without byte order)
+    CELL_TYPE_MAP = {'Unsigned8BitInteger': 'u1',
+                     'Signed8BitInteger': 'i1',
+                     'Unsigned16BitInteger': 'u2',
+                     'Signed16BitInteger': 'i2',
+                     'Unsigned32BitInteger': 'u4',
+                     'Signed32BitInteger': 'i4',
+                     'IEEE4ByteReal': 'f4',
+                     'IEEE8ByteReal': 'f8',
+                     }
+
+    BYTE_ORDER_MAP = {'MSBFirst': '>',
+                      'LSBFirst': '<',
+                      }
+
+    def __init__(self, ers_path):
+        '''
+        Constructor for class ERSRawReader
+        Parameter:
+            ers_path: Path to .ers header file, or /vsizip/ path to .ers header in a zip archive
+        '''
+        assert os.path.splitext(ers_path)[1].lower() == '.ers', '%s is not an ERS header file' % ers_path
+        GDALGridReader.__init__(self, ers_path)  # Open dataset for georeferencing only
+
+        self._zip_member = split_vsizip_path(ers_path)
+        self._ers_path = ers_path if self._zip_member else os.path.abspath(ers_path)
+        self._ers_metadata = ERSMetadata()
+        self._ers_metadata.read_string(read_text(self._ers_path))
+
+        cell_type = self.get_header_value('RasterInfo', 'CellType')
+        byte_order = self.get_header_value('ByteOrder') or 'LSBFirst'
+        assert cell_type in ERSRawReader.CELL_TYPE_MAP, 'Unsupported ERS CellType %s' % cell_type
+        assert byte_order in ERSRawReader.BYTE_ORDER_MAP, 'Unsupported ERS ByteOrder %s' % byte_order
+        self._dtype = np.dtype(ERSRawReader.BYTE_ORDER_MAP[byte_order] +
+                               ERSRawReader.CELL_TYPE_MAP[cell_type])
+
+        self._nrows = int(self.get_header_value('RasterInfo', 'NrOfLines'))
+        self._ncols = int(self.get_header_value('RasterInfo', 'NrOfCellsPerLine'))
+        self._band_count = int(self.get_header_value('RasterInfo', 'NrOfBands') or 1)
+        self._header_offset = int(self.get_header_value('HeaderOffset') or 0)
+
+        null_cell_value = self.get_header_value('RasterInfo', 'NullCellValue')
+        self._nodata_value = float(null_cell_value) if null_cell_value is not None else None
+
+        self._band_names = get_ers_band_names(self._ers_metadata.metadata_dict, self._band_count)
+
+        self._data_path = self.get_data_path()
+        if self._zip_member:
+            self._data_zip_info = get_data_zip_info(self._data_path)
+            actual_size = self._data_zip_info.file_size
+        else:
+            self._data_zip_info = None
+            actual_size = os.path.getsize(self._data_path)
+
+        expected_size = self._header_offset + \
+            self._nrows * self._band_count * self._ncols * self._dtype.itemsize
+        assert actual_size >= expected_size, 'ERS data file %s is too small (%d < %d bytes)' % (
+            self._data_path, actual_size, expected_size)
+
+        self.open_data()
+
+    def open_data(self):
+        '''
+        Function to memory-map the raw data, which is band-interleaved by line
+        '''
+        if self._data_zip_info:
+            assert self._data_zip_info.compress_type == zipfile.ZIP_STORED, \
+                'Compressed zip member %s cannot be memory-mapped' % self._data_path
+            map_path = self._zip_member[0]
+            map_offset = get_zip_member_offset(map_path, self._data_zip_info) + self._header_offset
+        else:
+            map_path = self._data_path
+            map_offset = self._header_offset
+
+        self._memmap = np.memmap(map_path,
+                                 dtype=self._dtype,
+                                 mode='r',
+                                 offset=map_offset,
+                                 shape=(self._nrows, self._band_count, self._ncols)
+                                 )
+        logger.debug('Memory-mapped %s as %s array of shape %s',
+                     self._data_path, self._dtype, self._memmap.shape)
+
+    def get_header_value(self, *key_path):
+        '''
+        Function to return a value from the DatasetHeader section of the .ers file
+        '''
+        return self._ers_metadata.get_metadata(['DatasetHeader'] + list(key_path))
+
+    def get_data_path(self):
+        '''
+        Function to return the path of the raw data file. Defaults to header path without extension
+        '''
+        source_data_file = self.get_header_value('SourceDataFile')
+        if source_data_file:
+            # N.B: posixpath.join would be equivalent for /vsizip/ paths
+            return os.path.join(os.path.dirname(self._ers_path), source_data_file)
+        else:
+            return os.path.splitext(self._ers_path)[0]
+
+    def get_band_dtype(self, band_number):
+        return self._dtype
+
+    def get_nodata_value(self, band_number):
+        return self._nodata_value
+
+    def get_band_name(self, band_number):
+        return self._band_names[band_number - 1] or GDALGridReader.get_band_name(self, band_number)
+
+    def read_window(self, band_number, row_start, row_end, col_start=0, col_end=None):
+        '''
+        Function to return a zero-copy view of the memory map for the specified band and UL-origin row/column window
+        N.B: Returned array retains the byte order of the ERS file
+        '''
+        col_end = self._ncols if col_end is None else col_end
+        return self._memmap[row_start:row_end, band_number - 1, col_start:col_end]
+
+    @property
+    def data_path(self):
+        return self._data_path
+
+    @property
+    def description(self):
+        return self._ers_path
+
+    @property
+    def nrows(self):
+        return self._nrows
+
+    @property
+    def ncols(self):
+        return self._ncols
+
+    @property
+    def band_count(self):
+        return self._band_count
+
+
+class ERSZipStreamReader(ERSRawReader):
+    '''
+    Class definition for ERSZipStreamReader
+    Reads raw ERS data from a compressed zip archive member by decompressing it as a stream, so that
+    no extracted copy is written to disk. Whole rows are decompressed into a small cache, so sequential
+    row-band access (as used by NetCDFGridWriter) decompresses the member exactly once per pass.
+    Windows starting above the current stream position cause the stream to be reopened.
+    '''
+    READER_NAME = 'zipstream'
+    THREAD_SAFE = False  # Decompression stream position is shared
+    READ_BUFFER_SIZE = 16777216  # 16MiB buffer for skipping data
+
+    def open_data(self):
+        self._memmap = None
+        self._zip_file = zipfile.ZipFile(self._zip_member[0])
+        self._stream = None
+        self._stream_row = None  # Row index at current stream position
+        self._cache = None  # Array of cached rows (rows, bands, cols)
+        self._cache_row_start = None
+        self._row_bytes = self._band_count * self._ncols * self._dtype.itemsize
+
+    def read_stream_bytes(self, byte_count):
+        '''
+        Function to read exactly byte_count bytes from the decompression stream
+        '''
+        buffer_list = []
+        while byte_count > 0:
+            buffer = self._stream.read(byte_count)
+            assert buffer, 'Unexpected end of zip member %s' % self._data_path
+            buffer_list.append(buffer)
+            byte_count -= len(buffer)
+        return b''.join(buffer_list)
+
+    def read_rows(self, row_start, row_end):
+        '''
+        Function to decompress rows row_start:row_end for all bands into the row cache
+        '''
+        if self._stream is None or self._stream_row > row_start:
+            if self._stream is not None:
+                self._stream.close()
+            logger.debug('Opening decompression stream for %s', self._data_path)
+            self._stream = self._zip_file.open(self._data_zip_info)
+            self.read_stream_bytes(self._header_offset)
+            self._stream_row = 0
+
+        # Skip rows up to row_start
+        skip_bytes = (row_start - self._stream_row) * self._row_bytes
+        while skip_bytes > 0:
+            skip_bytes -= len(self.read_stream_bytes(min(skip_bytes, ERSZipStreamReader.READ_BUFFER_SIZE)))
+
+        self._cache = np.frombuffer(self.read_stream_bytes((row_end - row_start) * self._row_bytes),
+                                    dtype=self._dtype).reshape((row_end - row_start, self._band_count, self._ncols))
+        self._cache_row_start = row_start
+        self._stream_row = row_end
+
+    def read_window(self, band_number, row_start, row_end, col_start=0, col_end=None):
+        '''
+        Function to return an array for the specified band and UL-origin row/column window
+        N.B: Returned array retains the byte order of the ERS file
+        '''
+        col_end = self._ncols if col_end is None else col_end
+        if (self._cache is None or row_start < self._cache_row_start
+                or row_end > self._cache_row_start + self._cache.shape[0]):
+            self.read_rows(row_start, row_end)
+
+        return self._cache[row_start - self._cache_row_start:row_end - self._cache_row_start,
+                           band_number - 1,
+                           col_start:col_end]
+
+
+READER_CLASSES = {reader_class.READER_NAME: reader_class
+                  for reader_class in [GDALGridReader, ERSRawReader, ERSZipStreamReader]
+                  }
+
+
+def open_grid_reader(input_path, reader=None):
+    '''
+    Function to return a grid reader of the specified type ('gdal' or 'memmap') for input_path
+    Falls back to GDALGridReader if input_path is not an ERS file, and uses ERSZipStreamReader for
+    ERS data held compressed in a zip archive
+    '''
+    reader = reader or GDALGridReader.READER_NAME
+    assert reader in READER_CLASSES, 'Invalid reader "%s"' % reader
+
+    if reader == ERSRawReader.READER_NAME:
+        if os.path.splitext(input_path)[1].lower() != '.ers':
+            logger.warning('WARNING: %s is not an ERS file. Using GDAL reader', input_path)
+            reader = GDALGridReader.READER_NAME
+        elif (split_vsizip_path(input_path)
+              and grid_file_exists(os.path.splitext(input_path)[0])
+              and get_data_zip_info(os.path.splitext(input_path)[0]).compress_type != zipfile.ZIP_STORED):
+            # Compressed zip members cannot be memory-mapped, so they are streamed instead
+            reader = ERSZipStreamReader.READER_NAME
+
+    return READER_CLASSES[reader](input_path)
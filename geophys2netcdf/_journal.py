@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+RebuildJournal Class
+Created on 16/10/2026
+
+Persistent record of the inputs used for each processed dataset, so that batch runs can skip datasets whose
+input file, CSW record, tool version and conversion options are unchanged, and resume after being killed.
+The journal is saved atomically after every dataset.
+
+Journal entries are keyed by absolute input path and have the form:
+    {'input': {'size': <bytes>, 'mtime': <ISO UTC>, 'md5' (or 'xxh64' for fast digests): <hex>},
+     'csw_fingerprint': <md5 of CSW XML record or None>,
+     'tool_version': <geophys2netcdf version>,
+     'options': <dict of conversion options>,
+     'time': <ISO UTC time of processing>}
+'''
+import os
+import json
+import hashlib
+import logging
+
+from geophys2netcdf.datetime_utils import get_iso_utcnow, get_utc_mtime
+from geophys2netcdf.metadata_json import read_json_metadata, get_file_digests, FAST_DIGEST_NAME
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+DIGEST_NAMES = ['md5', FAST_DIGEST_NAME]  # Digests which may identify the input file, in order of preference
+
+
+def get_file_state(file_path, previous_state=None, fast_digest=False):
+    '''
+    Function to return a dict containing the size, UTC mtime and MD5 checksum (or FAST_DIGEST_NAME digest if
+    fast_digest is True) of a file.
+    Digests are reused without reading the file if size and mtime match previous_state (whichever digests it
+    holds), or if mtime matches the record for the file in the .metadata.json written by write_json_metadata()
+    '''
+    digest_name = FAST_DIGEST_NAME if fast_digest else 'md5'
+    file_state = {'size': os.path.getsize(file_path),
+                  'mtime': get_utc_mtime(file_path).isoformat(),
+                  }
+
+    if previous_state and (previous_state.get('size'), previous_state.get('mtime')) == (
+            file_state['size'], file_state['mtime']):
+        previous_digests = {previous_digest_name: previous_state[previous_digest_name]
+                            for previous_digest_name in DIGEST_NAMES if previous_state.get(previous_digest_name)}
+        if previous_digests:
+            file_state.update(previous_digests)
+            return file_state
+
+    try:
+        json_file_list = read_json_metadata(os.path.dirname(file_path))['files']
+        json_file_dict = [json_file_dict for json_file_dict in json_file_list
+                          if json_file_dict['file'] == os.path.basename(file_path)][0]
+        if json_file_dict['mtime'] == file_state['mtime'] and json_file_dict.get(digest_name):
+            file_state[digest_name] = json_file_dict[digest_name]
+            return file_state
+    except Exception:
+        pass  # No usable .metadata.json record
+
+    file_state.update(get_file_digests(file_path, [digest_name]))
+    return file_state
+
+
+def get_common_digest_name(file_state1, file_state2):
+    '''
+    Function to return the name of the preferred digest recorded in both of two file state dicts, or None
+    '''
+    for digest_name in DIGEST_NAMES:
+        if file_state1.get(digest_name) and file_state2.get(digest_name):
+            return digest_name
+    return None
+
+
+def get_seed_entry(input_path, output_path, csw_fingerprint, tool_version, options, fast_digest=False):
+    '''
+    Function to return a journal entry for a dataset converted before journalling began, or None if there is no
+    existing output or it is known to be stale. Existing output is assumed to be current unless the .metadata.json
+    written with it records a different checksum for the input file
+    '''
+    if not os.path.exists(output_path):
+        return None
+
+    try:
+        json_file_dicts = [json_file_dict for json_file_dict in read_json_metadata(os.path.dirname(output_path))['files']
+                           if json_file_dict['file'] == os.path.basename(input_path)]
+    except Exception:
+        json_file_dicts = []  # No usable .metadata.json record
+    if json_file_dicts and not json_file_dicts[0].get(FAST_DIGEST_NAME):
+        fast_digest = False  # Compare against the recorded MD5 checksum
+
+    input_state = get_file_state(input_path, fast_digest=fast_digest)
+    digest_name = FAST_DIGEST_NAME if fast_digest else 'md5'
+    if json_file_dicts and json_file_dicts[0].get(digest_name) != input_state[digest_name]:
+        return None
+
+    return {'input': input_state,
+            'csw_fingerprint': csw_fingerprint,
+            'tool_version': tool_version,
+            'options': options,
+            }
+
+
+def get_uuid(dataset_folder):
+    '''
+    Function to return the UUID recorded in .metadata.json in dataset_folder, or None
+    '''
+    try:
+        return read_json_metadata(dataset_folder)['uuid']
+    except Exception:
+        return None
+
+
+def get_csw_fingerprint(geophys2netcdf_object, csw_url, uuid):
+    '''
+    Function to return the MD5 digest of the CSW XML record for uuid, or None if it cannot be retrieved
+    '''
+    if not uuid:
+        return None
+    try:
+        return hashlib.md5(geophys2netcdf_object.get_csw_xml_by_id(csw_url, uuid)).hexdigest()
+    except Exception as e:
+        logger.warning('WARNING: Unable to retrieve CSW record %s from %s: %s', uuid, csw_url, e)
+        return None
+
+
+class RebuildJournal(object):
+    '''
+    Class definition for RebuildJournal
+    '''
+
+    def __init__(self, journal_path):
+        '''
+        Constructor for class RebuildJournal. Loads existing journal if present
+        '''
+        self._journal_path = os.path.abspath(journal_path)
+        self._entries = {}
+
+        if os.path.exists(self._journal_path):
+            journal_file = open(self._journal_path, 'r')
+            self._entries = json.load(journal_file)['datasets']
+            journal_file.close()
+            logger.info('Read %d entries from journal %s', len(self._entries), self._journal_path)
+
+    def get_entry(self, dataset_path):
+        return self._entries.get(os.path.abspath(dataset_path))
+
+    def set_entry(self, dataset_path, entry):
+        '''
+        Function to record a journal entry and save the journal immediately
+        '''
+        entry = dict(entry)
+        entry['time'] = get_iso_utcnow()
+        self._entries[os.path.abspath(dataset_path)] = entry
+        self.save()
+
+    def remove_entry(self, dataset_path):
+        if self._entries.pop(os.path.abspath(dataset_path), None) is not None:
+            self.save()
+
+    def save(self):
+        '''
+        Function to write the journal atomically so that a killed run never leaves a truncated journal
+        '''
+        temp_path = self._journal_path + '.tmp'
+        journal_file = open(temp_path, 'w')
+        json.dump({'datasets': self._entries}, journal_file, indent=4, sort_keys=True)
+        journal_file.close()
+        os.rename(temp_path, self._journal_path)
+
+    @staticmethod
+    def compare(entry, input_state, csw_fingerprint, tool_version, options):
+        '''
+        Function to compare the current inputs of a dataset against its journal entry
+        Returns:
+            'unchanged' if nothing has changed,
+            'metadata' if only the CSW record has changed,
+            'data' if the input file, tool version or options have changed (or there is no entry)
+        '''
+        if not entry:
+            return 'data'
+
+        # N.B: Inputs recorded with different digests (e.g. after enabling fast digests) are treated as changed
+        digest_name = get_common_digest_name(entry.get('input', {}), input_state)
+        if (not digest_name
+                or entry['input'][digest_name] != input_state[digest_name]
+                or entry.get('tool_version') != tool_version
+                or entry.get('options') != options):
+            return 'data'
+
+        # N.B: An unavailable CSW record (None) is not treated as a change
+        if csw_fingerprint and entry.get('csw_fingerprint') != csw_fingerprint:
+            return 'metadata'
+
+        return 'unchanged'
+
+    @property
+    def journal_path(self):
+        return self._journal_path
+
+    @property
+    def entries(self):
+        return self._entries
@@ -0,0 +1,916 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+NetCDFGridWriter Class
+Created on 16/10/2026
+
+Single-pass, in-process replacement for the gdal_translate + nccopy conversion
+performed by Geophys2NetCDF.gdal_translate()
+'''
+import os
+import logging
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import netCDF4
+from osgeo import gdal, osr
+
+from geophys2netcdf._grid_reader import GDALGridReader, open_grid_reader
+from geophys2netcdf._codecs import CompressionCodec, select_codec, DEFAULT_CODEC
+from geophys2netcdf._checkpoint import ConversionCheckpoint, array_checksum, get_input_signature
+from geophys2netcdf._statistics import BandStatistics, get_valid_mask
+from geophys2netcdf._footprint import FootprintAccumulator, polygon_to_wkt, FOOTPRINT_ATTRIBUTE
+from geophys2netcdf._overviews import OverviewBuilder, get_overview_level_count, get_overview_shape, \
+    get_overview_name, get_overview_variables
+from geophys2netcdf._quantization import Quantizer, get_band_precision
+from geophys2netcdf._packing import Packer, PackingRangeError
+from geophys2netcdf._chunk_writer import DirectChunkWriter, can_write_direct
+from geophys2netcdf._sparse import get_fill_value, get_data_column_ranges
+from geophys2netcdf._chunking import plan_chunk_shape, fixed_chunk_shape, set_chunking_attributes, DEFAULT_ACCESS_PROFILE
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+SCAN_BLOCK_BYTES = 67108864  # 64MiB read size when scanning a band for its value range
+VALUE_RANGE_MARGIN = 1.0e-4  # Fraction of a precomputed value range added to each end to allow for rounding
+
+
+class NetCDFGridWriter(object):
+    '''
+    Class definition for NetCDFGridWriter
+    Streams GDAL raster blocks straight into a chunked, deflated NetCDF4 variable.
+    Output has the same dimensions, coordinate variables, grid_mapping variable and
+    data variables (one per band) as the output of gdal_translate -of netCDF -co WRITE_BOTTOMUP=NO
+    Multi-band inputs are read concurrently, one thread per band, with each row-band of chunks
+    read ahead while the previous row-band is being compressed and written.
+    Band statistics and the convex hull footprint of the valid data are accumulated by the reading threads
+    and stored as attributes, so that no further pass over the data is needed.
+    Overview pyramids of decimated variables may optionally be built in the same pass.
+    Chunks may optionally be compressed in a process pool and written with HDF5 direct chunk writes,
+    since the netCDF4 library compresses on a single thread.
+    Floating point bands may optionally be quantized to a stated precision before compression, or packed into
+    integers with scale_factor and add_offset.
+    Chunks which are entirely no-data are not written, leaving them unallocated in the HDF5 file
+    '''
+    NETCDF_FORMAT = 'NETCDF4_CLASSIC'  # Equivalent to gdal_translate -co FORMAT=NC4C
+
+    # Map of numpy dtype to equivalent dtype allowed in NETCDF4_CLASSIC files
+    # N.B: Classic data model has no unsigned types other than unsigned byte
+    CLASSIC_DTYPE_MAP = {'uint8': 'int16',
+                         'uint16': 'int32',
+                         'uint32': 'float64',
+                         'int64': 'float64',
+                         'uint64': 'float64',
+                         'complex64': 'float32',
+                         'complex128': 'float64',
+                         }
+
+    def __init__(self, input_dataset, output_path, chunk_size=None,
+                 codec=None, reader=None, access_profile=None,
+                 target_chunk_bytes=None, min_write_speed=None, workspace=None, band_threads=None, checkpoint=False,
+                 overview_levels=None, compress_processes=None, precision=None, packing=None, value_ranges=None,
+                 sparse=True, debug=False):
+        '''
+        Constructor for class NetCDFGridWriter
+        Parameters:
+            input_dataset: Grid reader object, open GDAL dataset or path to GDAL-readable file
+            output_path: Path of NetCDF file to create
+            chunk_size: Fixed chunk size for both lat & lon dimensions. Chunk shape is planned from
+                access_profile and target_chunk_bytes if not specified
+            codec: CompressionCodec or codec specification string (e.g. "deflate:4+shuffle", "zstd:3"),
+                or "auto" to select a codec by trial-compressing a sample of chunks. Defaults to DEFAULT_CODEC
+            reader: Type of grid reader to open if input_dataset is a path ('gdal' or 'memmap')
+            access_profile: Declared access profile for chunk planning ('tile', 'rows' or 'whole')
+            target_chunk_bytes: Target uncompressed chunk size in bytes for chunk planning
+            min_write_speed: Minimum compression throughput in MB/s for codec auto-selection
+            workspace: Workspace object used to locate the temporary output file. Defaults to output directory
+            band_threads: Maximum number of bands to read concurrently. Defaults to number of CPUs
+            checkpoint: Boolean flag indicating whether to record progress after each row-band of chunks
+                so that an interrupted conversion can be resumed
+            overview_levels: Number of overview levels (2x, 4x, ...) to build for each band, 'auto' to build
+                levels down to a few hundred cells on each side, or None for no overviews
+            compress_processes: Number of processes compressing chunks for direct chunk writes (requires h5py and
+                a deflate or uncompressed codec), or None to compress in the netCDF4 library
+            precision: Precision specification (e.g. "digits:4" or "tolerance:0.01") for all floating point bands,
+                or dict of precision specifications keyed by band number, "Band<n>" or "*". Defaults to full precision
+            packing: Packing specification (e.g. "int16" or "int16:0.01") for all floating point bands, or dict of
+                packing specifications keyed as for precision. Defaults to no packing
+            value_ranges: Dict of (min, max) tuples keyed by band number, e.g. from precomputed statistics,
+                used to fit packing parameters. Bands without a value range are scanned if packing is required
+            sparse: Boolean flag indicating whether to leave chunks which are entirely _FillValue unallocated.
+                Readers see _FillValue for unallocated chunks, so this does not change the data read from the file
+        '''
+        self._debug = False
+        self.debug = debug  # Set property
+
+        if isinstance(input_dataset, GDALGridReader):
+            self._input_reader = input_dataset
+        elif isinstance(input_dataset, gdal.Dataset):
+            self._input_reader = GDALGridReader(input_dataset)
+        else:
+            self._input_reader = open_grid_reader(input_dataset, reader)
+        logger.debug('Using %s reader for %s',
+                     self._input_reader.READER_NAME, self._input_reader.description)
+
+        self._output_path = os.path.abspath(output_path)
+        self._chunk_size = chunk_size
+        self._access_profile = access_profile
+        self._target_chunk_bytes = target_chunk_bytes
+        self._codec = codec or DEFAULT_CODEC
+        if self._codec != 'auto':
+            self._codec = CompressionCodec.from_string(self._codec)
+            assert self._codec.is_available(), 'Codec %s is not supported by this netCDF4 library' % self._codec
+        self._min_write_speed = min_write_speed
+        self._workspace = workspace
+        self._band_threads = min(band_threads or cpu_count(), self._input_reader.band_count)
+        self._selected_codec = None  # Codec chosen by auto-selection, shared by all bands
+        self._checkpoint = checkpoint
+        self._band_statistics = None
+        self._band_footprints = None
+        self._overview_level_count = get_overview_level_count(self._input_reader.shape, overview_levels)
+        self._band_overviews = None
+        self._overview_variables = None
+        self._compress_processes = compress_processes
+        self._precision = precision
+        self._packing = packing
+        self._value_ranges = value_ranges or {}
+        self._band_packers = None
+        self._sparse = sparse
+
+        self._spatial_ref = osr.SpatialReference()
+        self._spatial_ref.ImportFromWkt(self._input_reader.projection)
+        self._geotransform = self._input_reader.geotransform
+
+    def get_dimension_names(self):
+        '''
+        Function to return (y, x) dimension names as used by the GDAL netCDF driver
+        '''
+        if self._spatial_ref.IsProjected():
+            return ('y', 'x')
+        else:
+            return ('lat', 'lon')
+
+    def get_grid_mapping_attributes(self):
+        '''
+        Function to return a dict of CF grid_mapping attributes derived from the input spatial reference,
+        including the GDAL-specific spatial_ref and GeoTransform attributes read by Geophys2NetCDF
+        '''
+        spatial_ref = self._spatial_ref
+        attribute_dict = {}
+
+        if spatial_ref.IsProjected():
+            projection = (spatial_ref.GetAttrValue('PROJECTION') or '').lower()
+            if projection == 'transverse_mercator':
+                attribute_dict['grid_mapping_name'] = 'transverse_mercator'
+                attribute_dict['longitude_of_central_meridian'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_CENTRAL_MERIDIAN)
+                attribute_dict['latitude_of_projection_origin'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_LATITUDE_OF_ORIGIN)
+                attribute_dict['scale_factor_at_central_meridian'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_SCALE_FACTOR)
+            elif projection == 'lambert_conformal_conic_2sp':
+                attribute_dict['grid_mapping_name'] = 'lambert_conformal_conic'
+                attribute_dict['standard_parallel'] = np.array([spatial_ref.GetProjParm(osr.SRS_PP_STANDARD_PARALLEL_1),
+                                                                spatial_ref.GetProjParm(osr.SRS_PP_STANDARD_PARALLEL_2)])
+                attribute_dict['longitude_of_central_meridian'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_CENTRAL_MERIDIAN)
+                attribute_dict['latitude_of_projection_origin'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_LATITUDE_OF_ORIGIN)
+            elif projection == 'albers_conic_equal_area':
+                attribute_dict['grid_mapping_name'] = 'albers_conical_equal_area'
+                attribute_dict['standard_parallel'] = np.array([spatial_ref.GetProjParm(osr.SRS_PP_STANDARD_PARALLEL_1),
+                                                                spatial_ref.GetProjParm(osr.SRS_PP_STANDARD_PARALLEL_2)])
+                attribute_dict['longitude_of_central_meridian'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_LONGITUDE_OF_CENTER)
+                attribute_dict['latitude_of_projection_origin'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_LATITUDE_OF_CENTER)
+            elif projection == 'mercator_1sp':
+                attribute_dict['grid_mapping_name'] = 'mercator'
+                attribute_dict['longitude_of_projection_origin'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_CENTRAL_MERIDIAN)
+                attribute_dict['scale_factor_at_projection_origin'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_SCALE_FACTOR)
+            else:
+                logger.warning(
+                    'WARNING: No CF grid_mapping_name defined for projection %s', projection)
+
+            if 'grid_mapping_name' in attribute_dict:
+                attribute_dict['false_easting'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_FALSE_EASTING)
+                attribute_dict['false_northing'] = spatial_ref.GetProjParm(
+                    osr.SRS_PP_FALSE_NORTHING)
+        else:
+            attribute_dict['grid_mapping_name'] = 'latitude_longitude'
+
+        attribute_dict['long_name'] = 'CRS definition'
+        attribute_dict['longitude_of_prime_meridian'] = spatial_ref.GetPrimeMeridian()
+        attribute_dict['semi_major_axis'] = spatial_ref.GetSemiMajor()
+        attribute_dict['inverse_flattening'] = spatial_ref.GetInvFlattening()
+        attribute_dict['spatial_ref'] = self._input_reader.projection
+        attribute_dict['GeoTransform'] = ' '.join(
+            ['%.16g' % value for value in self._geotransform]) + ' '
+
+        return attribute_dict
+
+    def get_grid_mapping_name(self):
+        '''
+        Function to return grid_mapping variable name as used by the GDAL netCDF driver
+        '''
+        if self._spatial_ref.IsProjected():
+            return self.get_grid_mapping_attributes().get('grid_mapping_name') or 'crs'
+        else:
+            return 'crs'
+
+    def get_band_dtype(self, band_number):
+        '''
+        Function to return the native-order, NETCDF4_CLASSIC-compatible numpy dtype for an input band
+        '''
+        dtype = self._input_reader.get_band_dtype(band_number).newbyteorder('=')
+        return np.dtype(NetCDFGridWriter.CLASSIC_DTYPE_MAP.get(dtype.name) or dtype)
+
+    def create_dataset(self, netcdf_path):
+        '''
+        Function to create NetCDF file with all dimensions, coordinate variables and grid_mapping variable
+        Returns:
+            Open netCDF4.Dataset object
+        '''
+        nrows, ncols = self._input_reader.shape
+        y_name, x_name = self.get_dimension_names()
+
+        netcdf_dataset = netCDF4.Dataset(
+            netcdf_path, mode='w', format=NetCDFGridWriter.NETCDF_FORMAT)
+
+        netcdf_dataset.Conventions = 'CF-1.5'
+        netcdf_dataset.GDAL = 'GDAL %s, released %s' % (gdal.__version__,
+                                                         gdal.VersionInfo('RELEASE_DATE'))
+        netcdf_dataset.history = 'Created by %s.%s' % (__name__,
+                                                       self.__class__.__name__)
+
+        netcdf_dataset.createDimension(y_name, nrows)
+        netcdf_dataset.createDimension(x_name, ncols)
+
+        grid_mapping_name = self.get_grid_mapping_name()
+        crs_variable = netcdf_dataset.createVariable(grid_mapping_name, 'S1')
+        for key, value in self.get_grid_mapping_attributes().items():
+            setattr(crs_variable, key, value)
+
+        y_values, x_values = self.get_coordinate_values()
+
+        y_variable = netcdf_dataset.createVariable(y_name, 'f8', (y_name,))
+        x_variable = netcdf_dataset.createVariable(x_name, 'f8', (x_name,))
+        if self._spatial_ref.IsProjected():
+            y_variable.standard_name = 'projection_y_coordinate'
+            y_variable.long_name = 'y coordinate of projection'
+            y_variable.units = 'm'
+            x_variable.standard_name = 'projection_x_coordinate'
+            x_variable.long_name = 'x coordinate of projection'
+            x_variable.units = 'm'
+        else:
+            y_variable.standard_name = 'latitude'
+            y_variable.long_name = 'latitude'
+            y_variable.units = 'degrees_north'
+            x_variable.standard_name = 'longitude'
+            x_variable.long_name = 'longitude'
+            x_variable.units = 'degrees_east'
+        y_variable[:] = y_values
+        x_variable[:] = x_values
+
+        return netcdf_dataset
+
+    def get_coordinate_values(self):
+        '''
+        Function to return (y_values, x_values) arrays of pixel centre coordinates with UL origin
+        (i.e. WRITE_BOTTOMUP=NO)
+        '''
+        nrows, ncols = self._input_reader.shape
+        y_values = self._geotransform[3] + \
+            (np.arange(nrows) + 0.5) * self._geotransform[5]
+        x_values = self._geotransform[0] + \
+            (np.arange(ncols) + 0.5) * self._geotransform[1]
+        return y_values, x_values
+
+    def get_chunk_shape(self, dtype):
+        '''
+        Function to return (chunk_shape, rationale) for a data variable of the specified dtype
+        '''
+        if self._chunk_size:
+            return fixed_chunk_shape(self._input_reader.shape, self._chunk_size)
+        else:
+            return plan_chunk_shape(self._input_reader.shape,
+                                    dtype,
+                                    target_chunk_bytes=self._target_chunk_bytes,
+                                    access_profile=self._access_profile)
+
+    def get_codec(self, netcdf_dataset, chunk_shape, dtype, band_number=1):
+        '''
+        Function to return the CompressionCodec for a data variable, performing auto-selection if required.
+        Samples of band_number are trialled as they will be written, i.e. after quantization or packing.
+        Records codec choice as global attributes
+        '''
+        if self._codec == 'auto' and self._selected_codec:
+            return self._selected_codec  # Bands share a single codec
+        elif self._codec == 'auto':
+            quantizer = self.get_quantizer(band_number)
+            codec, trial_results = select_codec(self._input_reader,
+                                                chunk_shape,
+                                                dtype,
+                                                min_write_speed=self._min_write_speed,
+                                                band_number=band_number,
+                                                sample_function=lambda sample_array: self.encode_band_array(
+                                                    band_number, sample_array, quantizer))
+            netcdf_dataset.compression_selection = 'auto'
+            netcdf_dataset.compression_trial_ratio = [trial_result['ratio']
+                                                      for trial_result in trial_results
+                                                      if trial_result['codec'] == str(codec)][0]
+            self._selected_codec = codec
+        else:
+            codec = self._codec
+            netcdf_dataset.compression_selection = 'fixed'
+
+        netcdf_dataset.compression_codec = str(codec)
+        return codec
+
+    def create_band_variable(self, netcdf_dataset, band_number):
+        '''
+        Function to create chunked, compressed data variable for a single input band
+        Returns:
+            netCDF4.Variable object
+        '''
+        dimension_names = self.get_dimension_names()
+
+        packer = self._band_packers[band_number - 1]
+        dtype = packer.packed_dtype if packer else self.get_band_dtype(band_number)
+        chunksizes, rationale = self.get_chunk_shape(dtype)
+        set_chunking_attributes(netcdf_dataset, chunksizes, rationale,
+                                None if self._chunk_size else (self._access_profile or DEFAULT_ACCESS_PROFILE))
+        nodata_value = packer.fill_value if packer else self.get_nodata_value(band_number)
+
+        codec = self.get_codec(netcdf_dataset, chunksizes, dtype, band_number)
+
+        variable = netcdf_dataset.createVariable('Band%d' % band_number,
+                                                 dtype,
+                                                 dimension_names,
+                                                 chunksizes=chunksizes,
+                                                 fill_value=nodata_value,
+                                                 **codec.variable_kwargs()
+                                                 )
+        variable.set_auto_maskandscale(False)
+        variable.long_name = self._input_reader.get_band_name(
+            band_number) or 'GDAL Band Number %d' % band_number
+        variable.grid_mapping = self.get_grid_mapping_name()
+
+        quantizer = self.get_quantizer(band_number)
+        if quantizer:
+            quantizer.set_attributes(netcdf_dataset, variable)
+        if packer:
+            packer.set_attributes(variable)
+
+        return variable
+
+    def encode_band_array(self, band_number, band_array, quantizer=None):
+        '''
+        Function to return an array read from a band with the values to be written, i.e. quantized with the
+        band's Quantizer (from get_quantizer()) and/or packed with its Packer
+        '''
+        band_array = np.asarray(band_array).astype(self.get_band_dtype(band_number))
+        packer = self._band_packers[band_number - 1] if self._band_packers else None
+        if not (quantizer or packer):
+            return band_array
+
+        valid_mask = get_valid_mask(band_array, self.get_nodata_value(band_number))
+        if quantizer:
+            band_array = quantizer.quantize(band_array, valid_mask)
+        if packer:
+            band_array = packer.pack(band_array, valid_mask)
+        return band_array
+
+    def get_quantizer(self, band_number):
+        '''
+        Function to return the Quantizer for a band, or None if the band is to be stored at full precision
+        '''
+        precision_spec = get_band_precision(self._precision, band_number)
+        if not precision_spec:
+            return None
+        elif self.get_band_dtype(band_number).kind != 'f':
+            logger.warning('WARNING: Precision %s ignored for integer band %d', precision_spec, band_number)
+            return None
+        elif self._band_packers and self._band_packers[band_number - 1]:
+            logger.warning('WARNING: Precision %s ignored for packed band %d', precision_spec, band_number)
+            return None
+        return Quantizer.from_string(precision_spec)
+
+    def get_band_range(self, band_number):
+        '''
+        Function to return the (min, max) range of valid values in a band, taken from value_ranges if provided,
+        otherwise by scanning the band. Returns None if the band has no valid data.
+        Precomputed value ranges are widened by VALUE_RANGE_MARGIN in case they have been rounded
+        '''
+        if band_number in self._value_ranges:
+            min_value, max_value = [float(value) for value in self._value_ranges[band_number]]
+            margin = ((max_value - min_value) * VALUE_RANGE_MARGIN
+                      + max(abs(min_value), abs(max_value)) * np.finfo(self.get_band_dtype(band_number)).eps)
+            return min_value - margin, max_value + margin
+
+        logger.info('Scanning band %d of %s for value range', band_number, self._input_reader.description)
+        nrows, ncols = self._input_reader.shape
+        dtype = self.get_band_dtype(band_number)
+        nodata_value = self.get_nodata_value(band_number)
+        block_rows = max(SCAN_BLOCK_BYTES // (ncols * dtype.itemsize), 1)
+
+        min_value = None
+        max_value = None
+        for row_start in range(0, nrows, block_rows):
+            band_array = self._input_reader.read_window(band_number,
+                                                        row_start,
+                                                        min(row_start + block_rows, nrows)
+                                                        ).astype(dtype)
+            valid_values = band_array[get_valid_mask(band_array, nodata_value)]
+            if not valid_values.size:
+                continue
+            min_value = valid_values.min() if min_value is None else min(min_value, valid_values.min())
+            max_value = valid_values.max() if max_value is None else max(max_value, valid_values.max())
+
+        return (min_value, max_value) if min_value is not None else None
+
+    def fit_packer(self, band_number):
+        '''
+        Function to return a Packer fitted to the value range of a band, or None if the band is to be stored unpacked
+        '''
+        packing_spec = get_band_precision(self._packing, band_number)
+        if not packing_spec:
+            return None
+
+        dtype = self.get_band_dtype(band_number)
+        if dtype.kind != 'f':
+            logger.warning('WARNING: Packing %s ignored for integer band %d', packing_spec, band_number)
+            return None
+
+        value_range = self.get_band_range(band_number)
+        if value_range is None:
+            logger.warning('WARNING: Band %d has no valid data. Storing unpacked', band_number)
+            return None
+
+        packer = Packer.from_string(packing_spec, dtype)
+        if not packer.fit(*value_range):
+            logger.warning('WARNING: Band %d cannot be packed as %s. Storing unpacked', band_number, packer)
+            return None
+
+        logger.info('Packing band %d into %s with scale_factor %s and add_offset %s',
+                    band_number, packer.packed_dtype.name, packer.scale_factor, packer.add_offset)
+        return packer
+
+    def get_uncompressed_bytes(self):
+        '''
+        Function to return the total uncompressed size of all output data variables in bytes
+        '''
+        return sum([self._input_reader.nrows * self._input_reader.ncols * self.get_band_dtype(band_number).itemsize
+                    for band_number in range(1, self._input_reader.band_count + 1)])
+
+    def get_band_readers(self):
+        '''
+        Function to return a list of grid readers, one per band, which may be used concurrently.
+        Readers which are not thread-safe are reopened for each additional band
+        '''
+        band_readers = [self._input_reader]
+        for _band_number in range(2, self._input_reader.band_count + 1):
+            if self._input_reader.THREAD_SAFE or self._band_threads == 1:
+                band_readers.append(self._input_reader)
+            else:
+                band_readers.append(open_grid_reader(self._input_reader.description,
+                                                     self._input_reader.READER_NAME))
+        return band_readers
+
+    def get_checkpoint_signature(self):
+        '''
+        Function to return a dict identifying the input and all options which determine the output file contents
+        '''
+        return {'input': get_input_signature(self._input_reader.description),
+                'shape': list(self._input_reader.shape),
+                'band_count': self._input_reader.band_count,
+                'chunk_size': self._chunk_size,
+                'access_profile': self._access_profile,
+                'target_chunk_bytes': self._target_chunk_bytes,
+                'codec': str(self._codec),
+                'overview_levels': self._overview_level_count,
+                'precision': [str(quantizer) if quantizer else None
+                              for quantizer in [self.get_quantizer(band_number)
+                                                for band_number in range(1, self._input_reader.band_count + 1)]],
+                'packing': [[packer.packed_dtype.name, float(packer.scale_factor), float(packer.add_offset)]
+                            if packer else None
+                            for packer in (self._band_packers or [])],
+                }
+
+    def get_nodata_value(self, band_number):
+        '''
+        Function to return the nodata value for an input band cast to its output dtype, or None
+        '''
+        nodata_value = self._input_reader.get_nodata_value(band_number)
+        if nodata_value is not None:
+            nodata_value = np.array(nodata_value, dtype=self.get_band_dtype(band_number))
+        return nodata_value
+
+    def get_overview_dtype(self, band_number):
+        '''
+        Function to return the dtype of overview variables for a band. Means of integer bands are not rounded
+        '''
+        dtype = self.get_band_dtype(band_number)
+        return dtype if dtype.kind == 'f' else np.dtype('float32')
+
+    def create_overview_variables(self, netcdf_dataset, variable, band_number):
+        '''
+        Function to create the overview variables for a band variable, with dimensions and coordinate
+        variables for each level (shared between bands)
+        Returns:
+            List of netCDF4.Variable objects, finest first
+        '''
+        y_name, x_name = self.get_dimension_names()
+        y_values, x_values = self.get_coordinate_values()
+        dtype = self.get_overview_dtype(band_number)
+        nodata_value = self.get_nodata_value(band_number)
+        if nodata_value is not None:
+            nodata_value = np.array(nodata_value, dtype=dtype)
+        chunk_shape = variable.chunking()
+        codec = self.get_codec(netcdf_dataset, chunk_shape, dtype)
+
+        overview_variables = []
+        for level in range(self._overview_level_count):
+            factor = 2 ** (level + 1)
+            overview_shape = get_overview_shape(self._input_reader.shape, factor)
+            dimension_names = (get_overview_name(y_name, factor), get_overview_name(x_name, factor))
+
+            if dimension_names[0] not in netcdf_dataset.dimensions:
+                for dimension_name, coordinate_name, size, coordinate_values in zip(dimension_names,
+                                                                                     (y_name, x_name),
+                                                                                     overview_shape,
+                                                                                     (y_values, x_values)):
+                    netcdf_dataset.createDimension(dimension_name, size)
+                    coordinate_variable = netcdf_dataset.createVariable(dimension_name, 'f8', (dimension_name,))
+                    for attribute_name in netcdf_dataset.variables[coordinate_name].ncattrs():
+                        setattr(coordinate_variable, attribute_name,
+                                getattr(netcdf_dataset.variables[coordinate_name], attribute_name))
+                    # Centres of overview cells
+                    coordinate_step = coordinate_values[1] - coordinate_values[0] if len(coordinate_values) > 1 else 0
+                    coordinate_variable[:] = (coordinate_values[0] - coordinate_step / 2.0 +
+                                              (np.arange(size) + 0.5) * factor * coordinate_step)
+
+            overview_variable = netcdf_dataset.createVariable(get_overview_name(variable.name, factor),
+                                                              dtype,
+                                                              dimension_names,
+                                                              chunksizes=[min(chunk_size, size) for chunk_size, size
+                                                                          in zip(chunk_shape, overview_shape)],
+                                                              fill_value=nodata_value,
+                                                              **codec.variable_kwargs()
+                                                              )
+            overview_variable.set_auto_maskandscale(False)
+            overview_variable.long_name = '%s (1/%d resolution overview)' % (variable.long_name, factor)
+            overview_variable.overview_of = variable.name
+            overview_variable.overview_factor = factor
+            overview_variables.append(overview_variable)
+
+        return overview_variables
+
+    def set_overview_chunk_cache(self):
+        '''
+        Function to size the chunk cache of each overview variable to hold a full row of chunks, since overview rows
+        are completed a few at a time and each chunk should be compressed only once
+        '''
+        for overview_variables in self._overview_variables:
+            for overview_variable in overview_variables:
+                chunk_rows, chunk_cols = overview_variable.chunking()
+                ncols = overview_variable.shape[1]
+                row_bytes = chunk_rows * (ncols + chunk_cols) * overview_variable.dtype.itemsize
+                overview_variable.set_var_chunk_cache(size=max(row_bytes * 2, 1048576))
+
+    def accumulate_band_rows(self, band_index, band_array, row_start, valid_mask=None):
+        '''
+        Function to accumulate statistics, footprint and overviews for a row-band of a single (unpacked) band
+        N.B: Called concurrently for different bands, so must only touch the accumulators for band_index
+        Returns:
+            List of (level, row_start, overview_array) tuples for newly completed overview rows
+        '''
+        if valid_mask is None:
+            valid_mask = get_valid_mask(band_array, self._band_statistics[band_index].nodata_value)
+        self._band_statistics[band_index].update(band_array, valid_mask)
+        self._band_footprints[band_index].update(valid_mask, row_offset=row_start)
+        if self._band_overviews:
+            return self._band_overviews[band_index].update(band_array, valid_mask)
+        return []
+
+    def write_overview_rows(self, band_index, overview_rows):
+        '''
+        Function to write completed overview rows for a band
+        '''
+        for level, row_start, overview_array in overview_rows:
+            self._overview_variables[band_index][level][row_start:row_start + overview_array.shape[0], :] = overview_array
+
+    def get_footprint_polygon(self):
+        '''
+        Function to return the convex hull of the valid data in all bands as a closed list of [x, y] native
+        coordinates, or None if there is no valid data
+        '''
+        footprint_accumulator = FootprintAccumulator()
+        for band_footprint in self._band_footprints:
+            footprint_accumulator.merge(band_footprint)
+        return footprint_accumulator.get_polygon(*self.get_coordinate_values())
+
+    def open_chunk_writer(self, netcdf_dataset, temp_path):
+        '''
+        Function to close the netCDF4 dataset and reopen its file for direct chunk writes, if these have been requested
+        and the codec allows them. Overview variables are replaced by the equivalent h5py datasets
+        Returns:
+            DirectChunkWriter object, or None if data is to be written through the netCDF4 dataset
+        '''
+        if not self._compress_processes:
+            return None
+
+        codec = CompressionCodec.from_string(netcdf_dataset.compression_codec)
+        if not can_write_direct(codec):
+            logger.warning('WARNING: Direct chunk writes require h5py and a deflate or uncompressed codec, not %s. '
+                           'Compressing in netCDF4 library', codec)
+            return None
+
+        overview_names = [[overview_variable.name for overview_variable in overview_variables]
+                          for overview_variables in self._overview_variables]
+        netcdf_dataset.close()  # File must not be open in netCDF4 and h5py at the same time
+        chunk_writer = DirectChunkWriter(temp_path, codec, self._compress_processes, skip_fill_chunks=self._sparse)
+        self._overview_variables = [[chunk_writer.get_dataset(overview_name) for overview_name in band_overview_names]
+                                    for band_overview_names in overview_names]
+        return chunk_writer
+
+    def resume_dataset(self, temp_path, checkpoint):
+        '''
+        Function to reopen the partial output of an interrupted conversion and verify each completed row-band
+        against its checkpoint checksums. Progress is truncated at the first row-band which fails verification.
+        Statistics and footprints for verified row-bands are accumulated from the data read back
+        Returns:
+            (netcdf_dataset, variables, row_band_count) tuple, or None if the partial output cannot be used
+        '''
+        try:
+            netcdf_dataset = netCDF4.Dataset(temp_path, mode='r+')
+        except Exception as e:
+            logger.warning('WARNING: Unable to reopen partial output %s (%s). Restarting conversion', temp_path, e)
+            return None
+
+        try:
+            variables = [netcdf_dataset.variables['Band%d' % band_number]
+                         for band_number in range(1, self._input_reader.band_count + 1)]
+            self._overview_variables = [get_overview_variables(netcdf_dataset, variable.name)
+                                        for variable in variables]
+            for variable in variables + sum(self._overview_variables, []):
+                variable.set_auto_maskandscale(False)
+            self.set_overview_chunk_cache()
+
+            nrows = self._input_reader.nrows
+            chunk_rows = checkpoint.chunk_rows
+            row_band_count = 0
+            for row_band_index, checksums in enumerate(checkpoint.row_bands):
+                row_start = row_band_index * chunk_rows
+                row_end = min(row_start + chunk_rows, nrows)
+                band_arrays = [variable[row_start:row_end, :] for variable in variables]
+                if [array_checksum(band_array) for band_array in band_arrays] != checksums:
+                    logger.warning('WARNING: Checksum mismatch in rows %d:%d of %s. Resuming from row %d',
+                                   row_start, row_end, temp_path, row_start)
+                    break
+                for band_index, band_array in enumerate(band_arrays):
+                    if self._band_packers[band_index]:
+                        band_array = self._band_packers[band_index].unpack(
+                            band_array, self._band_statistics[band_index].nodata_value)
+                    self.write_overview_rows(band_index, self.accumulate_band_rows(band_index, band_array, row_start))
+                row_band_count += 1
+        except Exception as e:
+            netcdf_dataset.close()
+            logger.warning('WARNING: Unable to verify partial output %s (%s). Restarting conversion', temp_path, e)
+            return None
+
+        checkpoint.truncate(row_band_count)
+        logger.info('Resuming conversion of %s at row %d of %d',
+                    self._input_reader.description, min(row_band_count * chunk_rows, nrows), nrows)
+        return netcdf_dataset, variables, row_band_count
+
+    def write(self):
+        '''
+        Function to translate all bands into a chunked, compressed NetCDF file using write_dataset().
+        If the data exceeds precomputed value ranges used for packing (e.g. from a stale .isi file),
+        the value ranges are rescanned and the translation is restarted
+        '''
+        try:
+            self.write_dataset()
+        except PackingRangeError as e:
+            if not self._value_ranges:
+                raise
+            logger.warning('WARNING: %s for %s. Scanning value ranges and restarting translation',
+                           e, self._input_reader.description)
+            self._value_ranges = {}
+            self.write_dataset()
+
+    def write_dataset(self):
+        '''
+        Function to perform single-pass translation of all bands into a chunked, compressed NetCDF file
+        N.B: Output is written to a temporary file (in the workspace scratch directory if one is defined) and
+        moved to the output path only on success.
+        If checkpointing is enabled, the temporary file is written next to the output so that it survives
+        scratch cleanup, and an interrupted conversion is resumed from its last verified row-band
+        '''
+        checkpoint = ConversionCheckpoint(self._output_path) if self._checkpoint else None
+        if checkpoint:
+            temp_path = self._output_path + '.tmp'
+        elif self._workspace:
+            temp_path = self._workspace.get_temp_path(os.path.basename(self._output_path) + '.tmp',
+                                                      required_bytes=self.get_uncompressed_bytes(),
+                                                      fallback_dir=os.path.dirname(self._output_path))
+        else:
+            temp_path = self._output_path + '.tmp'
+
+        self._band_packers = [self.fit_packer(band_number)
+                              for band_number in range(1, self._input_reader.band_count + 1)]
+        signature = self.get_checkpoint_signature()
+        self._band_statistics = [BandStatistics(self.get_nodata_value(band_number))
+                                 for band_number in range(1, self._input_reader.band_count + 1)]
+        self._band_footprints = [FootprintAccumulator()
+                                 for _band_number in range(1, self._input_reader.band_count + 1)]
+        self._band_overviews = [OverviewBuilder(self._input_reader.shape,
+                                                self._overview_level_count,
+                                                self.get_overview_dtype(band_number),
+                                                self.get_nodata_value(band_number))
+                                for band_number in range(1, self._input_reader.band_count + 1)
+                                ] if self._overview_level_count else None
+        resumed = None
+        if checkpoint and checkpoint.can_resume(signature, temp_path):
+            resumed = self.resume_dataset(temp_path, checkpoint)
+
+        if resumed:
+            netcdf_dataset, variables, first_row_band = resumed
+        else:
+            if os.path.exists(temp_path):
+                logger.warning('WARNING: Removing stale temporary file %s', temp_path)
+                os.remove(temp_path)
+
+            logger.info('Writing chunked NetCDF file %s from %s',
+                        self._output_path, self._input_reader.description)
+
+            netcdf_dataset = self.create_dataset(temp_path)
+            variables = None
+            first_row_band = 0
+
+        thread_pool = ThreadPool(self._band_threads)
+        chunk_writer = None
+        try:
+            nrows = self._input_reader.nrows
+            band_readers = self.get_band_readers()
+            if variables is None:
+                variables = [self.create_band_variable(netcdf_dataset, band_number)
+                             for band_number in range(1, self._input_reader.band_count + 1)]
+                self._overview_variables = [self.create_overview_variables(netcdf_dataset, variable, band_number)
+                                            for band_number, variable in enumerate(variables, 1)]
+                self.set_overview_chunk_cache()
+            variable_names = [variable.name for variable in variables]
+            band_fill_values = [get_fill_value(variable) for variable in variables]
+            band_chunk_cols = [variable.chunking()[1] for variable in variables]
+            band_dtypes = [self.get_band_dtype(band_number)
+                           for band_number in range(1, self._input_reader.band_count + 1)]
+            band_quantizers = [self.get_quantizer(band_number)
+                               for band_number in range(1, self._input_reader.band_count + 1)]
+
+            def read_band_rows(band_index, row_start, row_end):
+                band_array = band_readers[band_index].read_window(band_index + 1,
+                                                                  row_start,
+                                                                  row_end
+                                                                  ).astype(band_dtypes[band_index])
+                valid_mask = get_valid_mask(band_array, self._band_statistics[band_index].nodata_value)
+                if band_quantizers[band_index]:
+                    band_array = band_quantizers[band_index].quantize(band_array, valid_mask)
+                overview_rows = self.accumulate_band_rows(band_index, band_array, row_start, valid_mask)
+                if self._band_packers[band_index]:
+                    band_array = self._band_packers[band_index].pack(band_array, valid_mask)
+                return band_array, overview_rows
+
+            def read_row_band(row_start, row_end):
+                return thread_pool.map_async(lambda band_index: read_band_rows(band_index, row_start, row_end),
+                                             range(len(variables)))
+
+            # Read whole rows of chunks so that each chunk is compressed exactly once
+            # N.B: Bands sharing a dtype have the same chunk shape
+            if resumed:
+                chunk_rows = checkpoint.chunk_rows
+            else:
+                chunk_rows = min([variable.chunking()[0] for variable in variables])
+                if checkpoint:
+                    checkpoint.start(signature, temp_path, chunk_rows)
+            row_ranges = [(row_start, min(row_start + chunk_rows, nrows))
+                          for row_start in range(0, nrows, chunk_rows)]
+            chunk_writer = self.open_chunk_writer(netcdf_dataset, temp_path)
+
+            if first_row_band < len(row_ranges):
+                pending_result = read_row_band(*row_ranges[first_row_band])
+            for row_range_index in range(first_row_band, len(row_ranges)):
+                row_start, row_end = row_ranges[row_range_index]
+                band_arrays, band_overview_rows = zip(*pending_result.get())
+                if row_range_index + 1 < len(row_ranges):  # Read ahead while writing
+                    pending_result = read_row_band(*row_ranges[row_range_index + 1])
+
+                if chunk_writer:
+                    logger.debug('Writing %s rows %d:%d', ', '.join(variable_names), row_start, row_end)
+                    chunk_writer.write_rows(zip(variable_names, band_arrays), row_start)
+                else:
+                    for band_index, (variable, band_array) in enumerate(zip(variables, band_arrays)):
+                        logger.debug('Writing %s rows %d:%d', variable.name, row_start, row_end)
+                        if not self._sparse:
+                            variable[row_start:row_end, :] = band_array
+                            continue
+                        # Only write columns of chunks containing data
+                        for col_start, col_end in get_data_column_ranges(band_array,
+                                                                         band_chunk_cols[band_index],
+                                                                         band_fill_values[band_index]):
+                            variable[row_start:row_end, col_start:col_end] = band_array[:, col_start:col_end]
+                for band_index, overview_rows in enumerate(band_overview_rows):
+                    self.write_overview_rows(band_index, overview_rows)
+
+                if checkpoint:
+                    # Flush completed chunks to disk before recording progress
+                    if chunk_writer:
+                        chunk_writer.flush()
+                    else:
+                        netcdf_dataset.sync()
+                    checkpoint.add_row_band([array_checksum(band_array) for band_array in band_arrays])
+
+            if chunk_writer:  # Reopen in netCDF4 to set attributes
+                chunk_writer.close()
+                chunk_writer = None
+                netcdf_dataset = netCDF4.Dataset(temp_path, mode='r+')
+                variables = [netcdf_dataset.variables[variable_name] for variable_name in variable_names]
+
+            for variable, band_statistics in zip(variables, self._band_statistics):
+                band_statistics.set_attributes(variable)
+
+            footprint_polygon = self.get_footprint_polygon()
+            if footprint_polygon:
+                setattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE, polygon_to_wkt(footprint_polygon))
+
+            netcdf_dataset.close()
+        except:
+            if chunk_writer:
+                chunk_writer.close(terminate=True)
+            if netcdf_dataset.isopen():
+                netcdf_dataset.close()
+            if not (self._debug or checkpoint):  # Keep partial output for resumption
+                os.remove(temp_path)
+            raise
+        finally:
+            thread_pool.close()
+            thread_pool.join()
+
+        if self._workspace and not checkpoint:
+            self._workspace.move_to_final(temp_path, self._output_path)
+        else:
+            os.rename(temp_path, self._output_path)
+        if checkpoint:
+            checkpoint.remove()
+        logger.info('Chunked NetCDF file %s created', self._output_path)
+
+    @property
+    def output_path(self):
+        return self._output_path
+
+    @property
+    def band_statistics(self):
+        return self._band_statistics
+
+    @property
+    def debug(self):
+        return self._debug
+
+    @debug.setter
+    def debug(self, debug_value):
+        if self._debug != debug_value:
+            self._debug = debug_value
+
+            if self._debug:
+                logger.setLevel(logging.DEBUG)
+            else:
+                logger.setLevel(logging.INFO)
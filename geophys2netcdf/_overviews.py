@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+OverviewBuilder Class
+Created on 16/10/2026
+
+Streaming builder for a multi-resolution overview pyramid of a 2D band, fed with full-width row-bands in
+row order as they are written. Each level halves the resolution of the level above, so level n has a
+decimation factor of 2**n. Levels are cascaded as (sum, count) pairs rather than means, so every overview cell is
+the exact mean of the valid full-resolution cells it covers, and cells with no valid data are set to nodata.
+
+Overviews are stored as extra variables in the same (NETCDF4_CLASSIC) file, since the classic data model has no
+groups. The overview of variable <name> at factor <f> is <name>_ovr<f>, with its own <y>_ovr<f> and <x>_ovr<f>
+dimensions and pixel-centre coordinate variables. Overview variables have overview_of and overview_factor attributes
+and deliberately have no grid_mapping attribute, so that they are never mistaken for data variables.
+'''
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+MIN_OVERVIEW_SIZE = 256  # 'auto' levels stop when the coarsest overview fits within this many cells on each side
+OVERVIEW_SUFFIX = '_ovr%d'
+
+
+def get_overview_shape(shape, factor):
+    '''
+    Function to return the shape of an overview of a 2D array at the specified decimation factor
+    '''
+    return tuple([(size + factor - 1) // factor for size in shape])
+
+
+def get_overview_level_count(shape, overview_levels):
+    '''
+    Function to return the number of overview levels to build for a 2D shape
+    Parameter:
+        overview_levels: Number of levels, 'auto' to build levels until the coarsest fits within
+            MIN_OVERVIEW_SIZE cells on each side, or None for no overviews
+    '''
+    if not overview_levels:
+        return 0
+    elif overview_levels == 'auto':
+        level_count = 0
+        while max(get_overview_shape(shape, 2 ** level_count)) > MIN_OVERVIEW_SIZE:
+            level_count += 1
+        return level_count
+    else:
+        return int(overview_levels)
+
+
+def get_overview_name(name, factor):
+    return name + OVERVIEW_SUFFIX % factor
+
+
+def get_overview_variables(netcdf_dataset, variable_name):
+    '''
+    Function to return a list of the overview variables of a data variable, finest first
+    '''
+    return sorted([variable for variable in netcdf_dataset.variables.values()
+                   if getattr(variable, 'overview_of', None) == variable_name],
+                  key=lambda variable: variable.overview_factor)
+
+
+def rename_overview_variables(netcdf_dataset, old_name, new_name):
+    '''
+    Function to rename the overview variables of a data variable after the data variable has been renamed
+    '''
+    for overview_variable in get_overview_variables(netcdf_dataset, old_name):
+        overview_variable.overview_of = new_name
+        netcdf_dataset.renameVariable(overview_variable.name,
+                                      get_overview_name(new_name, overview_variable.overview_factor))
+
+
+def reduce_block_pairs(sums, counts):
+    '''
+    Function to sum (sum, count) arrays over 2x2 blocks. Odd trailing rows and columns form partial blocks
+    '''
+    rows, cols = sums.shape
+    if rows % 2 or cols % 2:
+        padded_shape = (rows + rows % 2, cols + cols % 2)
+        padded_sums = np.zeros(padded_shape, dtype=sums.dtype)
+        padded_counts = np.zeros(padded_shape, dtype=counts.dtype)
+        padded_sums[0:rows, 0:cols] = sums
+        padded_counts[0:rows, 0:cols] = counts
+        sums, counts = padded_sums, padded_counts
+        rows, cols = padded_shape
+
+    return (sums.reshape((rows // 2, 2, cols // 2, 2)).sum(axis=(1, 3)),
+            counts.reshape((rows // 2, 2, cols // 2, 2)).sum(axis=(1, 3)))
+
+
+class OverviewBuilder(object):
+    '''
+    Class definition for OverviewBuilder
+    '''
+
+    def __init__(self, shape, level_count, dtype, nodata_value=None):
+        '''
+        Constructor for class OverviewBuilder
+        Parameters:
+            shape: (nrows, ncols) shape of full-resolution band
+            level_count: Number of overview levels (factors 2, 4, ... 2**level_count)
+            dtype: dtype of overview values
+            nodata_value: Value written to overview cells with no valid data
+        '''
+        self._shape = tuple(shape)
+        self._level_count = level_count
+        self._dtype = np.dtype(dtype)
+        self._nodata_value = nodata_value
+        self._pending = [None] * level_count  # (sums, counts) of rows awaiting their pair at each level
+        self._next_rows = [0] * level_count  # Next output row at each level
+        self._input_rows = 0
+
+    def update(self, band_array, valid_mask):
+        '''
+        Function to add the next full-width row-band of full-resolution data
+        Returns:
+            List of (level, row_start, overview_array) tuples for all newly completed overview rows
+        '''
+        assert band_array.shape[1] == self._shape[1], 'Row-bands must be full width'
+        self._input_rows += band_array.shape[0]
+        final = (self._input_rows >= self._shape[0])
+
+        counts = valid_mask.astype(np.int64)
+        sums = np.where(valid_mask, band_array, 0).astype(np.float64)
+
+        completed_rows = []
+        for level in range(self._level_count):
+            if self._pending[level] is not None:
+                sums = np.concatenate([self._pending[level][0], sums])
+                counts = np.concatenate([self._pending[level][1], counts])
+                self._pending[level] = None
+
+            if not final and sums.shape[0] % 2:  # Keep odd row until its pair arrives
+                self._pending[level] = (sums[-1:], counts[-1:])
+                sums, counts = sums[:-1], counts[:-1]
+
+            if not sums.shape[0]:
+                break
+
+            sums, counts = reduce_block_pairs(sums, counts)
+            completed_rows.append((level, self._next_rows[level], self.get_means(sums, counts)))
+            self._next_rows[level] += sums.shape[0]
+
+        return completed_rows
+
+    def get_means(self, sums, counts):
+        '''
+        Function to return mean values of valid cells, or nodata where there are no valid cells
+        '''
+        valid_mask = counts > 0
+        means = np.empty(sums.shape, dtype=self._dtype)
+        means[valid_mask] = sums[valid_mask] / counts[valid_mask]
+        means[~valid_mask] = self._nodata_value if self._nodata_value is not None else np.nan
+        return means
+
+    @property
+    def level_count(self):
+        return self._level_count
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Packer Class
+Created on 16/10/2026
+
+Optional integer packing of floating point data variables using the CF scale_factor/add_offset convention,
+i.e. unpacked_value = packed_value * scale_factor + add_offset.
+Packing specifications are strings of the form "<packed_type>[:<precision>]":
+    int16 - finest scale_factor which covers the value range (absolute error <= scale_factor / 2)
+    int16:0.01 - scale_factor of twice the stated precision (absolute error <= 0.01), if it covers the value range
+The minimum packed value is reserved as _FillValue. add_offset is snapped to a multiple of scale_factor so that
+data already on a regular grid of scale_factor (e.g. counts) is packed losslessly.
+'''
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+
+class PackingRangeError(ValueError):
+    '''
+    Exception raised when data values fall outside the range fitted for packing
+    '''
+    pass
+
+
+class Packer(object):
+    '''
+    Class definition for Packer
+    Describes and applies integer packing for a floating point data variable. fit() must be called with the value
+    range of the data before packing
+    '''
+    PACKED_DTYPES = ['int8', 'int16']  # Integer types allowed in NETCDF4_CLASSIC which are smaller than float32
+
+    def __init__(self, packed_dtype='int16', precision=None, unpacked_dtype='float32'):
+        '''
+        Constructor for class Packer
+        Parameters:
+            packed_dtype: Integer type of packed variable
+            precision: Maximum absolute error, or None for the finest scale_factor covering the value range
+            unpacked_dtype: Floating point type of unpacked data, and of scale_factor and add_offset
+        '''
+        packed_dtype = np.dtype(packed_dtype)
+        assert packed_dtype.name in Packer.PACKED_DTYPES, 'Invalid packed type "%s". Must be one of %s' % (
+            packed_dtype.name, Packer.PACKED_DTYPES)
+        self.packed_dtype = packed_dtype
+        self.precision = float(precision) if precision is not None else None
+        assert self.precision is None or self.precision > 0, 'Packing precision must be positive'
+        self.unpacked_dtype = np.dtype(unpacked_dtype)
+        assert self.unpacked_dtype.kind == 'f', 'Only floating point data may be packed'
+
+        self.scale_factor = None
+        self.add_offset = None
+
+    @staticmethod
+    def from_string(packing_spec, unpacked_dtype='float32'):
+        '''
+        Function to return a Packer parsed from a "<packed_type>[:<precision>]" string
+        '''
+        if isinstance(packing_spec, Packer):
+            return packing_spec
+
+        parts = packing_spec.strip().lower().split(':')
+        return Packer(parts[0],
+                      float(parts[1]) if len(parts) > 1 else None,
+                      unpacked_dtype)
+
+    def __str__(self):
+        return '%s%s' % (self.packed_dtype.name, ':%s' % repr(self.precision) if self.precision is not None else '')
+
+    def __repr__(self):
+        return 'Packer(%r)' % str(self)
+
+    @property
+    def fill_value(self):
+        return np.array(np.iinfo(self.packed_dtype).min, dtype=self.packed_dtype)
+
+    @property
+    def packed_range(self):
+        '''
+        (min, max) range of valid packed values, excluding the _FillValue
+        '''
+        type_info = np.iinfo(self.packed_dtype)
+        return type_info.min + 1, type_info.max
+
+    @property
+    def maximum_error(self):
+        '''
+        Maximum absolute packing error, excluding rounding in unpacked_dtype arithmetic
+        '''
+        return self.scale_factor / 2.0
+
+    def fit(self, min_value, max_value):
+        '''
+        Function to set scale_factor and add_offset for data in the range min_value to max_value
+        Returns:
+            True if the value range can be packed to the stated precision, otherwise False
+        '''
+        packed_min, packed_max = self.packed_range
+        value_range = float(max_value) - float(min_value)
+        # N.B: Allow two steps of slack for snapping of add_offset and rounding of the attribute values
+        min_scale_factor = value_range / (packed_max - packed_min - 2)
+
+        if self.precision is not None:
+            scale_factor = self.unpacked_dtype.type(2.0 * self.precision)
+            if scale_factor > 2.0 * self.precision:  # Round down so that the stated precision is met
+                scale_factor = np.nextafter(scale_factor, self.unpacked_dtype.type(0))
+            if scale_factor < min_scale_factor:
+                logger.warning('WARNING: Value range %s to %s cannot be packed into %s with precision %s',
+                               min_value, max_value, self.packed_dtype.name, self.precision)
+                return False
+        else:
+            scale_factor = min_scale_factor or 1.0  # Constant data
+
+        self.scale_factor = self.unpacked_dtype.type(scale_factor)
+        if value_range:
+            self.add_offset = self.unpacked_dtype.type(
+                np.round((float(min_value) + float(max_value)) / 2.0 / float(self.scale_factor)) *
+                float(self.scale_factor))
+        else:  # Constant data packs to zero and unpacks exactly
+            self.add_offset = self.unpacked_dtype.type(min_value)
+        logger.debug('Packing %s to %s into %s with scale_factor %s and add_offset %s',
+                     min_value, max_value, self.packed_dtype.name, self.scale_factor, self.add_offset)
+        return True
+
+    def pack(self, array, valid_mask):
+        '''
+        Function to return a packed copy of a float array, with invalid cells set to the fill value
+        '''
+        assert self.scale_factor is not None, 'Packing parameters have not been fitted'
+        packed_array = np.round((array.astype('float64') - float(self.add_offset)) / float(self.scale_factor))
+        packed_min, packed_max = self.packed_range
+        packed_array = np.where(valid_mask, packed_array, self.fill_value)
+        if np.any(valid_mask & ((packed_array < packed_min) | (packed_array > packed_max))):
+            raise PackingRangeError('Data values exceed the range fitted for packing into %s' %
+                                    self.packed_dtype.name)
+        return packed_array.astype(self.packed_dtype)
+
+    def unpack(self, packed_array, nodata_value=None):
+        '''
+        Function to return an unpacked copy of a packed array, with fill values set to nodata_value (or NaN)
+        '''
+        assert self.scale_factor is not None, 'Packing parameters have not been fitted'
+        unpacked_array = packed_array.astype(self.unpacked_dtype) * self.scale_factor + self.add_offset
+        unpacked_array[packed_array == self.fill_value] = np.nan if nodata_value is None else nodata_value
+        return unpacked_array
+
+    def set_attributes(self, variable):
+        '''
+        Function to set the CF packing attributes of a packed variable
+        '''
+        variable.scale_factor = self.scale_factor
+        variable.add_offset = self.add_offset
+        variable.valid_range = np.array(self.packed_range, dtype=self.packed_dtype)
+
+
+def is_packed(variable):
+    '''
+    Function to return True if variable holds packed integer values
+    '''
+    return variable.dtype.kind in 'iu' and (hasattr(variable, 'scale_factor') or hasattr(variable, 'add_offset'))
+
+
+def get_packing_tolerance(variable):
+    '''
+    Function to return the maximum absolute difference expected between the unpacked values of a packed variable
+    and the original data, or None if the variable is not packed.
+    Includes rounding in the floating point arithmetic used to unpack the values
+    '''
+    if not is_packed(variable):
+        return None
+
+    scale_factor = getattr(variable, 'scale_factor', 1.0)
+    add_offset = getattr(variable, 'add_offset', 0.0)
+    unpacked_dtype = np.asarray(scale_factor).dtype
+    max_magnitude = abs(float(add_offset)) + float(np.iinfo(variable.dtype).max) * abs(float(scale_factor))
+    return abs(float(scale_factor)) / 2.0 + 2.0 * np.finfo(unpacked_dtype).eps * max_magnitude
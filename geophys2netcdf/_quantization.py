@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Quantizer Class
+Created on 16/10/2026
+
+Opt-in lossy precision trimming for floating point data variables. Insignificant low-order mantissa bits are zeroed
+before compression so that noise in those bits no longer defeats the deflate filter.
+Precision specifications are strings of the form "<mode>:<value>":
+    digits:N - keep N significant decimal digits (relative error <= 0.5 * 10**-N), using BitRound
+    bits:N - keep N explicit mantissa bits (relative error <= 2**-(N+1)), using BitRound
+    tolerance:X - round to a multiple of the largest power of two not exceeding 2X (absolute error <= X)
+
+Quantization is recorded as per the CF-1.11 quantization conventions, i.e. a "quantization" attribute on the
+data variable naming a container variable whose "algorithm" and "implementation" attributes describe the method.
+BitRound variables carry "quantization_nsb". As CF defines no algorithm with an absolute error bound, tolerance
+quantization uses the algorithm name "absolute_round". Both methods also record the maximum error introduced as
+"quantization_maximum_relative_error" or "quantization_maximum_absolute_error" for verification.
+'''
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+QUANTIZATION_ATTRIBUTE = 'quantization'
+RELATIVE_ERROR_ATTRIBUTE = 'quantization_maximum_relative_error'
+ABSOLUTE_ERROR_ATTRIBUTE = 'quantization_maximum_absolute_error'
+
+# Number of explicit mantissa bits and equivalent unsigned integer type for each float type
+MANTISSA_BITS = {'float32': (23, 'uint32'),
+                 'float64': (52, 'uint64'),
+                 }
+
+
+class Quantizer(object):
+    '''
+    Class definition for Quantizer
+    Describes and applies a precision trimming method for a floating point data variable
+    '''
+    PRECISION_MODES = ['digits', 'bits', 'tolerance']
+
+    def __init__(self, mode, value):
+        '''
+        Constructor for class Quantizer
+        '''
+        mode = mode.lower()
+        assert mode in Quantizer.PRECISION_MODES, 'Invalid precision mode "%s". Must be one of %s' % (
+            mode, Quantizer.PRECISION_MODES)
+        self.mode = mode
+        if mode == 'tolerance':
+            self.value = float(value)
+            assert self.value > 0, 'Absolute tolerance must be positive'
+        else:
+            self.value = int(value)
+            assert self.value > 0, 'Number of significant %s must be positive' % mode
+
+    @staticmethod
+    def from_string(precision_spec):
+        '''
+        Function to return a Quantizer parsed from a "<mode>:<value>" string
+        '''
+        if isinstance(precision_spec, Quantizer):
+            return precision_spec
+
+        mode_value = precision_spec.strip().split(':')
+        assert len(mode_value) == 2, 'Invalid precision specification "%s"' % precision_spec
+        return Quantizer(mode_value[0], mode_value[1])
+
+    def __str__(self):
+        if self.mode == 'tolerance':
+            return '%s:%s' % (self.mode, repr(self.value))
+        return '%s:%d' % (self.mode, self.value)
+
+    def __repr__(self):
+        return 'Quantizer(%r)' % str(self)
+
+    @property
+    def algorithm(self):
+        return 'absolute_round' if self.mode == 'tolerance' else 'bitround'
+
+    @property
+    def significant_bits(self):
+        '''
+        Number of explicit mantissa bits retained by BitRound, or None for tolerance quantization
+        '''
+        if self.mode == 'digits':
+            return int(math.ceil(self.value * math.log(10, 2)))
+        elif self.mode == 'bits':
+            return self.value
+        return None
+
+    @property
+    def quantum(self):
+        '''
+        Power of two to which values are rounded for tolerance quantization, or None for BitRound
+        '''
+        if self.mode == 'tolerance':
+            return 2.0 ** math.floor(math.log(2.0 * self.value, 2))
+        return None
+
+    def get_maximum_error(self, dtype):
+        '''
+        Function to return (absolute_error, relative_error) bounds for quantization of dtype, with one of the
+        two being None. Both are None if no bits would be removed
+        '''
+        if self.mode == 'tolerance':
+            return self.quantum / 2.0, None
+        elif self.significant_bits < MANTISSA_BITS[np.dtype(dtype).name][0]:
+            return None, 2.0 ** -(self.significant_bits + 1)
+        return None, None
+
+    def quantize(self, array, valid_mask=None):
+        '''
+        Function to return a copy of a float array with insignificant bits removed from valid cells.
+        Nodata and non-finite cells are left unchanged
+        '''
+        dtype = np.dtype(array.dtype)
+        assert dtype.name in MANTISSA_BITS, 'Only float32 or float64 arrays may be quantized'
+        quantize_mask = np.isfinite(array)
+        if valid_mask is not None:
+            quantize_mask &= valid_mask
+
+        if self.mode == 'tolerance':
+            # N.B: Scaling by a power of two is exact, so the only error is from rounding
+            quantum = dtype.type(self.quantum)
+            return np.where(quantize_mask, np.round(array / quantum) * quantum, array).astype(dtype)
+
+        mantissa_bits, uint_type = MANTISSA_BITS[dtype.name]
+        drop_bits = mantissa_bits - self.significant_bits
+        if drop_bits <= 0:
+            return array.copy()
+
+        # BitRound with round-half-to-even, as per netCDF-C
+        # N.B: All operands are of uint_type to avoid promotion of uint64 to float64
+        bits = np.ascontiguousarray(array).view(uint_type)
+        one = np.array(1, dtype=uint_type)
+        shift = np.array(drop_bits, dtype=uint_type)
+        half_minus_one = (one << (shift - one)) - one
+        mask = ~((one << shift) - one)
+        rounded_bits = (bits + half_minus_one + ((bits >> shift) & one)) & mask
+        return np.where(quantize_mask, rounded_bits, bits).view(dtype)
+
+    def set_attributes(self, netcdf_dataset, variable):
+        '''
+        Function to record quantization of variable as per CF-1.11, creating the container variable if required
+        '''
+        container_name = 'quantization_%s' % self.algorithm
+        if container_name not in netcdf_dataset.variables:
+            container_variable = netcdf_dataset.createVariable(container_name, 'i4')
+            container_variable.algorithm = self.algorithm
+            container_variable.implementation = '%s.%s' % (__name__, self.__class__.__name__)
+
+        variable.setncattr(QUANTIZATION_ATTRIBUTE, container_name)
+        absolute_error, relative_error = self.get_maximum_error(variable.dtype)
+        if self.mode == 'tolerance':
+            variable.setncattr(ABSOLUTE_ERROR_ATTRIBUTE, absolute_error)
+        else:
+            variable.setncattr('quantization_nsb', np.int32(self.significant_bits))
+            variable.setncattr(RELATIVE_ERROR_ATTRIBUTE, relative_error or 0.0)
+
+
+def get_band_precision(precision, band_number):
+    '''
+    Function to return the precision specification for a band, or None for full precision
+    Parameters:
+        precision: None, a precision specification applying to all bands, or a dict keyed by band number,
+            "Band<n>" or "*" (all other bands)
+    '''
+    if not precision:
+        return None
+    elif not isinstance(precision, dict):
+        return precision
+
+    for key in [band_number, str(band_number), 'Band%d' % band_number, '*']:
+        if key in precision:
+            return precision[key]
+    return None
+
+
+def get_quantization_tolerance(variable):
+    '''
+    Function to return (absolute_tolerance, relative_tolerance) recorded for a quantized variable,
+    or (None, None) if the variable has not been quantized
+    '''
+    if not hasattr(variable, QUANTIZATION_ATTRIBUTE):
+        return None, None
+    return (float(variable.getncattr(ABSOLUTE_ERROR_ATTRIBUTE)) if hasattr(variable, ABSOLUTE_ERROR_ATTRIBUTE) else None,
+            float(variable.getncattr(RELATIVE_ERROR_ATTRIBUTE)) if hasattr(variable, RELATIVE_ERROR_ATTRIBUTE) else None)
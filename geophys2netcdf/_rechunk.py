@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Rechunking functions
+Created on 16/10/2026
+
+In-process replacement for nccopy rechunking of existing NetCDF files. Data variables (and their overviews) are
+streamed into a new file with the requested chunk shape and codec through a fixed memory budget, in tiles which are
+whole multiples of the new chunk shape so that every output chunk is compressed exactly once.
+All dimensions, variables and attributes are preserved. The rechunked file atomically replaces the original (or is
+written to a separate output path) and the file's entry in .metadata.json is updated.
+
+Usage: python -m geophys2netcdf rechunk <nc_file_directory_or_manifest> [...] [options]
+'''
+import os
+import sys
+import json
+import logging
+import argparse
+import traceback
+import multiprocessing
+import netCDF4
+
+from geophys2netcdf._workspace import Workspace
+from geophys2netcdf._codecs import CompressionCodec, select_codec, get_compression_metadata, DEFAULT_CODEC
+from geophys2netcdf._sparse import get_fill_value, get_data_column_ranges
+from geophys2netcdf._chunking import plan_chunk_shape, fixed_chunk_shape, set_chunking_attributes, \
+    ACCESS_PROFILES, DEFAULT_ACCESS_PROFILE
+from geophys2netcdf.metadata_json import update_json_metadata_files, is_fast_digest_available
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+DEFAULT_MEMORY_BYTES = 268435456  # 256MiB memory budget for data in transit
+
+
+class VariableWindowReader(object):
+    '''
+    Class definition for VariableWindowReader
+    Minimal grid reader interface over a 2D netCDF4 variable, used for codec trials
+    '''
+
+    def __init__(self, variable):
+        self._variable = variable
+
+    def read_window(self, band_number, row_start, row_end, col_start=0, col_end=None):
+        return self._variable[row_start:row_end, col_start:col_end]
+
+    @property
+    def nrows(self):
+        return self._variable.shape[0]
+
+    @property
+    def ncols(self):
+        return self._variable.shape[1]
+
+
+def is_rechunk_variable(variable):
+    '''
+    Function to return True for 2D data variables and their overviews, which are rechunked and recompressed.
+    All other variables are copied with their existing storage settings
+    '''
+    return len(variable.dimensions) == 2 and (hasattr(variable, 'grid_mapping') or hasattr(variable, 'overview_of'))
+
+
+def get_tile_shape(shape, chunk_shape, itemsize, memory_bytes):
+    '''
+    Function to return the largest tile shape which is a whole multiple of chunk_shape, preferring full-width
+    rows of chunks, and which fits within half the memory budget (the other half being for the input chunk cache)
+    '''
+    nrows, ncols = shape
+    chunk_rows, chunk_cols = chunk_shape
+    tile_bytes = memory_bytes // 2
+
+    chunk_row_bytes = chunk_rows * ncols * itemsize
+    if chunk_row_bytes <= tile_bytes:  # Full-width tiles
+        return (min(chunk_rows * (tile_bytes // chunk_row_bytes), nrows), ncols)
+    else:
+        chunk_bytes = chunk_rows * chunk_cols * itemsize
+        return (chunk_rows, min(chunk_cols * max(tile_bytes // chunk_bytes, 1), ncols))
+
+
+def copy_variable_data(input_variable, output_variable, memory_bytes):
+    '''
+    Function to copy data between variables through a fixed memory budget.
+    Output chunks which would contain only the fill value are not written, so they remain unallocated
+    '''
+    if not input_variable.dimensions:  # Scalar variable, e.g. grid_mapping
+        return
+    elif len(input_variable.dimensions) == 1:
+        output_variable[:] = input_variable[:]
+        return
+
+    shape = input_variable.shape
+    tile_shape = get_tile_shape(shape, output_variable.chunking(), input_variable.dtype.itemsize, memory_bytes)
+    # Hold a full row of input chunks so that misaligned input chunks are decompressed only once per row of tiles
+    input_variable.set_var_chunk_cache(size=memory_bytes // 2)
+    logger.debug('Copying %s in %s tiles', input_variable.name, tile_shape)
+
+    chunk_rows, chunk_cols = output_variable.chunking()
+    fill_value = get_fill_value(output_variable)
+    for row_start in range(0, shape[0], tile_shape[0]):
+        row_end = min(row_start + tile_shape[0], shape[0])
+        for col_start in range(0, shape[1], tile_shape[1]):
+            col_end = min(col_start + tile_shape[1], shape[1])
+            tile_array = input_variable[row_start:row_end, col_start:col_end]
+            # Only write columns of output chunks containing data in each row of output chunks
+            for chunk_row_start in range(0, row_end - row_start, chunk_rows):
+                chunk_row_end = min(chunk_row_start + chunk_rows, row_end - row_start)
+                chunk_row_array = tile_array[chunk_row_start:chunk_row_end]
+                for chunk_col_start, chunk_col_end in get_data_column_ranges(chunk_row_array,
+                                                                             chunk_cols,
+                                                                             fill_value):
+                    output_variable[row_start + chunk_row_start:row_start + chunk_row_end,
+                                    col_start + chunk_col_start:col_start + chunk_col_end
+                                    ] = chunk_row_array[:, chunk_col_start:chunk_col_end]
+
+
+def rechunk_file(nc_path, output_path=None, chunk_size=None, access_profile=None, target_chunk_bytes=None,
+                 codec=None, memory_bytes=None, workspace=None, fast_digest=False):
+    '''
+    Function to rewrite a NetCDF file with a new chunk shape and codec
+    Parameters:
+        nc_path: Path of existing NetCDF file
+        output_path: Path of rechunked file. Defaults to replacing nc_path
+        chunk_size: Fixed chunk size for both dimensions. Chunk shape is planned from access_profile and
+            target_chunk_bytes if not specified
+        codec: CompressionCodec specification string, or "auto". Defaults to DEFAULT_CODEC
+        memory_bytes: Memory budget for data in transit. Defaults to DEFAULT_MEMORY_BYTES
+        workspace: Workspace object used to locate the temporary output file. Defaults to output directory
+        fast_digest: Boolean flag indicating whether a FAST_DIGEST_NAME digest should be recorded in
+            .metadata.json for the rechunked file
+    Returns:
+        Compression metadata dict for the rechunked file
+    '''
+    nc_path = os.path.abspath(nc_path)
+    output_path = os.path.abspath(output_path or nc_path)
+    memory_bytes = memory_bytes or DEFAULT_MEMORY_BYTES
+    codec = codec or DEFAULT_CODEC
+    if codec != 'auto':
+        codec = CompressionCodec.from_string(codec)
+        assert codec.is_available(), 'Codec %s is not supported by this netCDF4 library' % codec
+
+    if workspace:
+        temp_path = workspace.get_temp_path(os.path.basename(output_path) + '.tmp',
+                                            required_bytes=os.path.getsize(nc_path),
+                                            fallback_dir=os.path.dirname(output_path))
+    else:
+        temp_path = output_path + '.tmp'
+
+    input_dataset = netCDF4.Dataset(nc_path, 'r')
+    try:
+        output_dataset = netCDF4.Dataset(temp_path, 'w', format=input_dataset.data_model)
+        try:
+            output_dataset.setncatts({attribute_name: input_dataset.getncattr(attribute_name)
+                                      for attribute_name in input_dataset.ncattrs()})
+            for dimension in input_dataset.dimensions.values():
+                output_dataset.createDimension(dimension.name,
+                                               None if dimension.isunlimited() else len(dimension))
+
+            data_variables = [variable for variable in input_dataset.variables.values()
+                              if hasattr(variable, 'grid_mapping')]
+            assert data_variables, 'No data variables found in %s' % nc_path
+            if chunk_size:
+                chunk_shape, rationale = fixed_chunk_shape(data_variables[0].shape, chunk_size)
+            else:
+                chunk_shape, rationale = plan_chunk_shape(data_variables[0].shape,
+                                                          data_variables[0].dtype,
+                                                          target_chunk_bytes=target_chunk_bytes,
+                                                          access_profile=access_profile)
+            set_chunking_attributes(output_dataset, chunk_shape, rationale,
+                                    None if chunk_size else (access_profile or DEFAULT_ACCESS_PROFILE))
+
+            if codec == 'auto':
+                data_variables[0].set_auto_maskandscale(False)
+                codec, trial_results = select_codec(VariableWindowReader(data_variables[0]),
+                                                    chunk_shape,
+                                                    data_variables[0].dtype)
+                output_dataset.compression_selection = 'auto'
+                output_dataset.compression_trial_ratio = [trial_result['ratio']
+                                                          for trial_result in trial_results
+                                                          if trial_result['codec'] == str(codec)][0]
+            else:
+                output_dataset.compression_selection = 'fixed'
+                if hasattr(output_dataset, 'compression_trial_ratio'):
+                    del output_dataset.compression_trial_ratio
+            output_dataset.compression_codec = str(codec)
+            output_dataset.history = (getattr(input_dataset, 'history', '') + '\n' +
+                                      'Rechunked to %s with codec %s by %s' % (
+                                          'x'.join([str(size) for size in chunk_shape]), codec, __name__)).strip()
+
+            for input_variable in input_dataset.variables.values():
+                input_variable.set_auto_maskandscale(False)
+                if is_rechunk_variable(input_variable):
+                    storage_kwargs = dict(codec.variable_kwargs())
+                    storage_kwargs['chunksizes'] = [min(chunk_dimension_size, dimension_size)
+                                                    for chunk_dimension_size, dimension_size
+                                                    in zip(chunk_shape, input_variable.shape)]
+                else:  # Keep existing storage settings
+                    filters = input_variable.filters() or {}
+                    storage_kwargs = {'zlib': filters.get('zlib', False),
+                                      'complevel': filters.get('complevel', 4),
+                                      'shuffle': filters.get('shuffle', False),
+                                      }
+                    chunking = input_variable.chunking()
+                    if chunking and chunking != 'contiguous':
+                        storage_kwargs['chunksizes'] = chunking
+
+                output_variable = output_dataset.createVariable(input_variable.name,
+                                                                input_variable.dtype,
+                                                                input_variable.dimensions,
+                                                                fill_value=getattr(input_variable, '_FillValue', None),
+                                                                **storage_kwargs)
+                output_variable.set_auto_maskandscale(False)
+                output_variable.setncatts({attribute_name: input_variable.getncattr(attribute_name)
+                                           for attribute_name in input_variable.ncattrs()
+                                           if attribute_name != '_FillValue'})
+
+                copy_variable_data(input_variable, output_variable, memory_bytes)
+
+            output_dataset.close()
+        except:
+            output_dataset.close()
+            os.remove(temp_path)
+            raise
+    finally:
+        input_dataset.close()
+
+    if workspace:
+        workspace.move_to_final(temp_path, output_path)
+    else:
+        os.rename(temp_path, output_path)
+
+    output_dataset = netCDF4.Dataset(output_path, 'r')
+    compression_dict = get_compression_metadata(output_dataset, output_path)
+    output_dataset.close()
+
+    # Keep .metadata.json checksums current
+    dataset_folder = os.path.dirname(output_path)
+    if os.path.isfile(os.path.join(dataset_folder, '.metadata.json')):
+        update_json_metadata_files(dataset_folder, [output_path],
+                                   extra_metadata={'compression': compression_dict} if compression_dict else None,
+                                   fast_digest=fast_digest)
+
+    logger.info('Rechunked %s to %s with codec %s', nc_path, output_path, codec)
+    return compression_dict
+
+
+def _rechunk_task(task):
+    '''
+    Process pool task function to rechunk a single file, isolating any failure
+    Returns:
+        Result dict for the summary report
+    '''
+    nc_path, options = task
+    result = {'input_path': nc_path}
+    try:
+        result['compression'] = rechunk_file(nc_path,
+                                             workspace=Workspace(options.pop('scratch_root', None)),
+                                             **options)
+        result['status'] = 'OK'
+    except Exception as e:
+        logger.error('ERROR: Rechunking of %s failed: %s', nc_path, e)
+        result['status'] = 'FAILED'
+        result['error'] = '%s: %s' % (e.__class__.__name__, e)
+        result['traceback'] = traceback.format_exc()
+    return result
+
+
+def rechunk_files(nc_paths, processes=None, **options):
+    '''
+    Function to rechunk many files, optionally in parallel
+    Parameters:
+        processes: Number of worker processes. Files are processed serially in-process if 1
+        options: Keyword arguments for rechunk_file(), plus scratch_root
+    Returns:
+        List of result dicts
+    '''
+    task_list = [(nc_path, dict(options)) for nc_path in nc_paths]
+    if processes == 1:
+        return [_rechunk_task(task) for task in task_list]
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        return list(pool.imap_unordered(_rechunk_task, task_list))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m geophys2netcdf rechunk',
+                                     description='Rechunk and recompress existing NetCDF files in place')
+    parser.add_argument('sources', nargs='+',
+                        help='NetCDF file, directory to search for .nc files, or manifest file listing NetCDF paths')
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help='Number of files to rechunk concurrently (default: 1)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=None,
+                        help='Fixed chunk size for both dimensions')
+    parser.add_argument('--access-profile', choices=ACCESS_PROFILES, default=None,
+                        help='Declared access profile for chunk planning')
+    parser.add_argument('--target-chunk-bytes', type=int, default=None,
+                        help='Target uncompressed chunk size in bytes for chunk planning')
+    parser.add_argument('--codec', default=None,
+                        help='Compression codec, e.g. "deflate:4+shuffle" or "auto" (default: %s)' % DEFAULT_CODEC)
+    parser.add_argument('-m', '--memory', type=int, default=DEFAULT_MEMORY_BYTES // 1048576,
+                        help='Memory budget per file in MiB (default: %d)' % (DEFAULT_MEMORY_BYTES // 1048576))
+    parser.add_argument('--scratch-root', default=None,
+                        help='Directory for temporary files')
+    parser.add_argument('-r', '--report', dest='report_path', default=None,
+                        help='Path of JSON summary report')
+    parser.add_argument('--fast-digest', action='store_true',
+                        help='Record an xxh64 digest in .metadata.json for each rechunked file (requires xxhash)')
+    parser.add_argument('--debug', action='store_true', help='Enable debug output')
+    args = parser.parse_args(argv)
+    if args.fast_digest and not is_fast_digest_available():
+        parser.error('--fast-digest requires the xxhash module')
+
+    from geophys2netcdf._batch import find_datasets  # Deferred to avoid loading converters unless required
+
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+
+    nc_paths = []
+    for source in args.sources:
+        if os.path.isfile(source) and os.path.splitext(source)[1].lower() == '.nc':
+            nc_paths.append(os.path.abspath(source))
+        else:
+            nc_paths += find_datasets(source, ['nc'])
+
+    result_list = rechunk_files(nc_paths,
+                                processes=args.processes,
+                                chunk_size=args.chunk_size,
+                                access_profile=args.access_profile,
+                                target_chunk_bytes=args.target_chunk_bytes,
+                                codec=args.codec,
+                                memory_bytes=args.memory * 1048576,
+                                scratch_root=args.scratch_root,
+                                fast_digest=args.fast_digest)
+
+    failed_list = [result for result in result_list if result['status'] == 'FAILED']
+    logger.info('%d files rechunked, %d failed', len(result_list) - len(failed_list), len(failed_list))
+
+    if args.report_path:
+        report_file = open(args.report_path, 'w')
+        json.dump({'results': sorted(result_list, key=lambda result: result['input_path'])},
+                  report_file, indent=4)
+        report_file.close()
+        logger.info('Summary report written to %s', args.report_path)
+
+    if failed_list:
+        sys.exit(1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Sparse chunk functions
+Created on 16/10/2026
+
+Chunks of a NetCDF4/HDF5 variable which are never written are left unallocated, and read back as the variable's
+_FillValue without any I/O or decompression. The writers use these functions to skip chunks which are entirely
+_FillValue, and the statistics, footprint and verification passes use them to skip unallocated chunks.
+Chunk allocation is queried with h5py, which is optional - all chunks are assumed to be allocated without it.
+'''
+import logging
+import numpy as np
+import netCDF4
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+# Optional dependency required only to query chunk allocation
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+def get_fill_value(variable):
+    '''
+    Function to return the fill value of a netCDF4 variable (or h5py dataset), i.e. the value read from
+    unallocated chunks
+    '''
+    if hasattr(variable, 'fillvalue'):  # h5py.Dataset
+        return variable.fillvalue
+    return getattr(variable, '_FillValue', netCDF4.default_fillvals.get(variable.dtype.str[1:]))
+
+
+def is_fill_array(array, fill_value):
+    '''
+    Function to return True if every cell of array is equal to fill_value (NaN fill values match NaN cells)
+    '''
+    if fill_value is None:
+        return False
+
+    array = np.asarray(array)
+    fill_value = np.asarray(fill_value).astype(array.dtype)
+    if fill_value.dtype.kind == 'f' and np.isnan(fill_value):
+        return bool(np.all(np.isnan(array)))
+    return bool(np.all(array == fill_value))
+
+
+def get_data_column_ranges(array, chunk_cols, fill_value):
+    '''
+    Function to return a list of (col_start, col_end) ranges of a block of rows which cover all columns of chunks
+    containing data, merging adjacent columns of chunks. Columns of chunks which are entirely fill_value are omitted
+    '''
+    ncols = array.shape[1]
+    column_ranges = []
+    for col_start in range(0, ncols, chunk_cols):
+        col_end = min(col_start + chunk_cols, ncols)
+        if is_fill_array(array[:, col_start:col_end], fill_value):
+            continue
+        if column_ranges and column_ranges[-1][1] == col_start:
+            column_ranges[-1] = (column_ranges[-1][0], col_end)
+        else:
+            column_ranges.append((col_start, col_end))
+    return column_ranges
+
+
+def get_allocated_chunks(nc_path, variable_names):
+    '''
+    Function to return a dict of sets of (row, col) origins of the allocated chunks of 2D variables, keyed by
+    variable name. Variables for which allocation cannot be determined (e.g. contiguous variables, or h5py
+    unavailable) are omitted
+    '''
+    allocated_chunks = {}
+    if h5py is None:
+        return allocated_chunks
+
+    try:
+        h5_file = h5py.File(nc_path, 'r')
+    except Exception as e:
+        logger.debug('Unable to open %s with h5py: %s', nc_path, e)
+        return allocated_chunks
+
+    try:
+        for variable_name in variable_names:
+            dataset = h5_file[variable_name]
+            if not dataset.chunks:
+                continue
+
+            chunk_origins = set()
+            if hasattr(dataset.id, 'chunk_iter'):  # Single pass over chunk index
+                dataset.id.chunk_iter(lambda chunk_info: chunk_origins.add(tuple(chunk_info.chunk_offset)))
+            else:
+                for chunk_index in range(dataset.id.get_num_chunks()):
+                    chunk_origins.add(tuple(dataset.id.get_chunk_info(chunk_index).chunk_offset))
+            allocated_chunks[variable_name] = chunk_origins
+    except Exception as e:
+        logger.debug('Unable to determine chunk allocation in %s: %s', nc_path, e)
+    finally:
+        h5_file.close()
+
+    return allocated_chunks
+
+
+def get_variable_allocated_chunks(variable):
+    '''
+    Function to return the set of (row, col) origins of the allocated chunks of an open netCDF4 variable,
+    or None if allocation cannot be determined
+    '''
+    try:
+        nc_path = variable.group().filepath()
+    except ValueError:  # Dataset not opened from a file
+        return None
+    return get_allocated_chunks(nc_path, [variable.name]).get(variable.name)
+
+
+def get_chunk_windows(chunk_shape, allocated_chunks, row_start, row_end, col_start, col_end, allocated=True):
+    '''
+    Function to return a list of (row_start, row_end, col_start, col_end) windows covering either the allocated or
+    the unallocated chunks within a block, merging horizontally adjacent chunks in each row of chunks
+    '''
+    chunk_rows, chunk_cols = chunk_shape
+    windows = []
+    for chunk_row_start in range(row_start - row_start % chunk_rows, row_end, chunk_rows):
+        window_row_start = max(chunk_row_start, row_start)
+        window_row_end = min(chunk_row_start + chunk_rows, row_end)
+        window = None
+        for chunk_col_start in range(col_start - col_start % chunk_cols, col_end, chunk_cols):
+            window_col_end = min(chunk_col_start + chunk_cols, col_end)
+            if ((chunk_row_start, chunk_col_start) in allocated_chunks) != allocated:
+                window = None
+            elif window:
+                window[3] = window_col_end
+            else:
+                window = [window_row_start, window_row_end, max(chunk_col_start, col_start), window_col_end]
+                windows.append(window)
+
+    return [tuple(window) for window in windows]
+
+
+def get_allocated_windows(chunk_shape, allocated_chunks, row_start, row_end, col_start, col_end):
+    '''
+    Function to return (allocated_windows, unallocated_cell_count) for a block, where allocated_windows
+    is a list of (row_start, row_end, col_start, col_end) windows covering the allocated chunks in the block
+    '''
+    allocated_windows = get_chunk_windows(chunk_shape, allocated_chunks, row_start, row_end, col_start, col_end)
+    allocated_cell_count = sum([(window_row_end - window_row_start) * (window_col_end - window_col_start)
+                                for window_row_start, window_row_end, window_col_start, window_col_end
+                                in allocated_windows])
+    return allocated_windows, (row_end - row_start) * (col_end - col_start) - allocated_cell_count
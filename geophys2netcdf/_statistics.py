@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+BandStatistics Class
+Created on 16/10/2026
+
+Streaming accumulator for per-band statistics (min, max, mean, variance and valid/nodata counts),
+updated block by block so that statistics can be gathered in the same pass that writes the data.
+Blocks are combined using the parallel mean/variance algorithm of Chan, Golub & LeVeque, so results do not
+depend on block size or order.
+
+Statistics are stored as attributes of each data variable:
+    actual_range: [min, max] of valid values
+    stats_mean, stats_variance: mean and population variance of valid values
+    stats_valid_count, stats_nodata_count: numbers of valid and nodata cells
+
+Precomputed statistics (e.g. from an Intrepid .isi file) may be used in place of a full scan of a file
+once they have been cross-checked against a random sample of chunks.
+'''
+import logging
+import numpy as np
+
+from geophys2netcdf._sparse import get_variable_allocated_chunks, get_allocated_windows
+from geophys2netcdf._quantization import get_quantization_tolerance
+from geophys2netcdf._packing import is_packed, get_packing_tolerance
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+STATISTICS_ATTRIBUTES = ['actual_range',
+                         'stats_mean',
+                         'stats_variance',
+                         'stats_valid_count',
+                         'stats_nodata_count',
+                         ]
+DEFAULT_MAX_BYTES = 536870912  # 512MiB maximum read size when computing statistics from a file
+DEFAULT_SAMPLE_CHUNKS = 64  # Number of chunks read to cross-check precomputed statistics
+SAMPLE_SEED = 0  # Fixed seed so that the chunks sampled from a variable are repeatable
+SAMPLE_TOLERANCE_SIGMAS = 4.0  # Number of standard errors by which sampled statistics may differ from precomputed ones
+PRECOMPUTED_RELATIVE_TOLERANCE = 1.0e-5  # Allows for precomputed statistics printed to limited precision
+
+
+def get_valid_mask(array, nodata_value=None):
+    '''
+    Function to return a boolean mask of the cells in array which are not nodata (or NaN)
+    '''
+    if nodata_value is None or np.isnan(nodata_value):
+        if array.dtype.kind == 'f':
+            return ~np.isnan(array)
+        else:
+            return np.ones(array.shape, dtype=bool)
+    else:
+        valid_mask = (array != nodata_value)
+        if array.dtype.kind == 'f':
+            valid_mask &= ~np.isnan(array)
+        return valid_mask
+
+
+class BandStatistics(object):
+    '''
+    Class definition for BandStatistics
+    '''
+
+    def __init__(self, nodata_value=None):
+        '''
+        Constructor for class BandStatistics
+        Parameter:
+            nodata_value: Value of cells to exclude from statistics. NaN values are always excluded
+        '''
+        self._nodata_value = nodata_value
+        self._valid_count = 0
+        self._nodata_count = 0
+        self._min = None
+        self._max = None
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from mean
+
+    def update(self, array, valid_mask=None):
+        '''
+        Function to accumulate statistics for a block of data
+        Parameter:
+            valid_mask: Optional precomputed result of get_valid_mask() for array
+        '''
+        if valid_mask is None:
+            valid_mask = get_valid_mask(array, self._nodata_value)
+        valid_values = array[valid_mask]
+        self._nodata_count += array.size - valid_values.size
+        if not valid_values.size:
+            return
+
+        block_mean = valid_values.mean(dtype=np.float64)
+        block_m2 = valid_values.var(dtype=np.float64) * valid_values.size
+        self.combine(valid_values.size, valid_values.min(), valid_values.max(), block_mean, block_m2)
+
+    @classmethod
+    def from_precomputed(cls, nodata_value, minimum, maximum, mean, variance, valid_count, nodata_count):
+        '''
+        Function to return a BandStatistics object holding precomputed statistics
+        '''
+        band_statistics = cls(nodata_value)
+        band_statistics._nodata_count = nodata_count
+        if valid_count:
+            band_statistics.combine(valid_count, minimum, maximum, mean, variance * valid_count)
+        return band_statistics
+
+    def rescale(self, scale_factor, add_offset):
+        '''
+        Function to convert statistics accumulated from packed values into unpacked units
+        '''
+        if not self._valid_count:
+            return
+        self._min, self._max = sorted([self._min * scale_factor + add_offset,
+                                       self._max * scale_factor + add_offset])
+        self._mean = self._mean * scale_factor + add_offset
+        self._m2 = self._m2 * scale_factor * scale_factor
+
+    def add_nodata_count(self, nodata_count):
+        '''
+        Function to account for nodata cells which have not been read, e.g. unallocated chunks
+        '''
+        self._nodata_count += nodata_count
+
+    def merge(self, band_statistics):
+        '''
+        Function to combine the statistics of another BandStatistics object into this one
+        '''
+        self._nodata_count += band_statistics._nodata_count
+        if band_statistics._valid_count:
+            self.combine(band_statistics._valid_count, band_statistics._min, band_statistics._max,
+                         band_statistics._mean, band_statistics._m2)
+
+    def combine(self, count, min_value, max_value, mean, m2):
+        '''
+        Function to combine the statistics of a set of valid values into the running statistics
+        '''
+        total_count = self._valid_count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total_count
+        self._m2 += m2 + delta * delta * self._valid_count * count / total_count
+        self._valid_count = total_count
+
+        self._min = min_value if self._min is None else min(self._min, min_value)
+        self._max = max_value if self._max is None else max(self._max, max_value)
+
+    def set_attributes(self, variable):
+        '''
+        Function to store statistics as attributes of a netCDF4 variable
+        '''
+        if self._valid_count:
+            variable.actual_range = np.array([self._min, self._max], dtype='float32')
+            variable.stats_mean = self.mean
+            variable.stats_variance = self.variance
+        variable.stats_valid_count = self._valid_count
+        variable.stats_nodata_count = self._nodata_count
+        logger.debug('Statistics for %s: %s', variable.name, self.to_dict())
+
+    def to_dict(self):
+        return {'min': self.min,
+                'max': self.max,
+                'mean': self.mean,
+                'variance': self.variance,
+                'valid_count': self._valid_count,
+                'nodata_count': self._nodata_count,
+                }
+
+    @staticmethod
+    def has_attributes(variable):
+        '''
+        Function to return True if statistics have already been stored as attributes of a netCDF4 variable
+        N.B: actual_range alone may have been set by other tools, so the counts must also be present
+        '''
+        return hasattr(variable, 'stats_valid_count') and hasattr(variable, 'stats_nodata_count')
+
+    @property
+    def nodata_value(self):
+        return self._nodata_value
+
+    @property
+    def valid_count(self):
+        return self._valid_count
+
+    @property
+    def nodata_count(self):
+        return self._nodata_count
+
+    @property
+    def min(self):
+        return None if self._min is None else float(self._min)
+
+    @property
+    def max(self):
+        return None if self._max is None else float(self._max)
+
+    @property
+    def mean(self):
+        return float(self._mean) if self._valid_count else None
+
+    @property
+    def variance(self):
+        return float(self._m2 / self._valid_count) if self._valid_count else None
+
+
+def compute_variable_statistics(variable, max_bytes=None):
+    '''
+    Function to compute statistics for an existing 2D netCDF4 variable in a single pass.
+    Data is read in whole rows of chunks so that each chunk is decompressed exactly once.
+    Unallocated chunks (which can only contain _FillValue) are counted as nodata without being read
+    Returns:
+        BandStatistics object
+    '''
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+    nodata_value = getattr(variable, '_FillValue', None)
+    band_statistics = BandStatistics(nodata_value)
+
+    nrows, ncols = variable.shape
+    chunking = variable.chunking()
+    chunk_rows = chunking[0] if chunking != 'contiguous' else 1
+    row_bytes = ncols * variable.dtype.itemsize
+    read_rows = max(max_bytes // (row_bytes * chunk_rows), 1) * chunk_rows
+    allocated_chunks = get_variable_allocated_chunks(variable) if nodata_value is not None else None
+
+    variable.set_auto_maskandscale(False)
+    for row_start in range(0, nrows, read_rows):
+        row_end = min(row_start + read_rows, nrows)
+        if allocated_chunks is None:
+            band_statistics.update(variable[row_start:row_end, :])
+            continue
+
+        allocated_windows, unallocated_cell_count = get_allocated_windows(chunking, allocated_chunks,
+                                                                          row_start, row_end, 0, ncols)
+        band_statistics.add_nodata_count(unallocated_cell_count)
+        for window_row_start, window_row_end, window_col_start, window_col_end in allocated_windows:
+            band_statistics.update(variable[window_row_start:window_row_end, window_col_start:window_col_end])
+
+    if is_packed(variable):
+        band_statistics.rescale(float(getattr(variable, 'scale_factor', 1.0)),
+                                float(getattr(variable, 'add_offset', 0.0)))
+
+    return band_statistics
+
+
+def get_precomputed_statistics(variable, precomputed):
+    '''
+    Function to return a BandStatistics object for a 2D netCDF4 variable from a dict of precomputed statistics
+    keyed by "Minimum", "Maximum", "Mean", "Variance", "Samples" and "Nulls" (as found in .isi files),
+    or None if the precomputed statistics are incomplete or inconsistent with the shape of the variable
+    '''
+    if not precomputed:
+        return None
+    if [key for key in ['Minimum', 'Maximum', 'Mean', 'Variance'] if precomputed.get(key) is None]:
+        return None
+
+    cell_count = variable.shape[0] * variable.shape[1]
+    valid_count = precomputed.get('Samples')
+    nodata_count = precomputed.get('Nulls')
+    if valid_count is None and nodata_count is None:
+        return None
+    valid_count = int(cell_count - nodata_count if valid_count is None else valid_count)
+    nodata_count = int(cell_count - valid_count if nodata_count is None else nodata_count)
+    if valid_count + nodata_count != cell_count or min(valid_count, nodata_count) < 0:
+        logger.warning('WARNING: Precomputed statistics for %s count %d valid and %d null cells instead of %d',
+                       variable.name, valid_count, nodata_count, cell_count)
+        return None
+
+    return BandStatistics.from_precomputed(getattr(variable, '_FillValue', None),
+                                           precomputed['Minimum'], precomputed['Maximum'],
+                                           precomputed['Mean'], precomputed['Variance'],
+                                           valid_count, nodata_count)
+
+
+def get_sample_chunk_windows(variable, sample_chunks=None):
+    '''
+    Function to return a list of (row_start, row_end, col_start, col_end) windows for up to sample_chunks
+    individual chunks of a 2D netCDF4 variable, chosen at random with a fixed seed so that results are repeatable
+    '''
+    sample_chunks = sample_chunks or DEFAULT_SAMPLE_CHUNKS
+    nrows, ncols = variable.shape
+    chunking = variable.chunking()
+    chunk_rows, chunk_cols = chunking if chunking != 'contiguous' else (1, ncols)
+    chunk_row_count = (nrows + chunk_rows - 1) // chunk_rows
+    chunk_col_count = (ncols + chunk_cols - 1) // chunk_cols
+    chunk_count = chunk_row_count * chunk_col_count
+
+    chunk_indices = sorted(np.random.RandomState(SAMPLE_SEED).choice(chunk_count,
+                                                                     min(sample_chunks, chunk_count),
+                                                                     replace=False))
+    return [((chunk_index // chunk_col_count) * chunk_rows,
+             min((chunk_index // chunk_col_count + 1) * chunk_rows, nrows),
+             (chunk_index % chunk_col_count) * chunk_cols,
+             min((chunk_index % chunk_col_count + 1) * chunk_cols, ncols))
+            for chunk_index in chunk_indices]
+
+
+def get_ratio_standard_error(numerators, denominators):
+    '''
+    Function to return the standard error of the ratio estimate sum(numerators) / sum(denominators) from a
+    random sample of clusters (e.g. chunks), or 0.0 if there are too few clusters to estimate it
+    '''
+    numerators = np.asarray(numerators, dtype=np.float64)
+    denominators = np.asarray(denominators, dtype=np.float64)
+    cluster_count = len(denominators)
+    if cluster_count < 2 or not denominators.sum():
+        return 0.0
+    ratio = numerators.sum() / denominators.sum()
+    residual_variance = np.sum((numerators - ratio * denominators) ** 2) / (cluster_count - 1)
+    return float(np.sqrt(residual_variance / cluster_count) / denominators.mean())
+
+
+def check_sample_statistics(variable, band_statistics, sample_chunks=None):
+    '''
+    Function to return True if a random sample of individual chunks of a 2D netCDF4 variable is consistent with
+    the given statistics, i.e. all sampled values lie within the stated range, and the sample mean and valid
+    fraction agree with the stated mean and valid count to within SAMPLE_TOLERANCE_SIGMAS standard errors,
+    allowing for quantization or packing.
+    At most sample_chunks chunks are decompressed. Unallocated chunks are counted as nodata without being read
+    '''
+    nodata_value = getattr(variable, '_FillValue', None)
+    allocated_chunks = get_variable_allocated_chunks(variable) if nodata_value is not None else None
+    sample_statistics = BandStatistics(nodata_value)
+    chunk_cell_counts = []
+    chunk_valid_counts = []
+    chunk_sums = []
+
+    # Read raw values so that the caller's mask and scale settings are not disturbed
+    auto_mask, auto_scale = getattr(variable, 'mask', True), getattr(variable, 'scale', True)
+    variable.set_auto_maskandscale(False)
+    try:
+        for row_start, row_end, col_start, col_end in get_sample_chunk_windows(variable, sample_chunks):
+            chunk_statistics = BandStatistics(nodata_value)
+            if allocated_chunks is None or get_allocated_windows(variable.chunking(), allocated_chunks,
+                                                                 row_start, row_end, col_start, col_end)[0]:
+                chunk_statistics.update(variable[row_start:row_end, col_start:col_end])
+            else:
+                chunk_statistics.add_nodata_count((row_end - row_start) * (col_end - col_start))
+            if is_packed(variable):
+                chunk_statistics.rescale(float(getattr(variable, 'scale_factor', 1.0)),
+                                         float(getattr(variable, 'add_offset', 0.0)))
+
+            chunk_cell_counts.append(chunk_statistics.valid_count + chunk_statistics.nodata_count)
+            chunk_valid_counts.append(chunk_statistics.valid_count)
+            chunk_sums.append((chunk_statistics.mean or 0.0) * chunk_statistics.valid_count)
+            sample_statistics.merge(chunk_statistics)
+    finally:
+        variable.set_auto_mask(auto_mask)
+        variable.set_auto_scale(auto_scale)
+
+    cell_count = band_statistics.valid_count + band_statistics.nodata_count
+    valid_fraction = float(band_statistics.valid_count) / cell_count
+    sample_cell_count = sample_statistics.valid_count + sample_statistics.nodata_count
+    # Use the larger of the cluster and simple random sampling standard errors so that a sample of
+    # homogeneous chunks does not give a zero tolerance
+    valid_fraction_error = max(get_ratio_standard_error(chunk_valid_counts, chunk_cell_counts),
+                               np.sqrt(valid_fraction * (1.0 - valid_fraction) / sample_cell_count))
+    if abs(float(sample_statistics.valid_count) / sample_cell_count - valid_fraction) > \
+            SAMPLE_TOLERANCE_SIGMAS * valid_fraction_error:
+        logger.debug('Sampled valid fraction of %s disagrees with precomputed valid count', variable.name)
+        return False
+
+    if not band_statistics.valid_count:
+        return not sample_statistics.valid_count
+
+    absolute_tolerance, relative_tolerance = get_quantization_tolerance(variable)
+    magnitude = max(abs(band_statistics.min), abs(band_statistics.max))
+    tolerance = max(absolute_tolerance or 0.0,
+                    get_packing_tolerance(variable) or 0.0,
+                    (relative_tolerance or 0.0) * magnitude,
+                    PRECOMPUTED_RELATIVE_TOLERANCE * magnitude)
+
+    if not (band_statistics.min <= band_statistics.mean <= band_statistics.max and band_statistics.variance >= 0):
+        return False
+    if not sample_statistics.valid_count:
+        return True
+
+    if not (sample_statistics.min >= band_statistics.min - tolerance and
+            sample_statistics.max <= band_statistics.max + tolerance):
+        logger.debug('Sampled values of %s lie outside precomputed range', variable.name)
+        return False
+
+    mean_error = max(get_ratio_standard_error(chunk_sums, chunk_valid_counts),
+                     np.sqrt(band_statistics.variance / sample_statistics.valid_count))
+    if abs(sample_statistics.mean - band_statistics.mean) > SAMPLE_TOLERANCE_SIGMAS * mean_error + tolerance:
+        logger.debug('Sampled mean of %s disagrees with precomputed mean', variable.name)
+        return False
+
+    return True
+
+
+def get_variable_statistics(variable, precomputed=None, max_bytes=None, sample_chunks=None):
+    '''
+    Function to return a BandStatistics object for an existing 2D netCDF4 variable.
+    Precomputed statistics (see get_precomputed_statistics()) are trusted if they agree with a random sample
+    of chunks, otherwise statistics are computed from a full scan of the variable
+    '''
+    band_statistics = get_precomputed_statistics(variable, precomputed)
+    if band_statistics and check_sample_statistics(variable, band_statistics, sample_chunks):
+        logger.debug('Using precomputed statistics for %s', variable.name)
+        return band_statistics
+
+    if band_statistics:
+        logger.warning('WARNING: Precomputed statistics for %s disagree with sampled data. Computing statistics.',
+                       variable.name)
+    return compute_variable_statistics(variable, max_bytes)
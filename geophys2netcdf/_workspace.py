@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Workspace Class
+Created on 16/10/2026
+
+Manages the location of large temporary files. Intermediates are written to a configurable scratch root
+(e.g. node-local SSD, tmpfs or $PBS_JOBFS) after checking free space against the estimated intermediate size,
+falling back to the output filesystem when scratch is too small. Finished files are moved to their final
+location with a single large sequential copy when the scratch root is on a different filesystem.
+'''
+import os
+import errno
+import shutil
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Initial logging level for this module
+
+
+class WorkspaceException(Exception):
+    pass
+
+
+class Workspace(object):
+    '''
+    Class definition for Workspace
+    '''
+    # Scratch root can be set in the environment, e.g. export GEOPHYS2NETCDF_SCRATCH=$PBS_JOBFS
+    SCRATCH_ENVIRONMENT_VARIABLES = ['GEOPHYS2NETCDF_SCRATCH', 'PBS_JOBFS']
+    SPACE_MARGIN = 1.1  # Required free space is estimated size multiplied by this margin
+    COPY_BUFFER_SIZE = 67108864  # 64MiB buffer for sequential copies
+
+    def __init__(self, scratch_root=None):
+        '''
+        Constructor for class Workspace
+        Parameter:
+            scratch_root: Directory for temporary files. Defaults to first environment variable in
+                SCRATCH_ENVIRONMENT_VARIABLES which is set, then tempfile.gettempdir()
+        '''
+        self._scratch_root = os.path.abspath(scratch_root or self.get_default_scratch_root())
+        logger.debug('Scratch root is %s', self._scratch_root)
+
+    @staticmethod
+    def get_default_scratch_root():
+        for environment_variable in Workspace.SCRATCH_ENVIRONMENT_VARIABLES:
+            if os.environ.get(environment_variable):
+                return os.environ[environment_variable]
+        return tempfile.gettempdir()
+
+    @staticmethod
+    def get_free_bytes(directory):
+        '''
+        Function to return the number of bytes available to the current user on the filesystem holding directory
+        '''
+        statvfs = os.statvfs(directory)
+        return statvfs.f_bavail * statvfs.f_frsize
+
+    def get_temp_dir(self, required_bytes=0, fallback_dir=None):
+        '''
+        Function to return a directory with at least required_bytes (plus margin) of free space.
+        Tries the scratch root first, then fallback_dir (normally the output directory)
+        Raises WorkspaceException if neither has enough space
+        '''
+        required_bytes = int(required_bytes * Workspace.SPACE_MARGIN)
+
+        candidate_dirs = [self._scratch_root]
+        if fallback_dir:
+            candidate_dirs.append(os.path.abspath(fallback_dir))
+
+        for candidate_dir in candidate_dirs:
+            if not os.path.isdir(candidate_dir):
+                logger.warning('WARNING: Temporary directory %s does not exist', candidate_dir)
+                continue
+
+            free_bytes = self.get_free_bytes(candidate_dir)
+            if free_bytes >= required_bytes:
+                logger.debug('Using %s for temporary files (%d bytes free, %d bytes required)',
+                             candidate_dir, free_bytes, required_bytes)
+                return candidate_dir
+
+            logger.warning('WARNING: Insufficient space in %s (%d bytes free, %d bytes required)',
+                           candidate_dir, free_bytes, required_bytes)
+
+        raise WorkspaceException('No temporary directory has %d bytes free (tried %s)' % (
+            required_bytes, ', '.join(candidate_dirs)))
+
+    def get_temp_path(self, basename, required_bytes=0, fallback_dir=None):
+        '''
+        Function to return a path for a temporary file in a directory with enough free space
+        '''
+        return os.path.join(self.get_temp_dir(required_bytes, fallback_dir), basename)
+
+    def make_temp_dir(self, basename, required_bytes=0, fallback_dir=None):
+        '''
+        Function to create and return a fresh, uniquely-named temporary directory with enough free space
+        '''
+        base_path = os.path.join(self.get_temp_dir(required_bytes, fallback_dir), basename)
+        temp_dir = base_path
+
+        revision = 0
+        while os.path.exists(temp_dir):
+            revision += 1
+            temp_dir = '%s_%s' % (base_path, revision)
+
+        try:
+            os.makedirs(temp_dir)
+        except OSError as exception:
+            if exception.errno != errno.EEXIST or not os.path.isdir(temp_dir):
+                raise exception
+
+        logger.debug('Created temporary directory %s', temp_dir)
+        return temp_dir
+
+    def move_to_final(self, temp_path, final_path):
+        '''
+        Function to move a finished temporary file to its final path.
+        Uses a rename where possible, otherwise a single large sequential copy to a temporary name
+        on the destination filesystem followed by a rename, so that final_path never exists in a partial state
+        '''
+        temp_path = os.path.abspath(temp_path)
+        final_path = os.path.abspath(final_path)
+        if temp_path == final_path:
+            return
+
+        if os.stat(temp_path).st_dev == os.stat(os.path.dirname(final_path)).st_dev:
+            os.rename(temp_path, final_path)
+            logger.debug('Renamed %s to %s', temp_path, final_path)
+            return
+
+        copy_path = final_path + '.tmp'
+        logger.info('Copying %s to %s', temp_path, final_path)
+        try:
+            with open(temp_path, 'rb') as source_file:
+                with open(copy_path, 'wb') as destination_file:
+                    shutil.copyfileobj(source_file, destination_file, Workspace.COPY_BUFFER_SIZE)
+            shutil.copymode(temp_path, copy_path)
+            os.rename(copy_path, final_path)
+        except:
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+            raise
+
+        os.remove(temp_path)
+
+    @property
+    def scratch_root(self):
+        return self._scratch_root
@@ -33,13 +33,14 @@ Created on 29/02/2016
 @author: Alex Ip
 '''
 import os
-import errno
 import logging
 import subprocess
-import tempfile
+import zipfile
 from shutil import rmtree
 
 from geophys2netcdf._geophys2netcdf import Geophys2NetCDF
+from geophys2netcdf._workspace import Workspace
+from geophys2netcdf._grid_reader import make_vsizip_path, grid_file_exists
 from _ers2netcdf import ERS2NetCDF
 
 logger = logging.getLogger(__name__)
@@ -52,30 +53,46 @@ class Zip2NetCDF(Geophys2NetCDF):
     '''
     FILE_EXTENSION = 'zip'
 
-    def __init__(self, input_path=None, output_path=None, debug=False):
+    def __init__(self, input_path=None, output_path=None, debug=False, writer=None,
+                 scratch_root=None, fast_digest=False, **writer_options):
         '''
         Constructor for class Zip2NetCDF
         '''
         self._geophys2netcdf = None
         self._zipdir = None
+        self._scratch_root = scratch_root
+        self._fast_digest = fast_digest
+        self._workspace = Workspace(scratch_root)
         self._debug = False
         self.debug = debug  # Set property
 
         if input_path:
-            self.translate(input_path, output_path)
+            self.translate(input_path, output_path, writer=writer, **writer_options)
 
     def __del__(self):
         '''
         Destructor for class Zip2NetCDF
         '''
-        if self._zipdir and not self._debug:
+        if not self._debug:
+            self.remove_temp_files()
+
+    def remove_temp_files(self):
+        '''
+        Function to remove temporary directory containing unzipped files
+        '''
+        if self._zipdir:
             logger.info('Removing temporary directory %s', self._zipdir)
             rmtree(self._zipdir)
+            self._zipdir = None
 
-    def translate(self, input_path, output_path=None, force_overwrite=False):
+    def translate(self, input_path, output_path=None, force_overwrite=False, writer=None, extract=False,
+                  **writer_options):
         '''
         Function to perform ERS format-specific translation and set self._input_dataset and self._netcdf_dataset
         Overrides Geophys2NetCDF.translate()
+        Parameter:
+            extract: Boolean flag indicating whether to unzip the archive into scratch space before translation.
+                By default, the dataset is read directly from the zip archive via a GDAL /vsizip/ path
         '''
         assert os.path.splitext(input_path)[1].lower(
         ) == '.zip', 'Input dataset %s is not a zip file' % input_path
@@ -84,62 +101,67 @@ class Zip2NetCDF(Geophys2NetCDF):
         output_path = output_path or os.path.splitext(input_path)[0] + '.nc'
 
         # Remove any existing zip directory
-        if self._zipdir:
-            logger.info(
-                'Removing previous temporary directory %s', self._zipdir)
-            os.removedirs(self._zipdir)
-
-        base_path = os.path.join(tempfile.gettempdir(), os.path.splitext(
-            os.path.basename(input_path))[0])
-        self._zipdir = base_path
-
-        # Unzip file into fresh directory
-        zipdir_revision = 0
-        while os.path.exists(self._zipdir):
-            zipdir_revision += 1
-            self._zipdir = '%s_%s' % (base_path, zipdir_revision)
-        logger.debug('self._zipdir = %s', self._zipdir)
-
-        try:
-            os.makedirs(self._zipdir)
-        except OSError as exception:
-            if exception.errno != errno.EEXIST or not os.path.isdir(
-                    self._zipdir):
-                raise exception
-
-        if os.name == 'nt': # Windows - assume 7zip in use
-            unzip_command = ['"C:\\Program Files\\7-Zip\\7z"', 
-                             'x',
-                             input_path,
-                             '-o' + self._zipdir]
-        else: # *nix
-            unzip_command = ['unzip',
-                             input_path,
-                             '-d',
-                             self._zipdir
-                             ]
-        
-        subprocess.check_call(unzip_command)
-        logger.info('%s unzipped into %s', input_path, self._zipdir)
-
-        file_list = os.listdir(self._zipdir)
+        self.remove_temp_files()
+
+        zip_file = zipfile.ZipFile(input_path)
+        zip_info_list = [zip_info for zip_info in zip_file.infolist()
+                         if not zip_info.filename.endswith('/')]  # Ignore directory entries
+        zip_file.close()
+
+        if extract:
+            # Unzip file into fresh directory with enough space for the uncompressed contents
+            unzipped_bytes = sum([zip_info.file_size for zip_info in zip_info_list])
+
+            self._zipdir = self._workspace.make_temp_dir(os.path.splitext(os.path.basename(input_path))[0],
+                                                         required_bytes=unzipped_bytes,
+                                                         fallback_dir=os.path.dirname(output_path))
+            logger.debug('self._zipdir = %s', self._zipdir)
+
+            if os.name == 'nt': # Windows - assume 7zip in use
+                unzip_command = ['"C:\\Program Files\\7-Zip\\7z"', 
+                                 'x',
+                                 input_path,
+                                 '-o' + self._zipdir]
+            else: # *nix
+                unzip_command = ['unzip',
+                                 input_path,
+                                 '-d',
+                                 self._zipdir
+                                 ]
+            
+            subprocess.check_call(unzip_command)
+            logger.info('%s unzipped into %s', input_path, self._zipdir)
+
+            dataset_dir = self._zipdir
+            file_list = os.listdir(self._zipdir)
+        else:
+            dataset_dir = None
+            file_list = [zip_info.filename for zip_info in zip_info_list]
+
         extension_set = set([os.path.splitext(file_path)[1].lower()
                              for file_path in file_list])
         logger.debug('file_list = %s', file_list)
         logger.debug('extension_set = %s', extension_set)
 
         if set(['.ers', '']) <= extension_set:
-            logger.info('%s contains an ERS dataset', self._zipdir)
+            logger.info('%s contains an ERS dataset', input_path)
             ers_list = [
                 file_path for file_path in file_list if file_path.lower().endswith('.ers')]
             assert len(
-                ers_list) == 1, 'Multiple .ers files found in %s' % self._zipdir
+                ers_list) == 1, 'Multiple .ers files found in %s' % input_path
+
+            if dataset_dir:
+                ers_path = os.path.join(dataset_dir, ers_list[0])
+            else:
+                ers_path = make_vsizip_path(input_path, ers_list[0])
 
-            ers_path = os.path.join(self._zipdir, ers_list[0])
-            if os.path.exists(ers_path):
+            if grid_file_exists(ers_path):
                 logger.info('Translating %s to %s', ers_path, output_path)
-                self._geophys2netcdf = ERS2NetCDF(
-                    input_path=ers_path, output_path=output_path, debug=self._debug)
+                if not self._geophys2netcdf:  # Reuse any existing ERS2NetCDF object
+                    self._geophys2netcdf = ERS2NetCDF(debug=self._debug, scratch_root=self._scratch_root,
+                                                      fast_digest=self._fast_digest)
+                self._geophys2netcdf.translate(ers_path, output_path, force_overwrite=force_overwrite,
+                                               writer=writer, **writer_options)
 
         elif set(['.blah']) < extension_set:  # Some other extensions
             pass
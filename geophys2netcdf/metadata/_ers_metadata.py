@@ -114,63 +114,82 @@ class ERSMetadata(Metadata):
 
         logger.debug('Parsing ERS/ISI file %s', filename)
 
+        infile = open(filename, 'r')
+        try:
+            self.read_string(infile.read())
+            self._filename = filename
+        finally:
+            infile.close()
+
+        return self._metadata_dict
+
+    def read_string(self, ers_string):
+        '''
+        Function to parse ERS metadata from the text of an .isi or .ers file and store the results in self._metadata_dict
+        Used for headers which are not ordinary files, e.g. members of zip archives
+        Argument:
+            ers_string: Text of ERS Metadata file
+        Returns:
+            nested dict containing metadata
+        '''
         self._metadata_dict = {}
         section_list = []
         section_dict = self._metadata_dict
-        parent_dict = None
-        infile = open(filename, 'r')
-
-        try:
-            for line in infile:
-                line = line.strip()
-                logger.debug('line = %s' % line)
-                match = re.match('(\w+) Begin$', line)
-                if match is not None:
-                    section = match.groups()[0]
-                    logger.debug('Begin section %s' % section)
-                    section_list.append(section)
-                    section_dict[section] = {}
-                    parent_dict = section_dict
-                    section_dict = section_dict[section]
+        parent_dict_list = []  # Stack of enclosing section dicts
+        for line in ers_string.splitlines():
+            line = line.strip()
+            logger.debug('line = %s' % line)
+            match = re.match('(\w+) Begin$', line)
+            if match is not None:
+                section = match.groups()[0]
+                logger.debug('Begin section %s' % section)
+                section_list.append(section)
+                parent_dict_list.append(section_dict)
+                new_section_dict = {}
+                # Repeated sections (e.g. one BandId per band) are stored as a list of dicts
+                if isinstance(section_dict.get(section), dict):
+                    section_dict[section] = [section_dict[section], new_section_dict]
+                elif isinstance(section_dict.get(section), list):
+                    section_dict[section].append(new_section_dict)
                 else:
-                    match = re.match('(\w+) End$', line)
-                    if match is not None:
-                        end_section = match.groups()[0]
-                        assert end_section == section, 'Unmatched section end: %s' % line
-                        logger.debug('End section %s' % section)
-                        del section_list[-1]
-                        if section_list:
-                            section = section_list[-1]
-                        else:
-                            section = ''
-                        section_dict = parent_dict
+                    section_dict[section] = new_section_dict
+                section_dict = new_section_dict
+            else:
+                match = re.match('(\w+) End$', line)
+                if match is not None:
+                    end_section = match.groups()[0]
+                    assert end_section == section, 'Unmatched section end: %s' % line
+                    logger.debug('End section %s' % section)
+                    del section_list[-1]
+                    if section_list:
+                        section = section_list[-1]
                     else:
-                        try:
-                            key, value = [element.strip()
-                                          for element in line.split('=')]
-
-                            # Strip quotes from string
-                            value = value.replace('"', '')
-                            #==================================================
-                            # # Change numeric types to either integer or float
-                            # try:
-                            #     assert '.' not in value, 'Decimal point or period found'
-                            #     value = int(value)
-                            # except:
-                            #     try:
-                            #         value = float(value)
-                            #     except:
-                            #         value = value.replace('"', '') # Strip quotes from string
-                            #==================================================
-
-                            logger.debug('key = %s, value = %s' % (key, value))
-                            section_dict[key] = value
-                        except:
-                            pass  # Ignore any line not of format "key = value"
+                        section = ''
+                    section_dict = parent_dict_list.pop()
+                else:
+                    try:
+                        key, value = [element.strip()
+                                      for element in line.split('=')]
+
+                        # Strip quotes from string
+                        value = value.replace('"', '')
+                        #==================================================
+                        # # Change numeric types to either integer or float
+                        # try:
+                        #     assert '.' not in value, 'Decimal point or period found'
+                        #     value = int(value)
+                        # except:
+                        #     try:
+                        #         value = float(value)
+                        #     except:
+                        #         value = value.replace('"', '') # Strip quotes from string
+                        #==================================================
+
+                        logger.debug('key = %s, value = %s' % (key, value))
+                        section_dict[key] = value
+                    except:
+                        pass  # Ignore any line not of format "key = value"
 
-            self._filename = filename
-        finally:
-            infile.close()
 
         return self._metadata_dict
 
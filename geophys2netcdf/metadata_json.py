@@ -5,20 +5,87 @@ Created on 28Oct.,2016
 '''
 import os
 from glob import glob
-import subprocess
-import re
 import json
 import logging
+import hashlib
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 from geophys2netcdf.datetime_utils import get_iso_utcnow, get_utc_mtime
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)  # Initial logging level for this module
 
+HASH_BUFFER_SIZE = 16777216  # 16MiB read buffer for file checksums
+FAST_DIGEST_NAME = 'xxh64'  # Optional non-cryptographic digest for internal integrity checks
+
+
+def is_fast_digest_available():
+    '''
+    Function to return True if FAST_DIGEST_NAME digests can be computed, i.e. the xxhash module is installed
+    '''
+    return xxhash is not None
+
+
+def new_digest(digest_name):
+    '''
+    Function to return a new hash object for 'md5' (or any other hashlib algorithm) or FAST_DIGEST_NAME
+    '''
+    if digest_name == FAST_DIGEST_NAME:
+        assert xxhash, 'xxhash module is required for %s digests' % FAST_DIGEST_NAME
+        return xxhash.xxh64()
+    return hashlib.new(digest_name)
+
 
-def write_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
+def get_file_digests(file_path, digest_names=['md5']):
+    '''
+    Function to return a dict of hex digests keyed by digest name for a file read once in large blocks
+    '''
+    digests = [new_digest(digest_name) for digest_name in digest_names]
+    input_file = open(file_path, 'rb')
+    try:
+        while True:
+            buffer = input_file.read(HASH_BUFFER_SIZE)
+            if not buffer:
+                break
+            for digest in digests:
+                digest.update(buffer)
+    finally:
+        input_file.close()
+
+    return {digest_name: digest.hexdigest() for digest_name, digest in zip(digest_names, digests)}
+
+
+def get_digest_dict(file_list, digest_names=['md5'], threads=None):
+    '''
+    Function to return a dict of {digest_name: hex_digest} dicts keyed by file path, hashing files concurrently.
+    N.B: hashlib releases the GIL while hashing large buffers, so threads hash on separate cores
+    '''
+    if not file_list:
+        return {}
+
+    pool = ThreadPool(min(threads or multiprocessing.cpu_count(), len(file_list)))
+    try:
+        digest_dicts = pool.map(lambda file_path: get_file_digests(file_path, digest_names), file_list)
+    finally:
+        pool.close()
+        pool.join()
+
+    return dict(zip(file_list, digest_dicts))
+
+
+def write_json_metadata(uuid, dataset_folder, excluded_extensions=[], extra_metadata=None, fast_digest=False):
     '''
     Function to write UUID, file_paths and current timestamp to .metadata.json
+    Parameter:
+        extra_metadata: Optional dict of additional top-level entries (e.g. compression details)
+        fast_digest: Boolean flag indicating whether a FAST_DIGEST_NAME digest should be stored alongside
+            the MD5 checksum of each file. Requires the xxhash module
     '''
     assert uuid, 'UUID not set'
 
@@ -32,22 +99,20 @@ def write_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
                  if os.path.splitext(file_path)[1] not in excluded_extensions
                  and os.path.isfile(file_path)]
 
-    md5_output = subprocess.check_output(['md5sum'] + file_list)
-    md5_dict = {re.search('^(\w+)\s+(.+)$', line).groups()[1]:
-                re.search('^(\w+)\s+(.+)$', line).groups()[0]
-                for line in md5_output.split('\n') if line.strip()
-                }
+    digest_dict = get_digest_dict(file_list, ['md5', FAST_DIGEST_NAME] if fast_digest else ['md5'])
 
     metadata_dict = {'uuid': uuid,
                      'time': get_iso_utcnow(),
                      'folder_path': dataset_folder,
-                     'files': [{'file': os.path.basename(filename),
-                                'md5': md5_dict[filename],
-                                'mtime': get_utc_mtime(filename).isoformat()
-                                }
-                               for filename in sorted(md5_dict.keys())
+                     'files': [dict(digest_dict[filename],
+                                    file=os.path.basename(filename),
+                                    mtime=get_utc_mtime(filename).isoformat()
+                                    )
+                               for filename in sorted(digest_dict.keys())
                                ]
                      }
+    if extra_metadata:
+        metadata_dict.update(extra_metadata)
 
     json_output_file = open(json_metadata_path, 'w')
     json.dump(metadata_dict, json_output_file, indent=4)
@@ -55,6 +120,46 @@ def write_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
     logger.info('Finished writing metadata file %s', json_metadata_path)
 
 
+def update_json_metadata_files(dataset_folder, file_paths, extra_metadata=None, fast_digest=False):
+    '''
+    Function to update the checksums and modification times of specific files in an existing .metadata.json
+    (e.g. after a file has been rewritten) without recomputing checksums for the whole folder.
+    FAST_DIGEST_NAME digests are also updated if the existing entries have them
+    Parameter:
+        extra_metadata: Optional dict of top-level entries to update (e.g. compression details)
+        fast_digest: Boolean flag indicating whether FAST_DIGEST_NAME digests should be recorded for the
+            updated files even if the existing entries do not have them. Requires the xxhash module
+    '''
+    metadata_dict = read_json_metadata(dataset_folder)
+    dataset_folder = os.path.abspath(dataset_folder)
+
+    digest_names = ['md5']
+    if fast_digest or [file_dict for file_dict in metadata_dict['files'] if FAST_DIGEST_NAME in file_dict]:
+        digest_names.append(FAST_DIGEST_NAME)
+    digest_dict = {os.path.basename(file_path): file_digest_dict
+                   for file_path, file_digest_dict in get_digest_dict([os.path.abspath(file_path)
+                                                                      for file_path in file_paths],
+                                                                     digest_names).items()}
+
+    file_dict_list = [file_dict for file_dict in metadata_dict['files']
+                      if file_dict['file'] not in digest_dict]
+    file_dict_list += [dict(file_digest_dict,
+                            file=filename,
+                            mtime=get_utc_mtime(os.path.join(dataset_folder, filename)).isoformat()
+                            )
+                       for filename, file_digest_dict in digest_dict.items()]
+    metadata_dict['files'] = sorted(file_dict_list, key=lambda file_dict: file_dict['file'])
+    metadata_dict['time'] = get_iso_utcnow()
+    if extra_metadata:
+        metadata_dict.update(extra_metadata)
+
+    json_metadata_path = os.path.join(dataset_folder, '.metadata.json')
+    json_output_file = open(json_metadata_path, 'w')
+    json.dump(metadata_dict, json_output_file, indent=4)
+    json_output_file.close()
+    logger.info('Updated %d file entries in metadata file %s', len(digest_dict), json_metadata_path)
+
+
 def read_json_metadata(dataset_folder):
     '''
     Function to read metadata_dict from .metadata.json
@@ -75,6 +180,7 @@ def read_json_metadata(dataset_folder):
 def check_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
     '''
     Function to check UUID, file_paths MD5 checksums from .metadata.json
+    FAST_DIGEST_NAME digests are checked instead of MD5 checksums if every file has one and xxhash is available
     '''
     assert uuid, 'UUID not set'
     
@@ -94,14 +200,16 @@ def check_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
                  if os.path.splitext(file_path)[1] not in excluded_extensions
                  and os.path.isfile(file_path)]
 
-    md5_output = subprocess.check_output(['md5sum'] + file_list)
-    calculated_md5_dict = {os.path.basename(re.search('^(\w+)\s+(.+)$', line).groups()[1]):
-                           re.search('^(\w+)\s+(.+)$', line).groups()[0]
-                           for line in md5_output.split('\n') if line.strip()
+    digest_name = 'md5'
+    if xxhash and not [file_dict for file_dict in metadata_dict['files'] if FAST_DIGEST_NAME not in file_dict]:
+        digest_name = FAST_DIGEST_NAME
+
+    calculated_md5_dict = {os.path.basename(file_path): file_digest_dict[digest_name]
+                           for file_path, file_digest_dict in get_digest_dict(file_list, [digest_name]).items()
                            }
 
     saved_md5_dict = {file_dict['file']:
-                      file_dict['md5']
+                      file_dict[digest_name]
                       for file_dict in metadata_dict['files']
                       }
 
@@ -118,8 +226,8 @@ def check_json_metadata(uuid, dataset_folder, excluded_extensions=[]):
                     'File %s does not exist' % saved_filename)
         else:
             if saved_md5sum != calculated_md5sum:
-                report_list.append('MD5 Checksum for file %s has changed from %s to %s' % (
-                    saved_filename, saved_md5sum, calculated_md5sum))
+                report_list.append('%s Checksum for file %s has changed from %s to %s' % (
+                    digest_name.upper(), saved_filename, saved_md5sum, calculated_md5sum))
 
     if report_list:
         raise Exception('\n'.join(report_list))
@@ -0,0 +1,40 @@
+'''
+Created on 16/10/2026
+
+Quick and dirty benchmark comparing GDAL ReadAsArray against memory-mapped raw access for an ERS grid
+Usage: python benchmark_ers_readers.py <ers_path> [<block_rows>]
+'''
+import sys
+import time
+import numpy as np
+from geophys2netcdf import open_grid_reader
+
+
+def time_reader(ers_path, reader, block_rows):
+    '''
+    Function to read every row-block of band 1 and return (elapsed seconds, checksum)
+    Checksum is summed in float64 so that both readers should give identical results
+    '''
+    start_time = time.time()
+    grid_reader = open_grid_reader(ers_path, reader)
+    checksum = 0.0
+    for row_start in range(0, grid_reader.nrows, block_rows):
+        row_end = min(row_start + block_rows, grid_reader.nrows)
+        checksum += np.sum(grid_reader.read_window(1, row_start, row_end), dtype='float64')
+    return time.time() - start_time, checksum, grid_reader
+
+
+def main():
+    assert len(sys.argv) in [2, 3], 'Usage: %s <ers_path> [<block_rows>]' % sys.argv[0]
+    ers_path = sys.argv[1]
+    block_rows = int(sys.argv[2]) if len(sys.argv) == 3 else 128
+
+    for reader in ['gdal', 'memmap']:
+        elapsed, checksum, grid_reader = time_reader(ers_path, reader, block_rows)
+        megabytes = (grid_reader.nrows * grid_reader.ncols *
+                     grid_reader.get_band_dtype(1).itemsize / 1000000.0)
+        print '%s: %.3fs (%.1f MB/s), checksum = %r' % (reader, elapsed, megabytes / elapsed, checksum)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
+import os
+import re
 from distutils.core import setup
 
-version = '0.0.0'
+# Version is defined only in geophys2netcdf/__init__.py
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geophys2netcdf', '__init__.py')) as init_file:
+    version = re.search(r"^__version__ = '([^']+)'", init_file.read(), re.MULTILINE).group(1)
 
 setup(name='geophys2netcdf',
       version=version,
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Synthetic grid test fixtures
+Created on 16/10/2026
+
+Functions to create small synthetic grids as raw ERS datasets (.ers header and BIL data file) for unit tests.
+Grids are geographic (WGS84) with a smooth surface plus noise inside an ellipse, and nodata outside it, so that
+edge chunks, all-nodata chunks and footprints are all exercised.
+'''
+import os
+import numpy as np
+
+NODATA_VALUE = -99999.0
+CELL_SIZE = 0.01
+ORIGIN = (140.0, -30.0)  # Longitude and latitude of UL corner of UL cell
+DEFAULT_SHAPE = (45, 70)  # Not a multiple of any chunk size used in tests
+
+# Map of numpy dtype name to ERS CellType
+CELL_TYPE_MAP = {'uint8': 'Unsigned8BitInteger',
+                 'int8': 'Signed8BitInteger',
+                 'uint16': 'Unsigned16BitInteger',
+                 'int16': 'Signed16BitInteger',
+                 'uint32': 'Unsigned32BitInteger',
+                 'int32': 'Signed32BitInteger',
+                 'float32': 'IEEE4ByteReal',
+                 'float64': 'IEEE8ByteReal',
+                 }
+
+ERS_HEADER_TEMPLATE = '''DatasetHeader Begin
+	Version		= "7.0"
+	DataSetType	= ERStorage
+	DataType	= Raster
+	ByteOrder	= %(byte_order)s
+	CoordinateSpace Begin
+		Datum		= "WGS84"
+		Projection	= "GEODETIC"
+		CoordinateType	= LATLONG
+		Rotation	= 0:0:0.0
+	CoordinateSpace End
+	RasterInfo Begin
+		CellType	= %(cell_type)s
+%(null_cell_value)s		CellInfo Begin
+			Xdimension	= %(cell_size)r
+			Ydimension	= %(cell_size)r
+		CellInfo End
+		NrOfLines	= %(nrows)d
+		NrOfCellsPerLine	= %(ncols)d
+		RegistrationCoord Begin
+			Longitude	= %(longitude)s
+			Latitude	= %(latitude)s
+		RegistrationCoord End
+		NrOfBands	= %(band_count)d
+%(band_ids)s	RasterInfo End
+DatasetHeader End
+'''
+
+
+def make_test_array(shape=None, seed=0, dtype='float32', nodata_value=NODATA_VALUE):
+    '''
+    Function to return a synthetic 2D grid with nodata_value outside an ellipse inscribed in the grid
+    '''
+    shape = shape or DEFAULT_SHAPE
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    array = (100.0 * np.sin(cols / 7.0) + 50.0 * np.cos(rows / 5.0) +
+             np.random.RandomState(seed).normal(0.0, 3.0, shape))
+    outside_mask = (((rows - shape[0] / 2.0) / (shape[0] * 0.45)) ** 2 +
+                    ((cols - shape[1] / 2.0) / (shape[1] * 0.4)) ** 2) > 1.0
+    array[outside_mask] = nodata_value
+    return array.astype(dtype)
+
+
+def format_dms(degrees):
+    '''
+    Function to return an angle in decimal degrees as an ERS degrees:minutes:seconds string
+    '''
+    sign = '-' if degrees < 0 else ''
+    seconds = round(abs(degrees) * 3600.0, 6)
+    return '%s%d:%02d:%09.6f' % (sign, seconds // 3600, (seconds % 3600) // 60, seconds % 60)
+
+
+def get_coordinate_values(shape):
+    '''
+    Function to return (latitudes, longitudes) of the pixel centres of a synthetic grid, UL first
+    '''
+    return (ORIGIN[1] - (np.arange(shape[0]) + 0.5) * CELL_SIZE,
+            ORIGIN[0] + (np.arange(shape[1]) + 0.5) * CELL_SIZE)
+
+
+def write_ers_grid(ers_path, band_arrays, nodata_value=NODATA_VALUE, byte_order='MSBFirst', band_names=None):
+    '''
+    Function to write a list of equally shaped 2D arrays (or a single 2D array) as a raw ERS dataset
+    consisting of ers_path and a band-interleaved-by-line data file with the same name and no extension
+    Returns:
+        ers_path
+    '''
+    if isinstance(band_arrays, np.ndarray):
+        band_arrays = [band_arrays]
+    band_names = band_names or [None] * len(band_arrays)
+    dtype = band_arrays[0].dtype
+    nrows, ncols = band_arrays[0].shape
+
+    header_file = open(ers_path, 'w')
+    try:
+        header_file.write(ERS_HEADER_TEMPLATE % {
+            'byte_order': byte_order,
+            'cell_type': CELL_TYPE_MAP[dtype.name],
+            'null_cell_value': '\t\tNullCellValue	= %r\n' % nodata_value if nodata_value is not None else '',
+            'cell_size': CELL_SIZE,
+            'nrows': nrows,
+            'ncols': ncols,
+            'longitude': format_dms(ORIGIN[0]),
+            'latitude': format_dms(ORIGIN[1]),
+            'band_count': len(band_arrays),
+            'band_ids': ''.join(['\t\tBandId Begin\n\t\t\tValue	= "%s"\n\t\tBandId End\n' % (band_name or '')
+                                 for band_name in band_names]) if any(band_names) else '',
+        })
+    finally:
+        header_file.close()
+
+    # Band-interleaved by line, i.e. (rows, bands, cols)
+    file_dtype = dtype.newbyteorder({'MSBFirst': '>', 'LSBFirst': '<'}[byte_order])
+    np.stack(band_arrays, axis=1).astype(file_dtype).tofile(os.path.splitext(ers_path)[0])
+    return ers_path
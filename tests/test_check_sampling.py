@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Sample mode unit tests for utils/check_netcdf_vs_ers.py
+Created on 16/10/2026
+
+Checks boundary/interior tile selection and the detection confidence reported in sample mode.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import imp
+import random
+import unittest
+
+check_netcdf_vs_ers = imp.load_source('check_netcdf_vs_ers',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   '..', 'utils', 'check_netcdf_vs_ers.py'))
+
+
+class TestSelectSampleTiles(unittest.TestCase):
+    '''
+    Unit tests for select_sample_tiles
+    '''
+
+    def setUp(self):
+        # Single-chunk tiles, as used in sample mode: 10 x 8 chunks with partial chunks on the last row and column
+        self.shape = (1000, 750)
+        self.tiles = check_netcdf_vs_ers.get_tile_windows(self.shape, (100, 100), 4, 100 * 100 * 4)
+
+    def test_boundary_and_interior_counts(self):
+        self.assertEqual(len(self.tiles), 80)
+        sample_tiles, boundary_count, interior_count = check_netcdf_vs_ers.select_sample_tiles(
+            self.tiles, self.shape, 0.1, random.Random(0))
+        self.assertEqual(boundary_count, 2 * 10 + 2 * 8 - 4)
+        self.assertEqual(interior_count, 80 - boundary_count)
+        self.assertEqual(len(sample_tiles), boundary_count + 5)  # ceil(0.1 * 48)
+
+    def test_all_boundary_tiles_included(self):
+        sample_tiles = check_netcdf_vs_ers.select_sample_tiles(self.tiles, self.shape, 0.1, random.Random(0))[0]
+        nrows, ncols = self.shape
+        boundary_tiles = [tile for tile in self.tiles
+                          if tile[0] == 0 or tile[2] == 0 or tile[1] == nrows or tile[3] == ncols]
+        self.assertTrue(set(boundary_tiles) <= set(sample_tiles))
+        self.assertEqual(sample_tiles, sorted(sample_tiles, key=self.tiles.index))
+
+    def test_seed_is_repeatable(self):
+        sample_tiles1 = check_netcdf_vs_ers.select_sample_tiles(self.tiles, self.shape, 0.2, random.Random(42))[0]
+        sample_tiles2 = check_netcdf_vs_ers.select_sample_tiles(self.tiles, self.shape, 0.2, random.Random(42))[0]
+        self.assertEqual(sample_tiles1, sample_tiles2)
+
+    def test_fraction_limits(self):
+        self.assertEqual(check_netcdf_vs_ers.select_sample_tiles(self.tiles, self.shape, 1.0)[0], self.tiles)
+        # At least one interior tile is sampled for any positive fraction
+        self.assertEqual(len(check_netcdf_vs_ers.select_sample_tiles(self.tiles, self.shape, 1.0e-6)[0]), 33)
+
+    def test_tile_bytes_rejected(self):
+        # Sampled tiles are always single chunks
+        self.assertRaises(AssertionError, check_netcdf_vs_ers.ERS2NetCDFChecker,
+                          tile_bytes=1048576, sample_fraction=0.01)
+
+
+class TestDetectionConfidence(unittest.TestCase):
+    '''
+    Unit tests for get_detection_confidence
+    '''
+
+    def test_hypergeometric(self):
+        # P(miss) = C(8, 3) / C(10, 3) = 56 / 120
+        self.assertAlmostEqual(check_netcdf_vs_ers.get_detection_confidence(10, 3, 2), 1.0 - 56.0 / 120.0)
+        self.assertAlmostEqual(check_netcdf_vs_ers.get_detection_confidence(100, 1, 1), 0.01)
+
+    def test_limits(self):
+        self.assertEqual(check_netcdf_vs_ers.get_detection_confidence(100, 50, 0), 0.0)
+        self.assertEqual(check_netcdf_vs_ers.get_detection_confidence(100, 0, 10), 0.0)
+        self.assertEqual(check_netcdf_vs_ers.get_detection_confidence(100, 91, 10), 1.0)
+        self.assertEqual(check_netcdf_vs_ers.get_detection_confidence(100, 100, 1), 1.0)
+
+    def test_increases_with_sample_size(self):
+        confidences = [check_netcdf_vs_ers.get_detection_confidence(1000, sample_count, 10)
+                       for sample_count in range(0, 1001, 50)]
+        self.assertEqual(confidences, sorted(confidences))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Tile comparison unit tests for utils/check_netcdf_vs_ers.py
+Created on 16/10/2026
+
+Checks chunk-aligned tile selection, merging of tile reductions, bitwise tile matching, and tile comparisons between
+a synthetic ERS grid and its NetCDF conversion, with and without skipping unallocated chunks, and with the ERS grid
+read in place from stored and deflated zip archives.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import imp
+import shutil
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from geophys2netcdf._grid_reader import make_vsizip_path
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE
+
+check_netcdf_vs_ers = imp.load_source('check_netcdf_vs_ers',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   '..', 'utils', 'check_netcdf_vs_ers.py'))
+
+
+class TestTileReductions(unittest.TestCase):
+    '''
+    Unit tests for tile windows and reductions
+    '''
+
+    def test_tile_windows(self):
+        # Whole rows of chunks fit in a tile
+        self.assertEqual(check_netcdf_vs_ers.get_tile_windows((45, 70), (16, 16), 4, 16 * 70 * 4 * 2),
+                         [(0, 32, 0, 70), (32, 45, 0, 70)])
+        # A single row of chunks exceeds a tile, so tiles are split into columns of chunks
+        self.assertEqual(check_netcdf_vs_ers.get_tile_windows((45, 70), (16, 16), 4, 16 * 40 * 4),
+                         [(row_start, min(row_start + 16, 45), col_start, min(col_start + 32, 70))
+                          for row_start in range(0, 45, 16) for col_start in range(0, 70, 32)])
+        # Tiles are never smaller than one chunk
+        self.assertEqual(len(check_netcdf_vs_ers.get_tile_windows((45, 70), (16, 16), 4, 1)), 15)
+
+    def test_merged_reductions(self):
+        array = make_test_array()
+        array[10, 30] = np.nan
+        band_reduction = None
+        for row_start, row_end, col_start, col_end in check_netcdf_vs_ers.get_tile_windows(array.shape, (16, 16),
+                                                                                          4, 16 * 16 * 4):
+            tile_array = array[row_start:row_end, col_start:col_end]
+            band_reduction = check_netcdf_vs_ers.merge_tile_reductions(
+                band_reduction, check_netcdf_vs_ers.compare_tile_arrays(tile_array, tile_array))
+
+        values = array[~np.isnan(array)].astype(np.float64)
+        min_value, max_value, mean_value = check_netcdf_vs_ers.get_reduction_values(band_reduction['nc'])
+        self.assertEqual((min_value, max_value), (values.min(), values.max()))
+        self.assertAlmostEqual(mean_value, values.mean(), places=6)
+        self.assertEqual(band_reduction['nc'], band_reduction['ers'])
+        self.assertEqual(band_reduction['max_absolute_difference'], 0.0)
+        self.assertEqual(band_reduction['percentage_difference'][1], 0.0)
+
+    def test_differences(self):
+        ers_array = np.array([[1.0, 2.0], [4.0, np.nan]], dtype='float32')
+        nc_array = np.array([[1.0, 2.5], [3.0, np.nan]], dtype='float32')
+        tile_reduction = check_netcdf_vs_ers.compare_tile_arrays(nc_array, ers_array)
+        self.assertEqual(tile_reduction['max_absolute_difference'], 1.0)
+        self.assertEqual(tile_reduction['percentage_difference'][:2], (0.0, 25.0))
+
+        # Integer tiles are compared without wrap-around
+        tile_reduction = check_netcdf_vs_ers.compare_tile_arrays(np.array([0], dtype='uint16'),
+                                                                 np.array([65535], dtype='uint16'))
+        self.assertEqual(tile_reduction['max_absolute_difference'], 65535.0)
+
+        self.assertEqual(check_netcdf_vs_ers.reduce_array(np.array([np.nan])), (None, None, 0.0, 0))
+
+    def test_bitwise_equal(self):
+        array = make_test_array()
+        array[10, 30] = np.nan
+        # Byte order does not matter, and NaN cells with identical bit patterns match
+        self.assertTrue(check_netcdf_vs_ers.is_bitwise_equal(array, array.astype('>f4')))
+        self.assertFalse(check_netcdf_vs_ers.is_bitwise_equal(array, array.astype('float64')))
+        self.assertFalse(check_netcdf_vs_ers.is_bitwise_equal(array, array[:-1]))
+        self.assertFalse(check_netcdf_vs_ers.is_bitwise_equal(np.array([0.0]), np.array([-0.0])))
+
+        changed_array = array.copy()
+        changed_array[20, 30] = np.nextafter(changed_array[20, 30], np.float32(np.inf))
+        self.assertFalse(check_netcdf_vs_ers.is_bitwise_equal(array, changed_array))
+
+    def test_bitwise_reductions(self):
+        array = make_test_array()
+        array[10, 30] = np.nan
+        bitwise_reduction = check_netcdf_vs_ers.compare_tile_arrays(array, array.astype('>f4'))
+        full_reduction = check_netcdf_vs_ers.compare_tile_arrays(array, array.astype('>f4'), bitwise=False)
+        self.assertEqual((bitwise_reduction['identical_tile_count'], full_reduction['identical_tile_count']), (1, 0))
+        for key in ['nc', 'ers', 'percentage_difference', 'max_absolute_difference']:
+            self.assertEqual(bitwise_reduction[key], full_reduction[key])
+
+        band_reduction = check_netcdf_vs_ers.merge_tile_reductions(bitwise_reduction, full_reduction)
+        self.assertEqual((band_reduction['identical_tile_count'], band_reduction['tile_count']), (1, 2))
+
+
+class TestCompareTiles(unittest.TestCase):
+    '''
+    Unit tests for tile comparisons between an ERS grid and its NetCDF conversion
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+        self.ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), [self.array])
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        NetCDFGridWriter(self.ers_path, self.nc_path, chunk_size=16).write()
+
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            lat_values = netcdf_dataset.variables['lat'][:]
+            self.y_inverted = bool(lat_values[-1] < lat_values[0])
+        finally:
+            netcdf_dataset.close()
+
+        check_netcdf_vs_ers._init_tile_worker(self.ers_path, self.nc_path, 'memmap')
+
+    def tearDown(self):
+        check_netcdf_vs_ers._close_tile_worker()
+        shutil.rmtree(self.temp_dir)
+
+    def make_zip(self, compress_type):
+        '''
+        Function to return the path of a zip archive holding the ERS grid in a subdirectory
+        '''
+        zip_path = os.path.join(self.temp_dir, 'grid_%d.zip' % compress_type)
+        zip_file = zipfile.ZipFile(zip_path, 'w', compress_type)
+        zip_file.writestr('readme.txt', 'Member preceding the grid, so that its data is not at the start')
+        zip_file.write(self.ers_path, 'survey/grid.ers')
+        zip_file.write(os.path.splitext(self.ers_path)[0], 'survey/grid')
+        zip_file.close()
+        return zip_path
+
+    def compare_band(self, allocated_chunks=None, bitwise=True):
+        '''
+        Function to return the merged reductions for Band1, optionally reading only allocated_chunks.
+        Tiles are compared in ERS row order
+        '''
+        band_reduction = None
+        tiles = check_netcdf_vs_ers.get_tile_windows(self.array.shape, (16, 16), 4, 16 * 70 * 4)
+        if not self.y_inverted:
+            tiles.reverse()
+        for tile in tiles:
+            allocated_windows = (check_netcdf_vs_ers.get_chunk_windows((16, 16), allocated_chunks, *tile)
+                                 if allocated_chunks is not None else None)
+            band_reduction = check_netcdf_vs_ers.merge_tile_reductions(
+                band_reduction, check_netcdf_vs_ers._compare_tile((1, 'Band1', self.y_inverted, NODATA_VALUE,
+                                                                   False, tile, allocated_windows, bitwise)))
+        return band_reduction
+
+    def test_compare_tiles(self):
+        band_reduction = self.compare_band()
+        self.assertEqual(band_reduction['nc'], band_reduction['ers'])
+        self.assertEqual(band_reduction['nc'][3], self.array.size)
+        self.assertEqual(band_reduction['max_absolute_difference'], 0.0)
+        self.assertEqual(band_reduction['identical_tile_count'], band_reduction['tile_count'])
+
+        full_reduction = self.compare_band(bitwise=False)
+        self.assertEqual(full_reduction['identical_tile_count'], 0)
+        for key in ['nc', 'ers', 'percentage_difference', 'max_absolute_difference', 'tile_count']:
+            self.assertEqual(full_reduction[key], band_reduction[key])
+
+    def test_unallocated_chunks(self):
+        # Chunks which are entirely nodata are filled with _FillValue instead of being read
+        nc_array = self.array if self.y_inverted else np.flipud(self.array)
+        allocated_chunks = set([(row, col) for row in range(0, 45, 16) for col in range(0, 70, 16)
+                                if not np.all(nc_array[row:row + 16, col:col + 16] == NODATA_VALUE)])
+        self.assertTrue(len(allocated_chunks) < 15)
+        self.assertEqual(self.compare_band(allocated_chunks), self.compare_band())
+
+    def test_zip_sources(self):
+        expected_reduction = self.compare_band()
+        for compress_type in [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]:
+            check_netcdf_vs_ers._close_tile_worker()
+            check_netcdf_vs_ers._init_tile_worker(make_vsizip_path(self.make_zip(compress_type), 'survey/grid.ers'),
+                                                  self.nc_path, 'memmap')
+            self.assertEqual(self.compare_band(), expected_reduction)
+
+    def test_check_zip_directory(self):
+        dataset_dir = os.path.join(self.temp_dir, 'dataset')
+        os.mkdir(dataset_dir)
+        os.rename(self.make_zip(zipfile.ZIP_DEFLATED), os.path.join(dataset_dir, 'grid.zip'))
+        shutil.copy(self.nc_path, dataset_dir)
+
+        # The ERS member is checked in place through a /vsizip/ path, without extracting the archive
+        compared_paths = []
+        checker = check_netcdf_vs_ers.ERS2NetCDFChecker(processes=1)
+        checker.compare_ERS2NetCDF = lambda ers_path, nc_path: compared_paths.append((ers_path, nc_path))
+        checker.check_ERS2NetCDF(dataset_dir)
+        self.assertEqual(compared_paths, [(make_vsizip_path(os.path.join(dataset_dir, 'grid.zip'), 'survey/grid.ers'),
+                                           os.path.join(dataset_dir, 'grid.nc'))])
+        self.assertEqual(sorted(os.listdir(dataset_dir)), ['grid.nc', 'grid.zip'])
+
+        # Ambiguous directories are reported with the files found
+        shutil.copy(os.path.join(dataset_dir, 'grid.zip'), os.path.join(dataset_dir, 'copy.zip'))
+        with self.assertRaises(AssertionError) as context:
+            checker.check_ERS2NetCDF(dataset_dir)
+        self.assertTrue(context.exception.message.startswith('Unable to find single zip file'))
+        self.assertTrue(os.path.join(dataset_dir, 'copy.zip') in context.exception.message)
+
+
+if __name__ == '__main__':
+    unittest.main()
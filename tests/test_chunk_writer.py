@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+DirectChunkWriter unit tests
+Created on 16/10/2026
+
+Checks that chunks compressed in a process pool and written with HDF5 direct chunk writes are byte-for-byte
+identical to the chunks written through the netCDF4 library's filter pipeline.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._chunk_writer import DirectChunkWriter, can_write_direct
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+def read_raw_chunks(nc_path, variable_name):
+    '''
+    Function to return a dict of (filter_mask, compressed bytes) tuples keyed by chunk origin for the allocated
+    chunks of a variable
+    '''
+    h5_file = h5py.File(nc_path, 'r')
+    try:
+        dataset = h5_file[variable_name]
+        raw_chunks = {}
+        for row in range(0, dataset.shape[0], dataset.chunks[0]):
+            for col in range(0, dataset.shape[1], dataset.chunks[1]):
+                try:
+                    raw_chunks[(row, col)] = dataset.id.read_direct_chunk((row, col))
+                except RuntimeError:  # Chunk storage not allocated
+                    continue
+        return raw_chunks
+    finally:
+        h5_file.close()
+
+
+@unittest.skipUnless(h5py and hasattr(h5py.h5d.DatasetID, 'read_direct_chunk'), 'h5py 2.10 or later not installed')
+class TestDirectChunkWriter(unittest.TestCase):
+    '''
+    Unit tests for DirectChunkWriter
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_netcdf(self, nc_path, codec_kwargs, array=None):
+        '''
+        Function to create a NetCDF file with a single chunked variable, optionally writing data through netCDF4
+        '''
+        netcdf_dataset = netCDF4.Dataset(nc_path, 'w', format='NETCDF4_CLASSIC')
+        netcdf_dataset.createDimension('lat', self.array.shape[0])
+        netcdf_dataset.createDimension('lon', self.array.shape[1])
+        variable = netcdf_dataset.createVariable('Band1', 'f4', ('lat', 'lon'), chunksizes=(16, 16),
+                                                 fill_value=NODATA_VALUE, **codec_kwargs)
+        if array is not None:
+            variable[:] = array
+        netcdf_dataset.close()
+
+    def test_chunks_match_netcdf4(self):
+        for codec, codec_kwargs in [('deflate:4+shuffle', {'zlib': True, 'complevel': 4, 'shuffle': True}),
+                                    ('deflate:1', {'zlib': True, 'complevel': 1, 'shuffle': False}),
+                                    ('none', {})]:
+            self.assertTrue(can_write_direct(codec))
+            netcdf4_path = os.path.join(self.temp_dir, 'netcdf4.nc')
+            self.create_netcdf(netcdf4_path, codec_kwargs, self.array)
+            expected_chunks = read_raw_chunks(netcdf4_path, 'Band1')
+
+            for processes, skip_fill_chunks in [(1, False), (2, False), (2, True)]:
+                direct_path = os.path.join(self.temp_dir, 'direct_%d_%s.nc' % (processes, skip_fill_chunks))
+                self.create_netcdf(direct_path, codec_kwargs)
+                chunk_writer = DirectChunkWriter(direct_path, codec, processes, skip_fill_chunks=skip_fill_chunks)
+                try:
+                    # Chunk-aligned blocks of full rows, with a partial block at the end
+                    for row_start, row_end in [(0, 32), (32, 45)]:
+                        chunk_writer.write_rows([('Band1', self.array[row_start:row_end])], row_start)
+                finally:
+                    chunk_writer.close()
+
+                direct_chunks = read_raw_chunks(direct_path, 'Band1')
+                if skip_fill_chunks:
+                    # Only chunks which are entirely fill value are left unallocated
+                    skipped_chunks = set(expected_chunks) - set(direct_chunks)
+                    self.assertTrue(skipped_chunks)
+                    for row, col in skipped_chunks:
+                        self.assertTrue(np.all(self.array[row:row + 16, col:col + 16] == NODATA_VALUE))
+                    expected_chunks = dict([(chunk_origin, expected_chunks[chunk_origin])
+                                            for chunk_origin in direct_chunks])
+                self.assertEqual(direct_chunks, expected_chunks)
+                netcdf_dataset = netCDF4.Dataset(direct_path)
+                try:
+                    netcdf_dataset.set_auto_maskandscale(False)
+                    np.testing.assert_array_equal(netcdf_dataset.variables['Band1'][:], self.array)
+                finally:
+                    netcdf_dataset.close()
+
+    def test_invalid_writes(self):
+        nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        self.create_netcdf(nc_path, {'zlib': True, 'complevel': 4, 'shuffle': True})
+        chunk_writer = DirectChunkWriter(nc_path, 'deflate:4', 1)
+        try:
+            # Codec must match the filters of the variable
+            self.assertRaises(AssertionError, chunk_writer.write_rows, [('Band1', self.array[0:16])], 0)
+        finally:
+            chunk_writer.close()
+
+        chunk_writer = DirectChunkWriter(nc_path, 'deflate:4+shuffle', 1)
+        try:
+            # Blocks must start on a chunk boundary
+            self.assertRaises(AssertionError, chunk_writer.write_rows, [('Band1', self.array[8:24])], 8)
+        finally:
+            chunk_writer.close()
+
+    def test_writer_compress_processes(self):
+        ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'),
+                                  [self.array, make_test_array(seed=1)])
+        raw_chunks = []
+        for compress_processes in [None, 2]:
+            nc_path = os.path.join(self.temp_dir, 'grid_%s.nc' % compress_processes)
+            NetCDFGridWriter(ers_path, nc_path, chunk_size=16, codec='deflate:4+shuffle', overview_levels=1,
+                             compress_processes=compress_processes).write()
+            raw_chunks.append([read_raw_chunks(nc_path, variable_name)
+                               for variable_name in ['Band1', 'Band2', 'Band1_ovr2', 'Band2_ovr2']])
+        self.assertEqual(raw_chunks[1], raw_chunks[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
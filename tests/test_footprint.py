@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+FootprintAccumulator unit tests
+Created on 16/10/2026
+
+Checks streamed convex hull footprints against a brute-force convex hull of every valid cell, the footprint
+attribute written by NetCDFGridWriter, and footprints computed from existing files in chunk-aligned blocks.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import numpy as np
+import netCDF4
+from scipy.spatial import ConvexHull
+
+import geophys2netcdf._footprint as footprint
+from geophys2netcdf._footprint import FootprintAccumulator, get_dataset_footprint, polygon_to_wkt, wkt_to_polygon, \
+    get_footprint_tasks, compute_file_footprint, FOOTPRINT_ATTRIBUTE
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from geophys2netcdf._ers2netcdf import ERS2NetCDF
+from synthetic_grid import make_test_array, write_ers_grid, get_coordinate_values, NODATA_VALUE, CELL_SIZE
+
+
+def get_brute_force_hull(valid_mask):
+    '''
+    Function to return the set of (row, col) vertices of the convex hull of all valid cells
+    '''
+    points = np.argwhere(valid_mask)
+    return set([tuple(point) for point in points[ConvexHull(points.astype(np.float64)).vertices]])
+
+
+class TestFootprintAccumulator(unittest.TestCase):
+    '''
+    Unit tests for FootprintAccumulator
+    '''
+
+    def setUp(self):
+        self.valid_mask = make_test_array() != NODATA_VALUE
+        self.valid_mask[30:, 50:] = False  # Make hull asymmetric
+        self.valid_mask[5, 12] = True  # Isolated valid cell outside the ellipse
+
+    def get_hull(self, footprint_accumulator):
+        return set([tuple(point) for point in footprint.get_hull_points(footprint_accumulator.points)])
+
+    def test_row_blocks(self):
+        footprint_accumulator = FootprintAccumulator()
+        for row_start in range(0, 45, 16):
+            footprint_accumulator.update(self.valid_mask[row_start:row_start + 16], row_offset=row_start)
+        self.assertEqual(self.get_hull(footprint_accumulator), get_brute_force_hull(self.valid_mask))
+
+    def test_merged_tiles(self):
+        # Tiles are accumulated separately and merged, as for bands or tiles gathered in parallel
+        footprint_accumulator = FootprintAccumulator()
+        for row_start in range(0, 45, 16):
+            for col_start in range(0, 70, 16):
+                tile_accumulator = FootprintAccumulator()
+                tile_accumulator.update(self.valid_mask[row_start:row_start + 16, col_start:col_start + 16],
+                                        row_offset=row_start, col_offset=col_start)
+                footprint_accumulator.merge(tile_accumulator)
+        self.assertEqual(self.get_hull(footprint_accumulator), get_brute_force_hull(self.valid_mask))
+
+    def test_candidate_reduction(self):
+        max_candidate_points = footprint.MAX_CANDIDATE_POINTS
+        footprint.MAX_CANDIDATE_POINTS = 8
+        try:
+            footprint_accumulator = FootprintAccumulator()
+            for row_start in range(45):
+                footprint_accumulator.update(self.valid_mask[row_start:row_start + 1], row_offset=row_start)
+            # Candidates have been reduced to hull vertices rather than keeping both ends of every row
+            self.assertTrue(footprint_accumulator.points.shape[0] < 2 * self.valid_mask.any(axis=1).sum())
+        finally:
+            footprint.MAX_CANDIDATE_POINTS = max_candidate_points
+        self.assertEqual(self.get_hull(footprint_accumulator), get_brute_force_hull(self.valid_mask))
+
+    def test_polygon(self):
+        footprint_accumulator = FootprintAccumulator()
+        footprint_accumulator.update(self.valid_mask)
+        y_values, x_values = get_coordinate_values(self.valid_mask.shape)
+        polygon = footprint_accumulator.get_polygon(y_values, x_values)
+        self.assertEqual(polygon[0], polygon[-1])
+        self.assertEqual(set([(y_values[row], x_values[col]) for row, col in get_brute_force_hull(self.valid_mask)]),
+                         set([(y, x) for x, y in polygon]))
+        np.testing.assert_allclose(wkt_to_polygon(polygon_to_wkt(polygon)), polygon)
+
+    def test_degenerate(self):
+        valid_mask = np.zeros((10, 10), dtype=bool)
+        footprint_accumulator = FootprintAccumulator()
+        footprint_accumulator.update(valid_mask)
+        self.assertIsNone(footprint_accumulator.get_polygon(np.arange(10), np.arange(10)))
+
+        valid_mask[3, 2:8] = True  # A single row of cells does not enclose an area
+        footprint_accumulator.update(valid_mask)
+        self.assertIsNone(footprint_accumulator.get_polygon(np.arange(10), np.arange(10)))
+
+
+class TestDatasetFootprint(unittest.TestCase):
+    '''
+    Unit tests for footprints of NetCDF datasets
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+        ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), self.array)
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        NetCDFGridWriter(ers_path, self.nc_path, chunk_size=16).write()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_writer_footprint(self):
+        y_values, x_values = get_coordinate_values(self.array.shape)
+        expected_vertices = set([(x_values[col], y_values[row])
+                                 for row, col in get_brute_force_hull(self.array != NODATA_VALUE)])
+
+        netcdf_dataset = netCDF4.Dataset(self.nc_path, 'r+')
+        try:
+            polygon = wkt_to_polygon(getattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE))
+            self.assertEqual(len(polygon), len(expected_vertices) + 1)
+            for vertex, expected_vertex in zip(sorted(polygon[:-1]), sorted(expected_vertices)):
+                np.testing.assert_allclose(vertex, expected_vertex)
+
+            # Footprint is recomputed from the data if the attribute is missing
+            netcdf_dataset.delncattr(FOOTPRINT_ATTRIBUTE)
+            np.testing.assert_allclose(get_dataset_footprint(netcdf_dataset), polygon)
+            self.assertTrue(hasattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE))
+        finally:
+            netcdf_dataset.close()
+
+    def get_geospatial_bounds(self, nc_path):
+        '''
+        Function to return (geospatial_bounds polygon, [lon_min, lat_min, lon_max, lat_max]) set for a NetCDF file
+        '''
+        converter = ERS2NetCDF()
+        converter._netcdf_dataset = netCDF4.Dataset(nc_path, 'r+')
+        try:
+            converter.set_netcdf_metadata_attributes(to_crs=None)
+            return (wkt_to_polygon(converter.netcdf_dataset.geospatial_bounds),
+                    [getattr(converter.netcdf_dataset, 'geospatial_%s' % attribute_name)
+                     for attribute_name in ['lon_min', 'lat_min', 'lon_max', 'lat_max']])
+        finally:
+            converter.netcdf_dataset.close()
+
+    def test_geospatial_bounds(self):
+        # Bounds are the hull of the edges of all valid cells, as for the bounding box
+        y_values, x_values = get_coordinate_values(self.array.shape)
+        cell_corners = np.array([[x_values[col] + x_offset, y_values[row] + y_offset]
+                                 for row, col in np.argwhere(self.array != NODATA_VALUE)
+                                 for x_offset in [-CELL_SIZE / 2, CELL_SIZE / 2]
+                                 for y_offset in [-CELL_SIZE / 2, CELL_SIZE / 2]])
+        expected_vertices = cell_corners[ConvexHull(cell_corners).vertices]
+
+        polygon, bbox = self.get_geospatial_bounds(self.nc_path)
+        self.assertEqual(polygon[0], polygon[-1])
+        np.testing.assert_allclose(sorted(polygon[:-1]), sorted(expected_vertices.tolist()), atol=0.00005)
+        polygon = np.array(polygon)
+        self.assertTrue(np.all(polygon.min(axis=0) >= bbox[0:2]) and np.all(polygon.max(axis=0) <= bbox[2:4]))
+
+        # All-nodata grids fall back to the bounding box
+        nodata_nc_path = os.path.join(self.temp_dir, 'nodata.nc')
+        NetCDFGridWriter(write_ers_grid(os.path.join(self.temp_dir, 'nodata.ers'),
+                                        np.full(self.array.shape, NODATA_VALUE, dtype=self.array.dtype)),
+                         nodata_nc_path, chunk_size=16).write()
+        polygon, bbox = self.get_geospatial_bounds(nodata_nc_path)
+        np.testing.assert_allclose(sorted(polygon[:-1]), sorted([[bbox[0], bbox[1]], [bbox[0], bbox[3]],
+                                                                 [bbox[2], bbox[1]], [bbox[2], bbox[3]]]),
+                                   atol=0.00005)
+
+    def get_stored_footprint(self):
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            return wkt_to_polygon(getattr(netcdf_dataset, FOOTPRINT_ATTRIBUTE))
+        finally:
+            netcdf_dataset.close()
+
+    def test_footprint_tasks(self):
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            for block_bytes, block_count in [(None, 1), (4096, 6), (1024, 15)]:
+                coverage = np.zeros(self.array.shape, dtype=int)
+                task_list = get_footprint_tasks(netcdf_dataset, block_bytes)
+                self.assertEqual(len(task_list), block_count)
+                for variable_name, row_start, row_end, col_start, col_end in task_list:
+                    self.assertEqual(variable_name, 'Band1')
+                    self.assertEqual((row_start % 16, col_start % 16), (0, 0))  # Chunk-aligned
+                    coverage[row_start:row_end, col_start:col_end] += 1
+                self.assertTrue((coverage == 1).all())
+        finally:
+            netcdf_dataset.close()
+
+    def test_file_footprint(self):
+        stored_footprint = self.get_stored_footprint()
+        np.testing.assert_allclose(compute_file_footprint(self.nc_path), stored_footprint)
+
+        # Block hulls arrive in any order from a pool, so compare vertex sets
+        pool = multiprocessing.Pool(2)
+        try:
+            polygon = compute_file_footprint(self.nc_path, pool, block_bytes=1024)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(polygon[0], polygon[-1])
+        np.testing.assert_allclose(sorted(polygon[:-1]), sorted(stored_footprint[:-1]))
+
+    def test_main(self):
+        stored_footprint = self.get_stored_footprint()
+        netcdf_dataset = netCDF4.Dataset(self.nc_path, 'r+')
+        netcdf_dataset.delncattr(FOOTPRINT_ATTRIBUTE)
+        netcdf_dataset.close()
+
+        report_path = os.path.join(self.temp_dir, 'footprints.json')
+        footprint.main([self.nc_path, '--processes', '1', '--block-bytes', '2048', '--store', '--report', report_path])
+        np.testing.assert_allclose(self.get_stored_footprint(), stored_footprint)
+        report_file = open(report_path)
+        try:
+            self.assertEqual(json.load(report_file).keys(), [os.path.abspath(self.nc_path)])
+        finally:
+            report_file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
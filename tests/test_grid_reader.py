@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Grid reader unit tests
+Created on 16/10/2026
+
+Checks that the memory-mapped ERS reader returns the same windows, dtypes, nodata values and band names as the
+GDAL reader for synthetic ERS grids, and that ERS grids are read in place from stored and compressed zip archives.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._grid_reader import GDALGridReader, ERSRawReader, ERSZipStreamReader, open_grid_reader, \
+    make_vsizip_path, split_vsizip_path, grid_file_exists, get_zip_member_offset
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE
+
+
+class TestERSRawReader(unittest.TestCase):
+    '''
+    Unit tests for ERSRawReader
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.ers_path = os.path.join(self.temp_dir, 'grid.ers')
+        self.band_arrays = [make_test_array(seed=seed) for seed in range(3)]
+        write_ers_grid(self.ers_path, self.band_arrays, band_names=['TMI', None, 'Gravity'])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_gdal(self):
+        memmap_reader = open_grid_reader(self.ers_path, 'memmap')
+        gdal_reader = open_grid_reader(self.ers_path, 'gdal')
+        self.assertTrue(isinstance(memmap_reader, ERSRawReader))
+        self.assertEqual(memmap_reader.shape, gdal_reader.shape)
+        self.assertEqual(memmap_reader.band_count, 3)
+        self.assertEqual(memmap_reader.geotransform, gdal_reader.geotransform)
+
+        for band_number, band_array in enumerate(self.band_arrays, 1):
+            self.assertEqual(memmap_reader.get_nodata_value(band_number), NODATA_VALUE)
+            self.assertEqual(memmap_reader.get_band_name(band_number), gdal_reader.get_band_name(band_number))
+            self.assertEqual(memmap_reader.get_band_dtype(band_number).newbyteorder('='), np.dtype('float32'))
+            np.testing.assert_array_equal(memmap_reader.read_window(band_number, 0, 45), band_array)
+            for row_start, row_end, col_start, col_end in [(10, 27, 5, 33), (44, 45, 69, 70)]:
+                memmap_window = memmap_reader.read_window(band_number, row_start, row_end, col_start, col_end)
+                np.testing.assert_array_equal(memmap_window,
+                                              gdal_reader.read_window(band_number, row_start, row_end,
+                                                                      col_start, col_end))
+                np.testing.assert_array_equal(memmap_window, band_array[row_start:row_end, col_start:col_end])
+        self.assertEqual(memmap_reader.get_band_name(1), 'TMI')
+
+    def test_windows_are_views(self):
+        memmap_reader = ERSRawReader(self.ers_path)
+        window = memmap_reader.read_window(2, 3, 9)
+        self.assertFalse(window.flags.owndata)
+        self.assertEqual(window.dtype, np.dtype('>f4'))  # Byte order of file is retained
+
+    def test_truncated_data_file(self):
+        data_path = os.path.splitext(self.ers_path)[0]
+        data_file = open(data_path, 'r+b')
+        data_file.truncate(os.path.getsize(data_path) - 4)
+        data_file.close()
+        self.assertRaises(AssertionError, ERSRawReader, self.ers_path)
+
+    def test_writer_output_matches_gdal(self):
+        variable_arrays = {}
+        for reader in [GDALGridReader.READER_NAME, ERSRawReader.READER_NAME]:
+            nc_path = os.path.join(self.temp_dir, reader + '.nc')
+            NetCDFGridWriter(self.ers_path, nc_path, chunk_size=16, reader=reader).write()
+            netcdf_dataset = netCDF4.Dataset(nc_path)
+            try:
+                variable_arrays[reader] = [netcdf_dataset.variables['Band%d' % band_number][:].filled()
+                                           for band_number in range(1, 4)]
+            finally:
+                netcdf_dataset.close()
+
+        for gdal_array, memmap_array, band_array in zip(variable_arrays['gdal'],
+                                                         variable_arrays['memmap'],
+                                                         self.band_arrays):
+            np.testing.assert_array_equal(memmap_array, gdal_array)
+            np.testing.assert_array_equal(memmap_array, band_array)
+
+
+class TestZipReaders(unittest.TestCase):
+    '''
+    Unit tests for reading ERS grids held in zip archives
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        ers_path = os.path.join(self.temp_dir, 'grid.ers')
+        self.band_arrays = [make_test_array(seed=seed) for seed in range(2)]
+        write_ers_grid(ers_path, self.band_arrays)
+
+        self.zip_paths = {}
+        for compress_type in [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]:
+            zip_path = os.path.join(self.temp_dir, 'grid_%d.zip' % compress_type)
+            zip_file = zipfile.ZipFile(zip_path, 'w', compress_type)
+            zip_file.writestr('readme.txt', 'Member preceding the grid, so that its data is not at the start')
+            zip_file.write(ers_path, 'survey/grid.ers')
+            zip_file.write(os.path.splitext(ers_path)[0], 'survey/grid')
+            zip_file.close()
+            self.zip_paths[compress_type] = zip_path
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_vsizip_paths(self):
+        zip_path = self.zip_paths[zipfile.ZIP_STORED]
+        vsizip_path = make_vsizip_path(zip_path, 'survey/grid.ers')
+        self.assertEqual(split_vsizip_path(vsizip_path), (zip_path, 'survey/grid.ers'))
+        self.assertIsNone(split_vsizip_path(zip_path))
+        self.assertTrue(grid_file_exists(vsizip_path))
+        self.assertFalse(grid_file_exists(make_vsizip_path(zip_path, 'survey/other.ers')))
+
+    def test_member_offset(self):
+        zip_path = self.zip_paths[zipfile.ZIP_STORED]
+        zip_file = zipfile.ZipFile(zip_path)
+        try:
+            zip_info = zip_file.getinfo('survey/grid')
+            member_bytes = zip_file.read(zip_info)
+        finally:
+            zip_file.close()
+
+        archive_file = open(zip_path, 'rb')
+        try:
+            archive_file.seek(get_zip_member_offset(zip_path, zip_info))
+            self.assertEqual(archive_file.read(zip_info.file_size), member_bytes)
+        finally:
+            archive_file.close()
+
+    def test_stored_member_memmap(self):
+        reader = open_grid_reader(make_vsizip_path(self.zip_paths[zipfile.ZIP_STORED], 'survey/grid.ers'), 'memmap')
+        self.assertEqual(type(reader), ERSRawReader)
+        for band_number, band_array in enumerate(self.band_arrays, 1):
+            np.testing.assert_array_equal(reader.read_window(band_number, 0, 45), band_array)
+            np.testing.assert_array_equal(reader.read_window(band_number, 40, 45, 60, 70), band_array[40:45, 60:70])
+
+    def test_compressed_member_stream(self):
+        reader = open_grid_reader(make_vsizip_path(self.zip_paths[zipfile.ZIP_DEFLATED], 'survey/grid.ers'), 'memmap')
+        self.assertEqual(type(reader), ERSZipStreamReader)
+        # Sequential row-bands, then a window above the stream position which requires the stream to be reopened
+        for row_start, row_end, col_start, col_end in [(0, 16, 0, 70), (16, 32, 0, 70), (32, 45, 10, 20),
+                                                       (5, 9, 3, 4), (20, 44, 0, 70)]:
+            for band_number, band_array in enumerate(self.band_arrays, 1):
+                np.testing.assert_array_equal(reader.read_window(band_number, row_start, row_end, col_start, col_end),
+                                              band_array[row_start:row_end, col_start:col_end])
+
+    def test_writer_from_zip(self):
+        for compress_type, zip_path in self.zip_paths.items():
+            nc_path = os.path.join(self.temp_dir, 'grid_%d.nc' % compress_type)
+            NetCDFGridWriter(make_vsizip_path(zip_path, 'survey/grid.ers'), nc_path,
+                             chunk_size=16, reader='memmap').write()
+            netcdf_dataset = netCDF4.Dataset(nc_path)
+            try:
+                for band_number, band_array in enumerate(self.band_arrays, 1):
+                    np.testing.assert_array_equal(netcdf_dataset.variables['Band%d' % band_number][:].filled(),
+                                                  band_array)
+            finally:
+                netcdf_dataset.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+RebuildJournal unit tests
+Created on 16/10/2026
+
+Checks change detection for batch runs, journal persistence and seeding of entries from existing outputs.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from geophys2netcdf.metadata_json import is_fast_digest_available, get_file_digests, FAST_DIGEST_NAME
+from geophys2netcdf._journal import RebuildJournal, get_file_state, get_seed_entry
+
+
+class TestRebuildJournal(unittest.TestCase):
+    '''
+    Unit tests for RebuildJournal
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, 'dataset.ers')
+        input_file = open(self.input_path, 'w')
+        input_file.write('DatasetHeader Begin\nDatasetHeader End\n')
+        input_file.close()
+        self.options = {'chunk_size': None, 'codec': 'zlib:4'}
+        self.entry = {'input': get_file_state(self.input_path),
+                      'csw_fingerprint': 'csw1',
+                      'tool_version': '1.0',
+                      'options': self.options,
+                      }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def compare(self, entry=None, input_state=None, csw_fingerprint='csw1', tool_version='1.0', options=None):
+        return RebuildJournal.compare(self.entry if entry is None else entry,
+                                      input_state or self.entry['input'],
+                                      csw_fingerprint,
+                                      tool_version,
+                                      self.options if options is None else options)
+
+    def test_compare_unchanged(self):
+        self.assertEqual(self.compare(), 'unchanged')
+        # An unavailable CSW record is not treated as a change
+        self.assertEqual(self.compare(csw_fingerprint=None), 'unchanged')
+
+    def test_compare_metadata(self):
+        self.assertEqual(self.compare(csw_fingerprint='csw2'), 'metadata')
+
+    def test_compare_data(self):
+        self.assertEqual(self.compare(entry={}), 'data')
+        self.assertEqual(self.compare(input_state={'md5': 'changed'}), 'data')
+        self.assertEqual(self.compare(tool_version='2.0'), 'data')
+        self.assertEqual(self.compare(options={'chunk_size': 256, 'codec': 'zlib:4'}), 'data')
+        # Data changes take precedence over metadata changes
+        self.assertEqual(self.compare(tool_version='2.0', csw_fingerprint='csw2'), 'data')
+
+    def test_save_and_reload(self):
+        journal_path = os.path.join(self.temp_dir, 'journal.json')
+        journal = RebuildJournal(journal_path)
+        self.assertIsNone(journal.get_entry(self.input_path))
+        journal.set_entry(self.input_path, self.entry)
+        self.assertFalse(os.path.exists(journal_path + '.tmp'))
+
+        reloaded_entry = RebuildJournal(journal_path).get_entry(self.input_path)
+        self.assertTrue('time' in reloaded_entry)
+        self.assertEqual(self.compare(entry=reloaded_entry), 'unchanged')
+
+        journal.remove_entry(self.input_path)
+        self.assertEqual(RebuildJournal(journal_path).entries, {})
+
+    def test_file_state(self):
+        self.assertEqual(self.entry['input']['md5'], get_file_digests(self.input_path, ['md5'])['md5'])
+        # Checksum is reused without reading the file if size and mtime are unchanged
+        previous_state = dict(self.entry['input'], md5='cached')
+        self.assertEqual(get_file_state(self.input_path, previous_state)['md5'], 'cached')
+
+    def test_seed_entry(self):
+        output_path = os.path.join(self.temp_dir, 'dataset.nc')
+        self.assertIsNone(get_seed_entry(self.input_path, output_path, 'csw1', '1.0', self.options))
+
+        open(output_path, 'w').close()
+        seed_entry = get_seed_entry(self.input_path, output_path, 'csw1', '1.0', self.options)
+        self.assertEqual(self.compare(entry=seed_entry), 'unchanged')
+
+        # Existing output is stale if .metadata.json records a different checksum for the input
+        json_metadata_file = open(os.path.join(self.temp_dir, '.metadata.json'), 'w')
+        json.dump({'files': [{'file': os.path.basename(self.input_path),
+                              'mtime': 'unknown',
+                              'md5': 'stale'}]}, json_metadata_file)
+        json_metadata_file.close()
+        self.assertIsNone(get_seed_entry(self.input_path, output_path, 'csw1', '1.0', self.options))
+
+
+    @unittest.skipUnless(is_fast_digest_available(), 'xxhash module not installed')
+    def test_fast_digest(self):
+        fast_state = get_file_state(self.input_path, fast_digest=True)
+        self.assertEqual(fast_state[FAST_DIGEST_NAME],
+                         get_file_digests(self.input_path, [FAST_DIGEST_NAME])[FAST_DIGEST_NAME])
+        self.assertFalse('md5' in fast_state)
+        # Inputs recorded with a different digest are treated as changed
+        self.assertEqual(self.compare(input_state=fast_state), 'data')
+        # Existing digests are reused for an unchanged file, so enabling fast digests does not force a rebuild
+        self.assertEqual(self.compare(input_state=get_file_state(self.input_path, self.entry['input'], True)),
+                         'unchanged')
+
+        output_path = os.path.join(self.temp_dir, 'dataset.nc')
+        open(output_path, 'w').close()
+        json_metadata_file = open(os.path.join(self.temp_dir, '.metadata.json'), 'w')
+        json.dump({'files': [{'file': os.path.basename(self.input_path),
+                              'mtime': 'unknown',
+                              'md5': self.entry['input']['md5'],
+                              FAST_DIGEST_NAME: 'stale'}]}, json_metadata_file)
+        json_metadata_file.close()
+        self.assertIsNone(get_seed_entry(self.input_path, output_path, 'csw1', '1.0', self.options, True))
+        self.assertIsNotNone(get_seed_entry(self.input_path, output_path, 'csw1', '1.0', self.options))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+NetCDFGridWriter unit tests
+Created on 16/10/2026
+
+Round-trips synthetic ERS grids through NetCDFGridWriter and checks data, coordinates and grid_mapping attributes
+against the GDAL netCDF driver layout, including multi-band grids read concurrently, and resumption of
+interrupted conversions from their checkpoints.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from geophys2netcdf._ers2netcdf import ERS2NetCDF
+from geophys2netcdf._grid_reader import ERSRawReader, make_vsizip_path
+from geophys2netcdf._checkpoint import ConversionCheckpoint
+from geophys2netcdf._codecs import CompressionCodec, sample_chunks, trial_codec
+from geophys2netcdf._rechunk import VariableWindowReader
+from synthetic_grid import make_test_array, write_ers_grid, get_coordinate_values, NODATA_VALUE, CELL_SIZE, ORIGIN
+
+
+class InterruptedReader(ERSRawReader):
+    '''
+    ERSRawReader which records the rows read, and fails when reading beyond fail_row to simulate an interruption
+    '''
+
+    def __init__(self, ers_path, fail_row=None):
+        ERSRawReader.__init__(self, ers_path)
+        self.fail_row = fail_row
+        self.row_starts = []
+
+    def read_window(self, band_number, row_start, row_end, col_start=0, col_end=None):
+        if self.fail_row is not None and row_end > self.fail_row:
+            raise IOError('Simulated read failure at row %d' % row_start)
+        self.row_starts.append(row_start)
+        return ERSRawReader.read_window(self, band_number, row_start, row_end, col_start, col_end)
+
+
+class TestNetCDFGridWriter(unittest.TestCase):
+    '''
+    Unit tests for NetCDFGridWriter
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.ers_path = os.path.join(self.temp_dir, 'grid.ers')
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        self.array = make_test_array()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_netcdf(self, **kwargs):
+        NetCDFGridWriter(self.ers_path, self.nc_path, **kwargs).write()
+        self.assertFalse(os.path.exists(self.nc_path + '.tmp'))
+        return netCDF4.Dataset(self.nc_path)
+
+    def test_round_trip(self):
+        write_ers_grid(self.ers_path, self.array)
+        netcdf_dataset = self.write_netcdf(chunk_size=16)
+        try:
+            self.assertEqual(netcdf_dataset.data_model, 'NETCDF4_CLASSIC')
+            variable = netcdf_dataset.variables['Band1']
+            self.assertEqual(variable.dimensions, ('lat', 'lon'))
+            self.assertEqual(variable.dtype, np.dtype('float32'))
+            self.assertEqual(variable.chunking(), [16, 16])
+            self.assertTrue(variable.filters()['zlib'])
+            self.assertEqual(variable._FillValue, NODATA_VALUE)
+            self.assertEqual(variable.grid_mapping, 'crs')
+            variable.set_auto_maskandscale(False)
+            np.testing.assert_array_equal(variable[:], self.array)
+
+            latitudes, longitudes = get_coordinate_values(self.array.shape)
+            np.testing.assert_allclose(netcdf_dataset.variables['lat'][:], latitudes)
+            np.testing.assert_allclose(netcdf_dataset.variables['lon'][:], longitudes)
+
+            crs_variable = netcdf_dataset.variables['crs']
+            self.assertEqual(crs_variable.grid_mapping_name, 'latitude_longitude')
+            np.testing.assert_allclose([float(value) for value in crs_variable.GeoTransform.split()],
+                                       [ORIGIN[0], CELL_SIZE, 0.0, ORIGIN[1], 0.0, -CELL_SIZE])
+            self.assertTrue('WGS' in crs_variable.spatial_ref)
+        finally:
+            netcdf_dataset.close()
+
+    def test_integer_band(self):
+        # Unsigned 16-bit data must be widened for the classic data model
+        array = np.where(self.array == NODATA_VALUE, 0, np.abs(self.array) * 100).astype('uint16')
+        write_ers_grid(self.ers_path, array, nodata_value=0, byte_order='LSBFirst')
+        netcdf_dataset = self.write_netcdf()
+        try:
+            variable = netcdf_dataset.variables['Band1']
+            self.assertEqual(variable.dtype, np.dtype('int32'))
+            self.assertEqual(variable._FillValue, 0)
+            variable.set_auto_maskandscale(False)
+            np.testing.assert_array_equal(variable[:], array)
+        finally:
+            netcdf_dataset.close()
+
+    def test_multi_band(self):
+        band_arrays = [make_test_array(seed=seed) for seed in range(3)]
+        write_ers_grid(self.ers_path, band_arrays, band_names=['TMI', 'RTP', None])
+        zip_path = os.path.join(self.temp_dir, 'grid.zip')
+        zip_file = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED)
+        zip_file.write(self.ers_path, 'grid.ers')
+        zip_file.write(os.path.splitext(self.ers_path)[0], 'grid')
+        zip_file.close()
+
+        # Compressed zip members are streamed by readers which are not thread-safe, so are reopened for each band
+        for input_path, reader in [(self.ers_path, 'gdal'),
+                                   (self.ers_path, 'memmap'),
+                                   (make_vsizip_path(zip_path, 'grid.ers'), 'memmap')]:
+            for band_threads in [1, 3]:
+                NetCDFGridWriter(input_path, self.nc_path, chunk_size=16, reader=reader,
+                                 band_threads=band_threads).write()
+                netcdf_dataset = netCDF4.Dataset(self.nc_path)
+                try:
+                    for band_number, band_array in enumerate(band_arrays, 1):
+                        variable = netcdf_dataset.variables['Band%d' % band_number]
+                        variable.set_auto_maskandscale(False)
+                        np.testing.assert_array_equal(variable[:], band_array)
+                    self.assertEqual(netcdf_dataset.variables['Band1'].long_name, 'TMI')
+                    self.assertEqual(netcdf_dataset.variables['Band3'].long_name, 'GDAL Band Number 3')
+                finally:
+                    netcdf_dataset.close()
+                os.remove(self.nc_path)
+
+    def interrupt_conversion(self):
+        '''
+        Function to write the first two of three row-bands of a checkpointed conversion before failing
+        '''
+        write_ers_grid(self.ers_path, self.array)
+        writer = NetCDFGridWriter(InterruptedReader(self.ers_path, fail_row=33), self.nc_path,
+                                  chunk_size=16, checkpoint=True)
+        self.assertRaises(IOError, writer.write)
+        self.assertFalse(os.path.exists(self.nc_path))
+        self.assertTrue(os.path.exists(self.nc_path + '.tmp'))
+        self.assertEqual(len(ConversionCheckpoint(self.nc_path).row_bands), 2)
+
+    def resume_conversion(self, **kwargs):
+        '''
+        Function to resume an interrupted conversion and check its output
+        Returns:
+            List of row_start values read from the input
+        '''
+        reader = InterruptedReader(self.ers_path)
+        NetCDFGridWriter(reader, self.nc_path, checkpoint=True, **kwargs).write()
+        self.assertFalse(os.path.exists(self.nc_path + '.tmp'))
+        self.assertFalse(os.path.exists(ConversionCheckpoint(self.nc_path).checkpoint_path))
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            variable = netcdf_dataset.variables['Band1']
+            variable.set_auto_maskandscale(False)
+            np.testing.assert_array_equal(variable[:], self.array)
+        finally:
+            netcdf_dataset.close()
+        return reader.row_starts
+
+    def test_resume(self):
+        self.interrupt_conversion()
+        # Only the row-band which was not completed is read
+        self.assertEqual(self.resume_conversion(chunk_size=16), [32])
+
+    def test_resume_corrupt_output(self):
+        self.interrupt_conversion()
+        netcdf_dataset = netCDF4.Dataset(self.nc_path + '.tmp', 'r+')
+        netcdf_dataset.variables['Band1'][20, 20] = 0.0
+        netcdf_dataset.close()
+        # Row-bands are rewritten from the first one which fails verification
+        self.assertEqual(self.resume_conversion(chunk_size=16), [16, 32])
+
+    def test_restart_with_changed_options(self):
+        self.interrupt_conversion()
+        self.assertEqual(self.resume_conversion(chunk_size=32), [0, 32])
+
+    def test_auto_codec_trial(self):
+        # Codec trials compress samples as they are stored, i.e. after quantization or packing
+        write_ers_grid(self.ers_path, self.array)
+        for writer_options in [{}, {'precision': 'digits:2'}, {'packing': 'int16'}]:
+            netcdf_dataset = self.write_netcdf(chunk_size=16, codec='auto', min_write_speed=0, **writer_options)
+            try:
+                self.assertEqual(netcdf_dataset.compression_selection, 'auto')
+                variable = netcdf_dataset.variables['Band1']
+                variable.set_auto_maskandscale(False)
+                stored_samples = list(sample_chunks(VariableWindowReader(variable), (16, 16)))
+                trial_result = trial_codec(CompressionCodec.from_string(netcdf_dataset.compression_codec),
+                                           stored_samples)
+                self.assertEqual(netcdf_dataset.compression_trial_ratio, trial_result['ratio'])
+            finally:
+                netcdf_dataset.close()
+            os.remove(self.nc_path)
+
+
+class TestWriterSelection(unittest.TestCase):
+    '''
+    Unit tests for selection of the writer used for initial format translation
+    '''
+
+    def test_get_writer(self):
+        converter = ERS2NetCDF()
+        self.assertEqual(converter.get_writer(), 'gdal')
+        self.assertEqual(converter.get_writer(codec='deflate:4', checkpoint=None), 'gdal')
+        self.assertEqual(converter.get_writer('stream'), 'stream')
+        # Options supported only by the in-process writer select it when no writer is given
+        self.assertEqual(converter.get_writer(precision={1: 'digits:3'}), 'stream')
+        self.assertEqual(converter.get_writer(reader='memmap'), 'stream')
+        self.assertRaises(AssertionError, converter.get_writer, 'gdal', packing={1: 'int16'})
+        self.assertRaises(AssertionError, converter.get_writer, 'nccopy')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+OverviewBuilder unit tests
+Created on 16/10/2026
+
+Checks streamed overview pyramids against brute-force block means of the valid full-resolution cells, and the
+overview variables written by NetCDFGridWriter.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._overviews import OverviewBuilder, get_overview_level_count, get_overview_shape, \
+    get_overview_variables
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE, CELL_SIZE, ORIGIN
+
+
+def get_brute_force_overview(array, factor, nodata_value):
+    '''
+    Function to return the mean of the valid cells in each factor x factor block of array, or nodata_value
+    for blocks with no valid cells. Blocks at the bottom and right edges may be partial
+    '''
+    overview_shape = get_overview_shape(array.shape, factor)
+    overview_array = np.ones(overview_shape, dtype=np.float64) * nodata_value
+    for row in range(overview_shape[0]):
+        for col in range(overview_shape[1]):
+            block = array[row * factor:(row + 1) * factor, col * factor:(col + 1) * factor].astype(np.float64)
+            valid_values = block[block != nodata_value]
+            if valid_values.size:
+                overview_array[row, col] = valid_values.mean()
+    return overview_array
+
+
+class TestOverviewBuilder(unittest.TestCase):
+    '''
+    Unit tests for OverviewBuilder
+    '''
+
+    def setUp(self):
+        self.array = make_test_array()
+        self.array[8:24, 20:36] = NODATA_VALUE  # Block large enough to leave nodata cells at every level
+
+    def build_overviews(self, row_counts, level_count=3):
+        '''
+        Function to feed row-bands of the specified sizes to an OverviewBuilder
+        Returns:
+            List of assembled overview arrays, finest first
+        '''
+        overview_builder = OverviewBuilder(self.array.shape, level_count, 'float64', NODATA_VALUE)
+        overview_arrays = [np.zeros(get_overview_shape(self.array.shape, 2 ** (level + 1))) * np.nan
+                           for level in range(level_count)]
+        row_start = 0
+        for row_count in row_counts:
+            band_array = self.array[row_start:row_start + row_count]
+            for level, overview_row_start, overview_array in overview_builder.update(band_array,
+                                                                                      band_array != NODATA_VALUE):
+                # Each overview row must be completed exactly once
+                self.assertTrue(np.isnan(overview_arrays[level][overview_row_start:
+                                                                overview_row_start + overview_array.shape[0]]).all())
+                overview_arrays[level][overview_row_start:overview_row_start + overview_array.shape[0]] = overview_array
+            row_start += row_count
+        self.assertEqual(row_start, self.array.shape[0])
+        return overview_arrays
+
+    def test_cascade(self):
+        # Odd-sized row-bands leave rows pending at each level
+        for row_counts in [[16, 16, 13], [7, 1, 9, 3, 25], [45]]:
+            overview_arrays = self.build_overviews(row_counts)
+            for level, overview_array in enumerate(overview_arrays):
+                np.testing.assert_allclose(overview_array,
+                                           get_brute_force_overview(self.array, 2 ** (level + 1), NODATA_VALUE),
+                                           rtol=1.0e-12)
+            self.assertTrue((overview_arrays[1] == NODATA_VALUE).any())
+
+    def test_level_count(self):
+        self.assertEqual(get_overview_level_count((1000, 300), None), 0)
+        self.assertEqual(get_overview_level_count((1000, 300), 3), 3)
+        self.assertEqual(get_overview_level_count((1000, 300), 'auto'), 2)  # 250 x 75 is small enough
+        self.assertEqual(get_overview_level_count((45, 70), 'auto'), 0)
+
+
+class TestOverviewVariables(unittest.TestCase):
+    '''
+    Unit tests for overview variables written by NetCDFGridWriter
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+        self.ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), self.array)
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_writer_overviews(self):
+        NetCDFGridWriter(self.ers_path, self.nc_path, chunk_size=16, overview_levels=2).write()
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            overview_variables = get_overview_variables(netcdf_dataset, 'Band1')
+            self.assertEqual([variable.name for variable in overview_variables], ['Band1_ovr2', 'Band1_ovr4'])
+            for overview_variable in overview_variables:
+                factor = overview_variable.overview_factor
+                self.assertEqual(overview_variable.dimensions, ('lat_ovr%d' % factor, 'lon_ovr%d' % factor))
+                self.assertFalse(hasattr(overview_variable, 'grid_mapping'))
+                self.assertEqual(overview_variable._FillValue, NODATA_VALUE)
+                overview_variable.set_auto_maskandscale(False)
+                np.testing.assert_array_equal(overview_variable[:],
+                                              get_brute_force_overview(self.array, factor,
+                                                                       NODATA_VALUE).astype('float32'))
+                # Coordinates are the centres of the (possibly partial) blocks of full-resolution cells
+                overview_rows, overview_cols = overview_variable.shape
+                np.testing.assert_allclose(netcdf_dataset.variables['lat_ovr%d' % factor][:],
+                                           ORIGIN[1] - (np.arange(overview_rows) + 0.5) * factor * CELL_SIZE)
+                np.testing.assert_allclose(netcdf_dataset.variables['lon_ovr%d' % factor][:],
+                                           ORIGIN[0] + (np.arange(overview_cols) + 0.5) * factor * CELL_SIZE)
+        finally:
+            netcdf_dataset.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
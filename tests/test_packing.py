@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Packer unit tests
+Created on 16/10/2026
+
+Checks that packed values unpack to within the maximum packing error, including for constant data.
+
+Usage: python -m unittest discover tests
+'''
+import unittest
+import numpy as np
+
+from geophys2netcdf._packing import Packer, PackingRangeError
+
+
+class TestPacker(unittest.TestCase):
+    '''
+    Unit tests for Packer
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.array = random_state.uniform(-250.0, 4750.0, 10000).astype('float32')
+        self.valid_mask = np.ones(self.array.shape, dtype=bool)
+
+    def get_error_bound(self, packer, array):
+        '''
+        Function to return the maximum packing error plus rounding in float32 unpacking arithmetic
+        '''
+        return packer.maximum_error + 2.0 * np.finfo(packer.unpacked_dtype).eps * float(np.abs(array).max())
+
+    def check_round_trip(self, packer, array):
+        self.assertTrue(packer.fit(array.min(), array.max()))
+        packed_array = packer.pack(array, self.valid_mask)
+        self.assertEqual(packed_array.dtype, packer.packed_dtype)
+        packed_min, packed_max = packer.packed_range
+        self.assertTrue(packed_array.min() >= packed_min and packed_array.max() <= packed_max)
+        unpacked_array = packer.unpack(packed_array)
+        self.assertTrue(np.all(np.abs(unpacked_array.astype('float64') - array) <=
+                               self.get_error_bound(packer, array)),
+                        '%s exceeds packing error bound' % packer)
+
+    def test_round_trip(self):
+        for packing_spec in ['int16', 'int8']:
+            self.check_round_trip(Packer.from_string(packing_spec), self.array)
+
+    def test_precision(self):
+        packer = Packer('int16', 0.1)
+        self.check_round_trip(packer, self.array)
+        self.assertLessEqual(packer.maximum_error, 0.1)
+
+    def test_precision_too_fine(self):
+        self.assertFalse(Packer('int16', 0.01).fit(self.array.min(), self.array.max()))
+        self.assertFalse(Packer('int8', 1.0).fit(self.array.min(), self.array.max()))
+
+    def test_constant_data(self):
+        array = np.full(100, 1234.5, dtype='float32')
+        packer = Packer('int16')
+        self.assertTrue(packer.fit(array.min(), array.max()))
+        self.assertEqual(packer.scale_factor, 1.0)
+        packed_array = packer.pack(array, np.ones(array.shape, dtype=bool))
+        self.assertTrue(np.all(packed_array != packer.fill_value))
+        self.assertTrue(np.array_equal(packer.unpack(packed_array), array))
+
+    def test_invalid_cells(self):
+        array = self.array.copy()
+        array[:10] = -99999.0
+        valid_mask = array != -99999.0
+        packer = Packer('int16')
+        packer.fit(array[valid_mask].min(), array[valid_mask].max())
+        packed_array = packer.pack(array, valid_mask)
+        self.assertTrue(np.all(packed_array[:10] == packer.fill_value))
+        self.assertTrue(np.all(packed_array[10:] != packer.fill_value))
+        unpacked_array = packer.unpack(packed_array, -99999.0)
+        self.assertTrue(np.all(unpacked_array[:10] == -99999.0))
+        self.assertTrue(np.all(np.isnan(packer.unpack(packed_array)[:10])))
+
+    def test_out_of_range(self):
+        packer = Packer('int16')
+        packer.fit(0.0, 100.0)
+        self.assertRaises(PackingRangeError, packer.pack, np.array([0.0, 200.0], dtype='float32'),
+                          np.ones(2, dtype=bool))
+        # Invalid cells are not range checked
+        packed_array = packer.pack(np.array([0.0, 200.0], dtype='float32'), np.array([True, False]))
+        self.assertEqual(packed_array[1], packer.fill_value)
+
+    def test_from_string(self):
+        self.assertEqual(str(Packer.from_string('INT16:0.5')), 'int16:0.5')
+        self.assertEqual(str(Packer.from_string('int8')), 'int8')
+        self.assertRaises(AssertionError, Packer.from_string, 'int32')
+        self.assertRaises(AssertionError, Packer.from_string, 'int16:-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Quantizer unit tests
+Created on 16/10/2026
+
+Checks that quantized values stay within the error bounds recorded in the CF quantization attributes.
+
+Usage: python -m unittest discover tests
+'''
+import unittest
+import numpy as np
+
+from geophys2netcdf._quantization import Quantizer
+
+
+class TestQuantizer(unittest.TestCase):
+    '''
+    Unit tests for Quantizer
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        # Values spanning many orders of magnitude of both signs
+        self.array = (random_state.uniform(-1.0, 1.0, 10000) *
+                      10.0 ** random_state.uniform(-6.0, 6.0, 10000)).astype('float32')
+
+    def test_bitround_relative_error(self):
+        for precision_spec in ['bits:1', 'bits:7', 'bits:16', 'digits:3', 'digits:5']:
+            quantizer = Quantizer.from_string(precision_spec)
+            for dtype in ['float32', 'float64']:
+                array = self.array.astype(dtype)
+                absolute_error, relative_error = quantizer.get_maximum_error(dtype)
+                self.assertIsNone(absolute_error)
+                quantized_array = quantizer.quantize(array)
+                self.assertEqual(quantized_array.dtype, array.dtype)
+                self.assertTrue(np.all(np.abs(quantized_array.astype('float64') - array) <=
+                                       relative_error * np.abs(array.astype('float64'))),
+                                '%s exceeds relative error bound for %s' % (quantizer, dtype))
+
+    def test_tolerance_absolute_error(self):
+        for tolerance in [1.0e-3, 0.01, 0.5, 3.0]:
+            quantizer = Quantizer('tolerance', tolerance)
+            absolute_error, relative_error = quantizer.get_maximum_error('float32')
+            self.assertIsNone(relative_error)
+            self.assertLessEqual(absolute_error, tolerance)
+            quantized_array = quantizer.quantize(self.array)
+            self.assertTrue(np.all(np.abs(quantized_array.astype('float64') - self.array) <= absolute_error),
+                            '%s exceeds absolute error bound' % quantizer)
+
+    def test_quantize_is_idempotent(self):
+        for precision_spec in ['bits:7', 'digits:3', 'tolerance:0.01']:
+            quantizer = Quantizer.from_string(precision_spec)
+            quantized_array = quantizer.quantize(self.array)
+            self.assertTrue(np.array_equal(quantizer.quantize(quantized_array), quantized_array))
+
+    def test_invalid_cells_unchanged(self):
+        array = self.array.copy()
+        array[:10] = -99999.0
+        array[10:20] = np.nan
+        array[20:30] = np.inf
+        valid_mask = array != -99999.0
+        for precision_spec in ['bits:7', 'tolerance:0.01']:
+            quantized_array = Quantizer.from_string(precision_spec).quantize(array, valid_mask)
+            self.assertTrue(np.all(quantized_array[:10] == -99999.0))
+            self.assertTrue(np.all(np.isnan(quantized_array[10:20])))
+            self.assertTrue(np.all(quantized_array[20:30] == np.inf))
+
+    def test_no_bits_removed(self):
+        quantizer = Quantizer('bits', 23)
+        self.assertEqual(quantizer.get_maximum_error('float32'), (None, None))
+        self.assertTrue(np.array_equal(quantizer.quantize(self.array), self.array))
+
+    def test_from_string(self):
+        self.assertEqual(str(Quantizer.from_string('Digits:4')), 'digits:4')
+        self.assertEqual(Quantizer.from_string('digits:4').significant_bits, 14)
+        self.assertRaises(AssertionError, Quantizer.from_string, 'digits')
+        self.assertRaises(AssertionError, Quantizer.from_string, 'sigfigs:4')
+        self.assertRaises(AssertionError, Quantizer.from_string, 'tolerance:0')
+
+
+if __name__ == '__main__':
+    unittest.main()
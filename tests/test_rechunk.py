@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Rechunking unit tests
+Created on 16/10/2026
+
+Checks that rechunk_file preserves all dimensions, variables, attributes and data while applying the new chunk
+shape and codec through a memory budget much smaller than the data.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._rechunk import rechunk_file, rechunk_files, get_tile_shape
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid
+
+# Global attributes which are expected to change when rechunking
+CHANGED_ATTRIBUTES = ['history', 'compression_codec', 'compression_selection']
+
+
+class TestRechunk(unittest.TestCase):
+    '''
+    Unit tests for rechunk_file
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.band_arrays = [make_test_array(seed=seed) for seed in range(2)]
+        ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), self.band_arrays)
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        NetCDFGridWriter(ers_path, self.nc_path, chunk_size=16, overview_levels=1).write()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_dataset(self, nc_path):
+        '''
+        Function to return (global_attributes, dimensions, variables) dicts for a NetCDF file, where
+        variables holds (dimensions, dtype, attributes, data, chunking, filters) tuples
+        '''
+        netcdf_dataset = netCDF4.Dataset(nc_path)
+        try:
+            netcdf_dataset.set_auto_maskandscale(False)
+            return ({attribute_name: netcdf_dataset.getncattr(attribute_name)
+                     for attribute_name in netcdf_dataset.ncattrs()},
+                    {dimension.name: len(dimension) for dimension in netcdf_dataset.dimensions.values()},
+                    {variable.name: (variable.dimensions,
+                                     variable.dtype,
+                                     {attribute_name: variable.getncattr(attribute_name)
+                                      for attribute_name in variable.ncattrs()},
+                                     variable[:],
+                                     variable.chunking(),
+                                     variable.filters())
+                     for variable in netcdf_dataset.variables.values()})
+        finally:
+            netcdf_dataset.close()
+
+    def assert_rechunked(self, input_contents, output_path, chunk_shape, codec):
+        input_attributes, input_dimensions, input_variables = input_contents
+        output_attributes, output_dimensions, output_variables = self.read_dataset(output_path)
+        self.assertEqual(output_dimensions, input_dimensions)
+        self.assertEqual(sorted(output_variables.keys()), sorted(input_variables.keys()))
+        self.assertEqual(output_attributes['compression_codec'], codec)
+        for attribute_name, value in input_attributes.items():
+            if attribute_name not in CHANGED_ATTRIBUTES and not attribute_name.startswith('chunk'):
+                np.testing.assert_array_equal(output_attributes[attribute_name], value)
+
+        for variable_name, (dimensions, dtype, attributes, data, chunking, filters) in input_variables.items():
+            output_dimensions, output_dtype, output_attributes, output_data, output_chunking, output_filters = \
+                output_variables[variable_name]
+            self.assertEqual((output_dimensions, output_dtype), (dimensions, dtype))
+            self.assertEqual(sorted(output_attributes.keys()), sorted(attributes.keys()))
+            for attribute_name, value in attributes.items():
+                np.testing.assert_array_equal(output_attributes[attribute_name], value)
+            np.testing.assert_array_equal(output_data, data)
+            if len(dimensions) == 2:  # Data and overview variables
+                self.assertEqual(output_chunking, [min(chunk_size, size)
+                                                   for chunk_size, size in zip(chunk_shape, data.shape)])
+                self.assertTrue(output_filters['zlib'])
+                self.assertEqual(output_filters['shuffle'], '+shuffle' in codec)
+
+    def test_rechunk_to_output(self):
+        input_contents = self.read_dataset(self.nc_path)
+        output_path = os.path.join(self.temp_dir, 'rechunked.nc')
+        # Memory budget allows only a few chunks per tile
+        rechunk_file(self.nc_path, output_path, chunk_size=8, codec='deflate:6+shuffle', memory_bytes=2048)
+        self.assert_rechunked(input_contents, output_path, (8, 8), 'deflate:6+shuffle')
+        self.assertFalse(os.path.exists(output_path + '.tmp'))
+
+    def test_rechunk_in_place(self):
+        input_contents = self.read_dataset(self.nc_path)
+        result_list = rechunk_files([self.nc_path, os.path.join(self.temp_dir, 'missing.nc')],
+                                    processes=1, chunk_size=32, codec='deflate:1')
+        self.assertEqual([result['status'] for result in result_list], ['OK', 'FAILED'])
+        self.assert_rechunked(input_contents, self.nc_path, (32, 32), 'deflate:1')
+
+    def test_tile_shape(self):
+        # Full-width rows of chunks when they fit in half the memory budget
+        self.assertEqual(get_tile_shape((45, 70), (8, 8), 4, 2 * 2 * 8 * 70 * 4), (16, 70))
+        self.assertEqual(get_tile_shape((45, 70), (8, 8), 4, 2 * 100 * 8 * 70 * 4), (45, 70))
+        # Otherwise whole chunks along a row
+        self.assertEqual(get_tile_shape((45, 70), (8, 8), 4, 2 * 3 * 8 * 8 * 4), (8, 24))
+        self.assertEqual(get_tile_shape((45, 70), (8, 8), 4, 16), (8, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+Sparse chunk unit tests
+Created on 16/10/2026
+
+Checks the chunk window functions used to skip unallocated chunks, and that NetCDFGridWriter leaves chunks which
+are entirely _FillValue unallocated without changing the values read back.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._sparse import is_fill_array, get_data_column_ranges, get_chunk_windows, get_allocated_windows
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+class TestChunkWindows(unittest.TestCase):
+    '''
+    Unit tests for sparse chunk functions
+    '''
+
+    def test_is_fill_array(self):
+        array = np.full((4, 4), NODATA_VALUE, dtype='float32')
+        self.assertTrue(is_fill_array(array, NODATA_VALUE))
+        self.assertFalse(is_fill_array(array, None))
+        array[2, 3] = 1.0
+        self.assertFalse(is_fill_array(array, NODATA_VALUE))
+        self.assertTrue(is_fill_array(np.full((2, 2), np.nan), np.nan))
+        self.assertFalse(is_fill_array(np.array([np.nan, 0.0]), np.nan))
+
+    def test_data_column_ranges(self):
+        array = make_test_array()  # Columns 0-7 and 63-69 are entirely nodata
+        self.assertEqual(get_data_column_ranges(array, 16, NODATA_VALUE), [(0, 64)])
+        self.assertEqual(get_data_column_ranges(array, 8, NODATA_VALUE), [(8, 64)])
+        self.assertEqual(get_data_column_ranges(array, 4, NODATA_VALUE), [(8, 64)])
+        self.assertEqual(get_data_column_ranges(array[:, :8], 4, NODATA_VALUE), [])
+
+        array[:, 30:40] = NODATA_VALUE
+        self.assertEqual(get_data_column_ranges(array, 10, NODATA_VALUE), [(0, 30), (40, 70)])
+
+    def test_chunk_windows(self):
+        allocated_chunks = set([(0, 0), (0, 16), (0, 48), (16, 16)])
+        # Adjacent allocated chunks are merged, and windows are clipped to the block
+        self.assertEqual(get_chunk_windows((16, 16), allocated_chunks, 8, 32, 4, 60),
+                         [(8, 16, 4, 32), (8, 16, 48, 60), (16, 32, 16, 32)])
+        self.assertEqual(get_chunk_windows((16, 16), allocated_chunks, 8, 32, 4, 60, allocated=False),
+                         [(8, 16, 32, 48), (16, 32, 4, 16), (16, 32, 32, 60)])
+
+        allocated_windows, unallocated_cell_count = get_allocated_windows((16, 16), allocated_chunks, 8, 32, 4, 60)
+        self.assertEqual(allocated_windows, [(8, 16, 4, 32), (8, 16, 48, 60), (16, 32, 16, 32)])
+        self.assertEqual(unallocated_cell_count, 24 * 56 - (8 * 28 + 8 * 12 + 16 * 16))
+
+        self.assertEqual(get_allocated_windows((16, 16), set(), 0, 16, 0, 16), ([], 256))
+
+
+@unittest.skipUnless(h5py and hasattr(h5py.h5d.DatasetID, 'read_direct_chunk'), 'h5py 2.10 or later not installed')
+class TestSparseWriter(unittest.TestCase):
+    '''
+    Unit tests for sparse writes with NetCDFGridWriter
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+        self.array[:16, :] = NODATA_VALUE  # First row of chunks entirely nodata
+        self.ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), [self.array])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def get_unallocated_chunks(self, nc_path):
+        '''
+        Function to return the set of origins of the unallocated chunks of Band1
+        '''
+        h5_file = h5py.File(nc_path, 'r')
+        try:
+            dataset = h5_file['Band1']
+            self.assertEqual(dataset.chunks, (16, 16))
+            unallocated_chunks = set()
+            for row in range(0, dataset.shape[0], dataset.chunks[0]):
+                for col in range(0, dataset.shape[1], dataset.chunks[1]):
+                    try:
+                        dataset.id.read_direct_chunk((row, col))
+                    except RuntimeError:  # Chunk storage not allocated
+                        unallocated_chunks.add((row, col))
+            return unallocated_chunks
+        finally:
+            h5_file.close()
+
+    def test_sparse_write(self):
+        fill_chunks = set([(row, col) for row in range(0, 45, 16) for col in range(0, 70, 16)
+                           if np.all(self.array[row:row + 16, col:col + 16] == NODATA_VALUE)])
+        self.assertEqual(len(fill_chunks), 7)
+
+        for sparse, compress_processes in [(True, None), (True, 2), (False, None)]:
+            nc_path = os.path.join(self.temp_dir, 'grid_%s_%s.nc' % (sparse, compress_processes))
+            NetCDFGridWriter(self.ers_path, nc_path, chunk_size=16, codec='deflate:4+shuffle', sparse=sparse,
+                             compress_processes=compress_processes).write()
+            self.assertEqual(self.get_unallocated_chunks(nc_path), fill_chunks if sparse else set())
+
+            netcdf_dataset = netCDF4.Dataset(nc_path)
+            try:
+                netcdf_dataset.set_auto_maskandscale(False)
+                np.testing.assert_array_equal(netcdf_dataset.variables['Band1'][:], self.array)
+            finally:
+                netcdf_dataset.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
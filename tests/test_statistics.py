@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+#=========================================================================
+# Copyright (c)  2014 Geoscience Australia
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither Geoscience Australia nor the names of its contributors may be
+#       used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#=========================================================================
+'''
+BandStatistics unit tests
+Created on 16/10/2026
+
+Checks streamed and merged band statistics against numpy statistics of the valid values, and the statistics
+attributes written by NetCDFGridWriter.
+
+Usage: python -m unittest discover tests
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import netCDF4
+
+from geophys2netcdf._statistics import BandStatistics, compute_variable_statistics
+from geophys2netcdf._netcdf_writer import NetCDFGridWriter
+from synthetic_grid import make_test_array, write_ers_grid, NODATA_VALUE
+
+
+class TestBandStatistics(unittest.TestCase):
+    '''
+    Unit tests for BandStatistics
+    '''
+
+    def setUp(self):
+        self.array = make_test_array()
+        self.array[10, 30] = np.nan  # NaN is excluded as well as nodata
+        self.valid_values = self.array[(self.array != NODATA_VALUE) & ~np.isnan(self.array)].astype(np.float64)
+
+    def assert_matches_numpy(self, band_statistics):
+        self.assertEqual(band_statistics.valid_count, self.valid_values.size)
+        self.assertEqual(band_statistics.nodata_count, self.array.size - self.valid_values.size)
+        self.assertEqual(band_statistics.min, self.valid_values.min())
+        self.assertEqual(band_statistics.max, self.valid_values.max())
+        self.assertAlmostEqual(band_statistics.mean, self.valid_values.mean(), places=9)
+        self.assertAlmostEqual(band_statistics.variance / self.valid_values.var(), 1.0, places=12)
+
+    def test_update(self):
+        # Irregular blocks, including blocks with no valid values
+        band_statistics = BandStatistics(NODATA_VALUE)
+        for row_start, row_end in [(0, 1), (1, 7), (7, 30), (30, 31), (31, 45)]:
+            band_statistics.update(self.array[row_start:row_end])
+        self.assert_matches_numpy(band_statistics)
+
+    def test_merge(self):
+        # Statistics of column blocks are merged in reverse order, as for bands or tiles gathered in parallel
+        block_statistics = []
+        for col_start in range(0, 70, 16):
+            block_statistics.append(BandStatistics(NODATA_VALUE))
+            block_statistics[-1].update(self.array[:, col_start:col_start + 16])
+
+        band_statistics = BandStatistics(NODATA_VALUE)
+        for block_statistic in reversed(block_statistics):
+            band_statistics.merge(block_statistic)
+        self.assert_matches_numpy(band_statistics)
+
+    def test_no_valid_data(self):
+        band_statistics = BandStatistics(NODATA_VALUE)
+        band_statistics.update(np.ones((3, 4), dtype='float32') * NODATA_VALUE)
+        self.assertEqual(band_statistics.to_dict(), {'min': None,
+                                                     'max': None,
+                                                     'mean': None,
+                                                     'variance': None,
+                                                     'valid_count': 0,
+                                                     'nodata_count': 12,
+                                                     })
+
+    def test_integer_band(self):
+        array = np.array([[0, 3, 5], [7, 0, 9]], dtype='int16')
+        band_statistics = BandStatistics(0)
+        band_statistics.update(array)
+        self.assertEqual((band_statistics.min, band_statistics.max, band_statistics.mean), (3.0, 9.0, 6.0))
+        self.assertEqual(band_statistics.variance, 5.0)
+        self.assertEqual(band_statistics.nodata_count, 2)
+
+
+class TestVariableStatistics(unittest.TestCase):
+    '''
+    Unit tests for statistics attributes of NetCDF variables
+    '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.array = make_test_array()
+        self.ers_path = write_ers_grid(os.path.join(self.temp_dir, 'grid.ers'), self.array)
+        self.nc_path = os.path.join(self.temp_dir, 'grid.nc')
+        NetCDFGridWriter(self.ers_path, self.nc_path, chunk_size=16).write()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_writer_attributes(self):
+        valid_values = self.array[self.array != NODATA_VALUE].astype(np.float64)
+        netcdf_dataset = netCDF4.Dataset(self.nc_path)
+        try:
+            variable = netcdf_dataset.variables['Band1']
+            self.assertTrue(BandStatistics.has_attributes(variable))
+            np.testing.assert_array_equal(variable.actual_range,
+                                          np.array([valid_values.min(), valid_values.max()], dtype='float32'))
+            self.assertAlmostEqual(variable.stats_mean, valid_values.mean(), places=9)
+            self.assertAlmostEqual(variable.stats_variance / valid_values.var(), 1.0, places=12)
+            self.assertEqual(variable.stats_valid_count, valid_values.size)
+            self.assertEqual(variable.stats_nodata_count, self.array.size - valid_values.size)
+
+            # Statistics computed from the file in small reads agree with those gathered while writing
+            band_statistics = compute_variable_statistics(variable, max_bytes=1024)
+            self.assertEqual(band_statistics.valid_count, variable.stats_valid_count)
+            self.assertAlmostEqual(band_statistics.mean, variable.stats_mean, places=9)
+        finally:
+            netcdf_dataset.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,19 +5,21 @@ Created on 2Sep.,2016
 '''
 import os
 import sys
-import errno
 import logging
 import re
-import subprocess
-import tempfile
-from shutil import rmtree
+import zipfile
 import glob
+import math
+import random
+import argparse
 from osgeo import gdal, gdalconst
 import netCDF4
-from geophys_utils import array_pieces
+import multiprocessing
 import numpy as np
-from functools import reduce
 from geophys2netcdf.metadata import ERSMetadata
+from geophys2netcdf import open_grid_reader, get_quantization_tolerance, is_packed, get_packing_tolerance
+from geophys2netcdf import get_allocated_chunks, get_chunk_windows
+from geophys2netcdf import make_vsizip_path, grid_file_exists, read_text
 from pprint import pprint
 
 # Set handler for root logger to standard output
@@ -32,8 +34,236 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)  # Initial logging level for this module
 
 FLOAT_TOLERANCE = 0.000001
-#MAX_BYTES = 500000000 # 500MB
-MAX_BYTES = 1000000000 # 1GB
+DEFAULT_TILE_BYTES = 33554432  # 32MiB maximum uncompressed size of each comparison tile
+DEFAULT_SAMPLE_FRACTION = 0.01  # Fraction of interior tiles compared in sample mode
+DETECTION_FRACTION = 0.01  # Fraction of differing tiles for which sample mode reports detection confidence
+
+# Per-process state for parallel tile comparisons
+_worker_readers = None
+
+
+def get_tile_windows(shape, chunk_shape, itemsize, tile_bytes=None):
+    '''
+    Function to return a list of chunk-aligned (row_start, row_end, col_start, col_end) tiles covering a 2D array.
+    Tiles span whole rows where possible so that ERS data is read in contiguous lines
+    '''
+    tile_bytes = tile_bytes or DEFAULT_TILE_BYTES
+    nrows, ncols = shape
+    chunk_rows, chunk_cols = chunk_shape
+    if chunk_rows * ncols * itemsize <= tile_bytes:
+        tile_rows = max(tile_bytes // (ncols * itemsize) // chunk_rows, 1) * chunk_rows
+        tile_cols = ncols
+    else:
+        tile_rows = chunk_rows
+        tile_cols = max(tile_bytes // (chunk_rows * itemsize) // chunk_cols, 1) * chunk_cols
+
+    return [(row_start, min(row_start + tile_rows, nrows), col_start, min(col_start + tile_cols, ncols))
+            for row_start in range(0, nrows, tile_rows)
+            for col_start in range(0, ncols, tile_cols)]
+
+
+def reduce_array(array):
+    '''
+    Function to return (min, max, sum, count) of the non-NaN values in an array
+    '''
+    values = array[~np.isnan(array)] if array.dtype.kind == 'f' else array.ravel()
+    if not values.size:
+        return (None, None, 0.0, 0)
+    return (float(values.min()), float(values.max()), float(values.sum(dtype=np.float64)), values.size)
+
+
+def merge_reductions(reduction1, reduction2):
+    '''
+    Function to combine two (min, max, sum, count) tuples returned by reduce_array()
+    '''
+    if not reduction1[3]:
+        return reduction2
+    if not reduction2[3]:
+        return reduction1
+    return (min(reduction1[0], reduction2[0]), max(reduction1[1], reduction2[1]),
+            reduction1[2] + reduction2[2], reduction1[3] + reduction2[3])
+
+
+def get_reduction_values(reduction):
+    '''
+    Function to return (min, max, mean) from a (min, max, sum, count) tuple
+    '''
+    return reduction[0], reduction[1], (reduction[2] / reduction[3] if reduction[3] else None)
+
+
+def is_bitwise_equal(nc_array, ers_array):
+    '''
+    Function to return True if two arrays of the same type hold bit-identical values, regardless of byte order.
+    Values are compared as unsigned integers so that NaN cells with identical bit patterns also match
+    '''
+    if (nc_array.shape != ers_array.shape or nc_array.dtype.kind != ers_array.dtype.kind
+            or nc_array.dtype.itemsize != ers_array.dtype.itemsize):
+        return False
+
+    native_dtype = nc_array.dtype.newbyteorder('=')
+    unsigned_dtype = np.dtype('u%d' % native_dtype.itemsize)
+    return bool(np.array_equal(nc_array.astype(native_dtype, copy=False).view(unsigned_dtype),
+                               ers_array.astype(native_dtype, copy=False).view(unsigned_dtype)))
+
+
+def compare_tile_arrays(nc_array, ers_array, bitwise=True):
+    '''
+    Function to return a dict of reductions for one tile of NetCDF and ERS data in the same orientation.
+    Bit-identical tiles are reduced once without any difference arithmetic unless bitwise is False
+    '''
+    if bitwise and is_bitwise_equal(nc_array, ers_array):
+        nc_reduction = reduce_array(nc_array)
+        return {'nc': nc_reduction,
+                'ers': nc_reduction,
+                'percentage_difference': (0.0, 0.0, 0.0, nc_reduction[3]),
+                'max_absolute_difference': 0.0 if nc_reduction[3] else None,
+                'identical_tile_count': 1,
+                'tile_count': 1,
+                }
+
+    if nc_array.dtype.kind != 'f':  # Avoid integer wrap-around and division
+        nc_array = nc_array.astype(np.float64)
+    if ers_array.dtype.kind != 'f':
+        ers_array = ers_array.astype(np.float64)
+
+    with np.errstate(invalid='ignore'):
+        absolute_difference_array = np.absolute(nc_array - ers_array)
+        # Identical values (including zeros) have no percentage difference, other values differing from zero
+        # have an infinite one
+        percentage_difference_array = np.empty(absolute_difference_array.shape,
+                                               dtype=absolute_difference_array.dtype)
+        percentage_difference_array[...] = np.inf
+        np.divide(absolute_difference_array, np.absolute(ers_array),
+                  out=percentage_difference_array, where=(ers_array != 0))
+        percentage_difference_array *= 100.0
+        percentage_difference_array[absolute_difference_array == 0] = 0.0
+
+    absolute_difference_reduction = reduce_array(absolute_difference_array)
+    return {'nc': reduce_array(nc_array),
+            'ers': reduce_array(ers_array),
+            'percentage_difference': reduce_array(percentage_difference_array),
+            'max_absolute_difference': absolute_difference_reduction[1],
+            'identical_tile_count': 0,
+            'tile_count': 1,
+            }
+
+
+def merge_tile_reductions(band_reduction, tile_reduction):
+    '''
+    Function to combine the reductions for a tile into the reductions for a band (None for the first tile)
+    '''
+    if band_reduction is None:
+        return tile_reduction
+
+    max_absolute_differences = [value for value in [band_reduction['max_absolute_difference'],
+                                                    tile_reduction['max_absolute_difference']]
+                                if value is not None]
+    return {'nc': merge_reductions(band_reduction['nc'], tile_reduction['nc']),
+            'ers': merge_reductions(band_reduction['ers'], tile_reduction['ers']),
+            'percentage_difference': merge_reductions(band_reduction['percentage_difference'],
+                                                      tile_reduction['percentage_difference']),
+            'max_absolute_difference': max(max_absolute_differences) if max_absolute_differences else None,
+            'identical_tile_count': band_reduction['identical_tile_count'] + tile_reduction['identical_tile_count'],
+            'tile_count': band_reduction['tile_count'] + tile_reduction['tile_count'],
+            }
+
+
+def select_sample_tiles(tiles, shape, sample_fraction, random_generator=None):
+    '''
+    Function to return (sample_tiles, boundary_count, interior_count) for a random sample of tiles.
+    All tiles on the boundary of the array are included, together with sample_fraction of the interior tiles
+    (at least one). Sample tiles are returned in their original order
+    '''
+    random_generator = random_generator or random.Random()
+    nrows, ncols = shape
+    boundary_indices = [tile_index for tile_index, (row_start, row_end, col_start, col_end) in enumerate(tiles)
+                        if row_start == 0 or col_start == 0 or row_end == nrows or col_end == ncols]
+    interior_indices = sorted(set(range(len(tiles))) - set(boundary_indices))
+    sample_count = min(int(math.ceil(sample_fraction * len(interior_indices))), len(interior_indices))
+
+    sample_indices = sorted(boundary_indices + random_generator.sample(interior_indices, sample_count))
+    return [tiles[tile_index] for tile_index in sample_indices], len(boundary_indices), len(interior_indices)
+
+
+def get_detection_confidence(population_count, sample_count, differing_count):
+    '''
+    Function to return the probability that a random sample (without replacement) of sample_count tiles
+    from population_count tiles includes at least one of differing_count differing tiles
+    '''
+    if differing_count <= 0:
+        return 0.0
+    if sample_count > population_count - differing_count:
+        return 1.0
+
+    miss_probability = 1.0
+    for sample_index in range(sample_count):
+        miss_probability *= float(population_count - differing_count - sample_index) / (population_count - sample_index)
+    return 1.0 - miss_probability
+
+
+def _init_tile_worker(ers_path, nc_path, reader):
+    '''
+    Process pool initializer to open the ERS and NetCDF files once in each worker
+    '''
+    global _worker_readers
+    _worker_readers = (open_grid_reader(ers_path, reader), netCDF4.Dataset(nc_path, 'r'))
+
+
+def _close_tile_worker():
+    '''
+    Function to close the files opened by _init_tile_worker() in this process
+    '''
+    global _worker_readers
+    if _worker_readers is not None:
+        _worker_readers[1].close()
+        _worker_readers = None
+
+
+def _compare_tile(task):
+    '''
+    Process pool task function to compare one chunk-aligned tile of a band and return its reductions.
+    allocated_windows lists the windows of allocated chunks within the tile, or is None if allocation is unknown
+    '''
+    band_number, variable_name, y_inverted, nodata_value, packed, tile, allocated_windows, bitwise = task
+    row_start, row_end, col_start, col_end = tile
+    ers_reader, nc_dataset = _worker_readers
+    variable = nc_dataset.variables[variable_name]
+
+    # Packed fill values are unpacked to the ERS no-data value, otherwise the fill value is the no-data value
+    if packed:
+        fill_value = np.nan if nodata_value is None else nodata_value
+    else:
+        fill_value = getattr(variable, '_FillValue', np.nan)
+
+    def read_nc_window(window_row_start, window_row_end, window_col_start, window_col_end):
+        nc_window_array = variable[window_row_start:window_row_end, window_col_start:window_col_end]
+        if isinstance(nc_window_array, np.ma.core.MaskedArray):
+            if packed:  # Restore ERS no-data value in place of unpacked fill values
+                nc_window_array = nc_window_array.filled(fill_value)
+            else:
+                nc_window_array = nc_window_array.data
+        return nc_window_array
+
+    if allocated_windows is None:
+        nc_array = read_nc_window(row_start, row_end, col_start, col_end)
+    else:  # Only allocated chunks are read
+        nc_array = np.empty((row_end - row_start, col_end - col_start),
+                            dtype=np.float64 if packed else variable.dtype)
+        nc_array[...] = fill_value
+        for window_row_start, window_row_end, window_col_start, window_col_end in allocated_windows:
+            nc_array[window_row_start - row_start:window_row_end - row_start,
+                     window_col_start - col_start:window_col_end - col_start] = read_nc_window(
+                window_row_start, window_row_end, window_col_start, window_col_end)
+
+    if y_inverted:  # NetCDF and ERS have the same Y-axis orientation
+        ers_array = ers_reader.read_window(band_number, row_start, row_end, col_start, col_end)
+    else:  # Need to read relocated window and flip it to convert UL origin to LL
+        ers_array = np.flipud(ers_reader.read_window(band_number,
+                                                     ers_reader.nrows - row_end,
+                                                     ers_reader.nrows - row_start,
+                                                     col_start, col_end))
+
+    return compare_tile_arrays(nc_array, ers_array, bitwise)
 
 
 class ERS2NetCDFChecker(object):
@@ -42,25 +272,34 @@ class ERS2NetCDFChecker(object):
     '''
     FILE_EXTENSION = 'zip'
 
-    def __init__(self, dataset_dir=None, debug=False):
+    def __init__(self, dataset_dir=None, debug=False, reader=None, processes=None, tile_bytes=None,
+                 bitwise=True, sample_fraction=None, seed=None):
         '''
         Constructor for class ERS2NetCDFChecker
+        Parameter:
+            reader: Type of grid reader used to access ERS data ('gdal' or 'memmap')
+            processes: Number of worker processes comparing tiles. Defaults to the number of CPUs, 1 for serial
+            tile_bytes: Maximum uncompressed size of each chunk-aligned tile. Defaults to DEFAULT_TILE_BYTES
+            bitwise: Boolean flag indicating whether tiles which are bit-identical in both datasets should be
+                accepted without computing differences
+            sample_fraction: Fraction of interior tiles to compare in addition to all boundary tiles,
+                or None to compare all tiles. Tiles are single chunks when sampling, so tile_bytes may not be given
+            seed: Seed for random tile selection when sampling
         '''
-        self._zipdir = None
+        assert sample_fraction is None or not tile_bytes, \
+            'Tile size cannot be specified when sampling, because sampled tiles are single chunks'
+        self._reader = reader
+        self._processes = processes
+        self._tile_bytes = tile_bytes
+        self._bitwise = bitwise
+        self._sample_fraction = sample_fraction
+        self._random = random.Random(seed)
         self._debug = False
         self.debug = debug  # Set property
 
         if dataset_dir:
             self.check_ERS2NetCDF(dataset_dir)
 
-    def __del__(self):
-        '''
-        Destructor for class ERS2NetCDFChecker
-        '''
-        if self._zipdir and not self._debug:
-            logger.info('Removing temporary directory %s', self._zipdir)
-            rmtree(self._zipdir)
-
     def check_ERS2NetCDF(self, dataset_dir):
         '''
         Function to check NetCDF file against zipped ERS. Assumes only one .zip file and one .nc file exist in dataset_dir
@@ -69,64 +308,32 @@ class ERS2NetCDFChecker(object):
             dataset_dir), '%s is not a directory' % dataset_dir
         zip_list = glob.glob(os.path.join(dataset_dir, '*.zip'))
         assert len(zip_list) == 1, 'Unable to find single zip file in %s. (%s)' % (
-            dataset_dir, zip_list.join(', '))
+            dataset_dir, ', '.join(zip_list))
         zip_path = zip_list[0]
         nc_list = glob.glob(os.path.join(dataset_dir, '*.nc'))
         assert len(nc_list) == 1, 'Unable to find single NetCDF file in %s. (%s)' % (
-            dataset_dir, nc_list.join(', '))
+            dataset_dir, ', '.join(nc_list))
         nc_path = nc_list[0]
 
-        # Remove any existing zip directory
-        if self._zipdir:
-            logger.info(
-                'Removing previous temporary directory %s',
-                self._zipdir)
-            os.removedirs(self._zipdir)
-
-        base_path = os.path.join(
-            tempfile.gettempdir(), os.path.splitext(
-                os.path.basename(zip_path))[0])
-        self._zipdir = base_path
-
-        # Unzip file into fresh directory
-        zipdir_revision = 0
-        while os.path.exists(self._zipdir):
-            zipdir_revision += 1
-            self._zipdir = '%s_%s' % (base_path, zipdir_revision)
-        logger.debug('self._zipdir = %s', self._zipdir)
+        # ERS files are read directly from the zip archive via GDAL /vsizip/ paths, so nothing is extracted
+        zip_file = zipfile.ZipFile(zip_path)
+        file_list = [zip_info.filename for zip_info in zip_file.infolist()
+                     if not zip_info.filename.endswith('/')]  # Ignore directory entries
+        zip_file.close()
 
-        try:
-            os.makedirs(self._zipdir)
-        except OSError as exception:
-            if exception.errno != errno.EEXIST or not os.path.isdir(
-                    self._zipdir):
-                raise exception
-
-        unzip_command = ['unzip',
-                         zip_path,
-                         '-d',
-                         self._zipdir
-                         ]
-
-        subprocess.check_call(unzip_command)
-        logger.info('%s unzipped into %s', zip_path, self._zipdir)
-
-        file_list = os.listdir(self._zipdir)
         extension_set = set([os.path.splitext(file_path)[1].lower()
                              for file_path in file_list])
         logger.debug('file_list = %s', file_list)
         logger.debug('extension_set = %s', extension_set)
 
         if set(['.ers', '']) <= extension_set:  # N.B: .isi files are optional
-            logger.info('%s contains an ERS dataset', self._zipdir)
+            logger.info('%s contains an ERS dataset', zip_path)
             ers_list = [
                 file_path for file_path in file_list if file_path.lower().endswith('.ers')]
             assert len(
-                ers_list) == 1, 'Multiple .ers files found in %s' % self._zipdir
+                ers_list) == 1, 'Multiple .ers files found in %s' % zip_path
 
-            ers_path = os.path.join(self._zipdir, ers_list[0])
-            if os.path.exists(ers_path):
-                self.compare_ERS2NetCDF(ers_path, nc_path)
+            self.compare_ERS2NetCDF(make_vsizip_path(zip_path, ers_list[0]), nc_path)
 
         else:
             raise Exception('Unhandled file types in zip file %s' % zip_path)
@@ -136,6 +343,7 @@ class ERS2NetCDFChecker(object):
         Function to compare ERS file to NetCDF file
         Currently retrieves data from ERS file using GDAL, and from NetCDF file using netCDF4.
         Note that NetCDF array is YX ordered, with a LL origin, while the ERS is XY ordered with a UL origin.
+        Data is compared in chunk-aligned tiles, each reduced to min/max/sum/count values in a process pool
         '''
 
         def check_ers_extent(ers_path, geotransform):
@@ -214,7 +422,8 @@ class ERS2NetCDFChecker(object):
                 return value
 
             try:
-                ers_metadata = ERSMetadata(ers_path)
+                ers_metadata = ERSMetadata()
+                ers_metadata.read_string(read_text(ers_path))  # N.B: May be in zip archive
                 
                 assert (abs(float(ers_metadata.get_metadata(['DatasetHeader', 'RasterInfo', 'CellInfo', 
                         'Xdimension'])) - geotransform[1]) < FLOAT_TOLERANCE), 'ERS & GDAL pixel X size are not equal'
@@ -257,11 +466,12 @@ class ERS2NetCDFChecker(object):
                 raise
 
         print 'Comparing ERS file %s and NetCDF file %s' % (ers_path, nc_path)
-        assert os.path.isfile(
+        assert grid_file_exists(
             ers_path), 'ERS file %s does not exist' % ers_path
         assert os.path.isfile(
             nc_path), 'NetCDF file %s does not exist' % nc_path
 
+        pool = None
         try:
             ers_gdal_dataset = gdal.Open(ers_path, gdalconst.GF_Read)
             assert ers_gdal_dataset, 'Unable to open ERS file %s using GDAL' % ers_path
@@ -274,12 +484,24 @@ class ERS2NetCDFChecker(object):
             nc_dataset = netCDF4.Dataset(nc_path, 'r')
             assert nc_dataset, 'Unable to open NetCDF file %s using netCDF4' % nc_path
 
-            if (ers_gdal_dataset.RasterCount == 1) and (
-                    nc_gdal_dataset.RasterCount == 1):
-                print 'PASS: Both datasets have a single data variable'
+            # Find variables with "grid_mapping" attribute in NetCDF dataset -
+            # assumed to be 2D data variables in band order
+            data_variables = [
+                variable for variable in nc_dataset.variables.values() if hasattr(
+                    variable, 'grid_mapping')]
+
+            if ers_gdal_dataset.RasterCount == len(data_variables):
+                print 'PASS: Both datasets have %d data variable(s)' % len(data_variables)
             else:
                 raise Exception(
-                    'Both datasets DO NOT have a single data variable')
+                    'Both datasets DO NOT have the same number of data variables')
+
+            # GDAL opens multi-variable NetCDF files (including those with overview variables) as subdatasets
+            use_subdatasets = (len(data_variables) > 1 or nc_gdal_dataset.RasterCount != 1)
+            if use_subdatasets:
+                # Open first data variable for checks
+                nc_gdal_dataset = gdal.Open('NETCDF:"%s":%s' % (nc_path, data_variables[0].name), gdalconst.GF_Read)
+                assert nc_gdal_dataset, 'Unable to open NetCDF variable %s using GDAL' % data_variables[0].name
 
             if (ers_gdal_dataset.RasterXSize == nc_gdal_dataset.RasterXSize) and (
                     ers_gdal_dataset.RasterYSize == nc_gdal_dataset.RasterYSize):
@@ -300,37 +522,11 @@ class ERS2NetCDFChecker(object):
                 raise Exception(
                     'Both datasets do not have the same spatial extent and resolution')
 
-            ers_band = ers_gdal_dataset.GetRasterBand(1)
-            nc_band = ers_gdal_dataset.GetRasterBand(1)
-
-            if ers_band.GetNoDataValue() == nc_band.GetNoDataValue():
-                print 'PASS: Both datasets have the same no-data value'
+            if self._processes != 1:
+                pool = multiprocessing.Pool(self._processes, _init_tile_worker, (ers_path, nc_path, self._reader))
             else:
-                raise Exception(
-                    'Both datasets do not have the same no-data value')
+                _init_tile_worker(ers_path, nc_path, self._reader)
 
-            # Find variable with "grid_mapping" attribute in NetCDF dataset -
-            # assumed to be 2D data variable
-            try:
-                data_variable = [
-                    variable for variable in nc_dataset.variables.values() if hasattr(
-                        variable, 'grid_mapping')][0]
-            except:
-                raise Exception(
-                    'Unable to determine data variable (must have "grid_mapping" attribute')
-
-            pixel_count = 0
-            weighted_mean_nc_value = 0
-            weighted_mean_ers_value = 0
-            weighted_mean_percentage_difference = 0
-
-            min_nc_value = None
-            max_nc_value = None
-            min_ers_value = None
-            max_ers_value = None
-            min_percentage_difference = None
-            max_percentage_difference = None
-            
             y_variable = (nc_dataset.variables.get('lat') 
                           or nc_dataset.variables.get('y')
                           )
@@ -340,97 +536,183 @@ class ERS2NetCDFChecker(object):
                 print 'Note: y-axis indexing is Southward-positive in netCDF file'
             else:
                 print 'Note: y-axis indexing is Northward-positive in netCDF file'
-        
-            for nc_piece_array, start_indices in array_pieces(
-                    data_variable, max_bytes=MAX_BYTES):
-                piece_size = reduce(lambda x, y: x * y, nc_piece_array.shape)
-                # print start_indices, nc_piece_array.shape, piece_size
-
-                if isinstance(nc_piece_array, np.ma.core.MaskedArray):
-                    nc_piece_array = nc_piece_array.data
-
-                if y_inverted: # NetCDF and ERS have the same Y-axis orientation
-                    # Note reversed indices to match YX ordering in NetCDF with XY
-                    # ordering in GDAL
-                    ers_piece_array = ers_band.ReadAsArray(
-                        start_indices[1],
-                        start_indices[0],
-                        nc_piece_array.shape[1],
-                        nc_piece_array.shape[0])
-                else: # Need to flip and relocate array
-                    # Invert NetCDF piece array to convert LL origin to UL
-                    nc_piece_array = np.flipud(nc_piece_array)
-    
-                    # Note reversed indices to match YX ordering in NetCDF with XY
-                    # ordering in GDAL
-                    ers_piece_array = ers_band.ReadAsArray(
-                        start_indices[1],
-                        ers_gdal_dataset.RasterYSize -
-                        start_indices[0] -
-                        nc_piece_array.shape[0],
-                        nc_piece_array.shape[1],
-                        nc_piece_array.shape[0])
-
-                percentage_difference_piece_array = np.absolute(
-                    1.0 - nc_piece_array / ers_piece_array) * 100.0
-
-                if pixel_count:  # Not the first piece
-                    min_nc_value = min(min_nc_value, np.nanmin(nc_piece_array))
-                    max_nc_value = max(max_nc_value, np.nanmax(nc_piece_array))
-                    min_ers_value = min(
-                        min_ers_value, np.nanmin(ers_piece_array))
-                    max_ers_value = max(
-                        max_ers_value, np.nanmax(ers_piece_array))
-                    min_percentage_difference = min(
-                        min_percentage_difference,
-                        np.nanmin(percentage_difference_piece_array))
-                    max_percentage_difference = max(
-                        max_percentage_difference,
-                        np.nanmax(percentage_difference_piece_array))
-                else:
-                    min_nc_value = np.nanmin(nc_piece_array)
-                    max_nc_value = np.nanmax(nc_piece_array)
-                    min_ers_value = np.nanmin(ers_piece_array)
-                    max_ers_value = np.nanmax(ers_piece_array)
-                    min_percentage_difference = np.nanmin(
-                        percentage_difference_piece_array)
-                    max_percentage_difference = np.nanmax(
-                        percentage_difference_piece_array)
-
-                weighted_mean_nc_value = weighted_mean_nc_value + \
-                    np.nanmean(nc_piece_array) * piece_size
-                weighted_mean_ers_value = weighted_mean_ers_value + \
-                    np.nanmean(ers_piece_array) * piece_size
-                weighted_mean_percentage_difference = weighted_mean_percentage_difference + \
-                    np.nanmean(percentage_difference_piece_array) * piece_size
-
-                pixel_count += piece_size
-
-            mean_nc_value = weighted_mean_nc_value / pixel_count
-            mean_ers_value = weighted_mean_ers_value / pixel_count
-            mean_percentage_difference = weighted_mean_percentage_difference / pixel_count
-
-            if max_percentage_difference < FLOAT_TOLERANCE:
-                print 'PASS: There is less than %f%% percentage_difference in all data values' % FLOAT_TOLERANCE
-            else:
-                raise Exception(
-                    'There is more than %f%% percentage_difference in data values' %
-                    FLOAT_TOLERANCE)
 
-            print 'min nc_value = %f, mean nc_value = %f, max nc_value = %f' % (min_nc_value, mean_nc_value, max_nc_value)
-            print 'min ers_value = %f, mean ers_value = %f, max ers_value = %f' % (min_ers_value, mean_ers_value, max_ers_value)
-            print 'min percentage_difference = %f%%, mean percentage_difference = %f%%, max percentage_difference = %f%%' % (min_percentage_difference, mean_percentage_difference, max_percentage_difference)
+            # Unallocated chunks can only read back as _FillValue, so only the ERS side needs checking there
+            allocated_chunks = get_allocated_chunks(nc_path, [variable.name for variable in data_variables])
+
+            for band_number, data_variable in enumerate(data_variables, 1):
+                print 'Comparing ERS band %d with NetCDF variable %s' % (band_number, data_variable.name)
+                ers_band = ers_gdal_dataset.GetRasterBand(band_number)
+                if use_subdatasets:
+                    # N.B: Keep reference to dataset so that band remains valid
+                    nc_band_dataset = gdal.Open('NETCDF:"%s":%s' % (nc_path, data_variable.name),
+                                                gdalconst.GF_Read)
+                else:
+                    nc_band_dataset = nc_gdal_dataset
+                nc_band = nc_band_dataset.GetRasterBand(1)
+
+                # Packed variables hold a packed _FillValue in place of the ERS no-data value
+                packed = is_packed(data_variable)
+                if packed:
+                    print 'Note: %s is packed into %s with scale_factor %s and add_offset %s' % (
+                        data_variable.name, data_variable.dtype, getattr(data_variable, 'scale_factor', 1.0),
+                        getattr(data_variable, 'add_offset', 0.0))
+                    if hasattr(data_variable, '_FillValue') or ers_band.GetNoDataValue() is None:
+                        print 'PASS: Packed NetCDF variable has a fill value for the ERS no-data value'
+                    else:
+                        raise Exception(
+                            'Packed NetCDF variable has no fill value for the ERS no-data value')
+                elif ers_band.GetNoDataValue() == nc_band.GetNoDataValue():
+                    print 'PASS: Both datasets have the same no-data value'
+                else:
+                    raise Exception(
+                        'Both datasets do not have the same no-data value')
+
+                # Quantized variables are checked against the tolerance recorded at conversion
+                absolute_tolerance, relative_tolerance = get_quantization_tolerance(data_variable)
+                if packed and absolute_tolerance is None and relative_tolerance is None:
+                    absolute_tolerance = get_packing_tolerance(data_variable)
+                    print 'Note: %s was packed with an absolute tolerance of %g' % (data_variable.name,
+                                                                                   absolute_tolerance)
+                elif absolute_tolerance is not None:
+                    print 'Note: %s was quantized with an absolute tolerance of %g' % (data_variable.name,
+                                                                                      absolute_tolerance)
+                elif relative_tolerance is not None:
+                    print 'Note: %s was quantized with a relative tolerance of %g' % (data_variable.name,
+                                                                                     relative_tolerance)
+
+                nrows, ncols = data_variable.shape
+                chunking = data_variable.chunking()
+                chunk_shape = tuple(chunking) if chunking != 'contiguous' else (1, ncols)
+
+                # Unallocated chunks can only read back as _FillValue, so they are compared without being read
+                variable_allocated_chunks = None
+                if data_variable.name in allocated_chunks and hasattr(data_variable, '_FillValue'):
+                    variable_allocated_chunks = allocated_chunks[data_variable.name]
+                    unallocated_cell_count = sum([(row_end - row_start) * (col_end - col_start)
+                                                  for row_start, row_end, col_start, col_end
+                                                  in get_chunk_windows(chunk_shape, variable_allocated_chunks,
+                                                                       0, nrows, 0, ncols, allocated=False)])
+                    print 'Note: %d of %d cells of %s are in unallocated chunks' % (unallocated_cell_count,
+                                                                                    nrows * ncols,
+                                                                                    data_variable.name)
+
+                tile_bytes = self._tile_bytes
+                # Sample single chunks so that only the outer ring of chunks counts as boundary tiles
+                if self._sample_fraction is not None:
+                    tile_bytes = chunk_shape[0] * chunk_shape[1] * data_variable.dtype.itemsize
+                tiles = get_tile_windows(data_variable.shape, chunk_shape, data_variable.dtype.itemsize, tile_bytes)
+
+                if self._sample_fraction is not None:
+                    tile_count = len(tiles)
+                    tiles, boundary_count, interior_count = select_sample_tiles(tiles, data_variable.shape,
+                                                                                self._sample_fraction, self._random)
+                    sample_count = len(tiles) - boundary_count
+                    print 'Note: Comparing %d boundary and %d of %d interior tiles of %s' % (
+                        boundary_count, sample_count, interior_count, data_variable.name)
+
+                task_list = []
+                for tile in tiles:
+                    allocated_windows = (get_chunk_windows(chunk_shape, variable_allocated_chunks, *tile)
+                                         if variable_allocated_chunks is not None else None)
+                    task_list.append((band_number, data_variable.name, y_inverted, ers_band.GetNoDataValue(),
+                                      packed, tile, allocated_windows, self._bitwise))
+                if not y_inverted:  # Read ERS rows in file order so that zip members are decompressed only once
+                    task_list.reverse()
+
+                band_reduction = None
+                for tile_reduction in (pool.imap_unordered(_compare_tile, task_list) if pool
+                                       else (_compare_tile(task) for task in task_list)):
+                    band_reduction = merge_tile_reductions(band_reduction, tile_reduction)
+
+                if not band_reduction or not band_reduction['nc'][3]:
+                    print 'Note: NetCDF variable %s has no data to compare' % data_variable.name
+                    continue
+
+                if self._bitwise:
+                    print 'Note: %d of %d tiles of %s are bitwise identical to the ERS data' % (
+                        band_reduction['identical_tile_count'], band_reduction['tile_count'], data_variable.name)
+
+                min_nc_value, max_nc_value, mean_nc_value = get_reduction_values(band_reduction['nc'])
+                min_ers_value, max_ers_value, mean_ers_value = get_reduction_values(band_reduction['ers'])
+                (min_percentage_difference, max_percentage_difference,
+                 mean_percentage_difference) = get_reduction_values(band_reduction['percentage_difference'])
+                max_absolute_difference = band_reduction['max_absolute_difference']
+
+                if absolute_tolerance is not None:
+                    if max_absolute_difference <= absolute_tolerance:
+                        print 'PASS: There is no more than %g absolute difference in all data values' % absolute_tolerance
+                    else:
+                        raise Exception(
+                            'There is more than %g absolute difference in data values' %
+                            absolute_tolerance)
+                else:
+                    percentage_tolerance = max(FLOAT_TOLERANCE, (relative_tolerance or 0.0) * 100.0)
+                    if max_percentage_difference < percentage_tolerance:
+                        print 'PASS: There is less than %f%% percentage_difference in all data values' % percentage_tolerance
+                    else:
+                        raise Exception(
+                            'There is more than %f%% percentage_difference in data values' %
+                            percentage_tolerance)
+
+                print 'min nc_value = %f, mean nc_value = %f, max nc_value = %f' % (min_nc_value, mean_nc_value, max_nc_value)
+                print 'min ers_value = %f, mean ers_value = %f, max ers_value = %f' % (min_ers_value, mean_ers_value, max_ers_value)
+                print 'min percentage_difference = %f%%, mean percentage_difference = %f%%, max percentage_difference = %f%%' % (min_percentage_difference, mean_percentage_difference, max_percentage_difference)
+                print 'max absolute_difference = %g' % max_absolute_difference
+
+                if self._sample_fraction is not None:
+                    # Worst case is that all differing tiles are in the sampled interior
+                    differing_count = int(math.ceil(DETECTION_FRACTION * tile_count))
+                    print 'Note: Statistics are for sampled tiles only'
+                    print 'Note: %.2f%% confidence of detecting differences in %g%% or more of tiles' % (
+                        get_detection_confidence(interior_count, sample_count, differing_count) * 100.0,
+                        DETECTION_FRACTION * 100.0)
 
         except Exception as e:
             print 'FAIL: %s' % e.message
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+            else:
+                _close_tile_worker()
 
 
 def main():
-    if len(sys.argv) == 2:  # Only directory provided
-        e2nchecker = ERS2NetCDFChecker(sys.argv[1], debug=True)
-    if len(sys.argv) == 3:  # ERS and NetCDF filenames provided
-        e2nchecker = ERS2NetCDFChecker(debug=True)
-        e2nchecker.compare_ERS2NetCDF(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(description='Check NetCDF file against ERS source')
+    parser.add_argument('paths', nargs='+',
+                        help='Dataset directory, or ERS file path and NetCDF file path')
+    parser.add_argument('--reader', choices=['gdal', 'memmap'], default='gdal',
+                        help='Reader used to access ERS data (default: gdal)')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='Number of worker processes comparing tiles (default: number of CPUs)')
+    parser.add_argument('--tile-bytes', type=int, default=None,
+                        help='Maximum uncompressed size of each comparison tile (default: %d)' % DEFAULT_TILE_BYTES)
+    parser.add_argument('--full-compare', action='store_true',
+                        help='Compute differences for every tile, including bit-identical ones')
+    parser.add_argument('--sample', dest='sample_fraction', type=float, nargs='?', const=DEFAULT_SAMPLE_FRACTION,
+                        default=None,
+                        help='Compare all boundary tiles and a random fraction of interior tiles (default fraction: %g)' %
+                        DEFAULT_SAMPLE_FRACTION)
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for random tile selection in sample mode')
+    args = parser.parse_args()
+    if args.sample_fraction is not None and args.tile_bytes:
+        parser.error('--tile-bytes cannot be used with --sample, because sampled tiles are single chunks')
+
+    checker_options = {'debug': True,
+                       'reader': args.reader,
+                       'processes': args.processes,
+                       'tile_bytes': args.tile_bytes,
+                       'bitwise': not args.full_compare,
+                       'sample_fraction': args.sample_fraction,
+                       'seed': args.seed,
+                       }
+    if len(args.paths) == 1:  # Only directory provided
+        e2nchecker = ERS2NetCDFChecker(args.paths[0], **checker_options)
+    if len(args.paths) == 2:  # ERS and NetCDF filenames provided
+        e2nchecker = ERS2NetCDFChecker(**checker_options)
+        e2nchecker.compare_ERS2NetCDF(args.paths[0], args.paths[1])
 
 if __name__ == '__main__':
     main()